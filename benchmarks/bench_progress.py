@@ -0,0 +1,43 @@
+"""
+Measures the cost of calling `Alerter.progress` on every step of a loop, compared with
+calling a function that does nothing.
+
+    python -m benchmarks.bench_progress [--steps 10000000]
+"""
+import argparse
+import timeit
+
+from simulert.alerter import Alerter
+
+
+def noop(done, total):
+    pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--steps", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    alerter = Alerter("bench").remove_default_handler()
+    alerter.configure_progress(interval=1.0)
+    steps = args.steps
+
+    def run_noop():
+        for done in range(steps):
+            noop(done, steps)
+
+    def run_progress():
+        for done in range(steps):
+            alerter.progress(done, steps)
+
+    baseline = min(timeit.repeat(run_noop, number=1, repeat=args.repeat)) / steps
+    progress = min(timeit.repeat(run_progress, number=1, repeat=args.repeat)) / steps
+    print(f"empty call:        {baseline * 1e9:6.1f} ns/step")
+    print(f"Alerter.progress:  {progress * 1e9:6.1f} ns/step")
+    print(f"overhead:          {(progress - baseline) * 1e9:6.1f} ns/step")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Measures the cost per item of wrapping a loop in `Alerter.track`, compared with a bare
+loop and with a plain generator that counts the items, as a tqdm-style wrapper would.
+
+    python -m benchmarks.bench_track [--items 10000000]
+"""
+import argparse
+import timeit
+
+from simulert.alerter import Alerter
+
+
+def counting(iterable, total):
+    done = 0
+    for item in iterable:
+        yield item
+        done += 1
+        if done >= total:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    alerter = Alerter("bench").remove_default_handler()
+    alerter.configure_progress(interval=1.0)
+    items = args.items
+
+    def run_bare():
+        for _ in range(items):
+            pass
+
+    def run_generator():
+        for _ in counting(range(items), items):
+            pass
+
+    def run_track():
+        for _ in alerter.track(range(items)):
+            pass
+
+    def per_item(function):
+        return min(timeit.repeat(function, number=1, repeat=args.repeat)) / items
+
+    bare = per_item(run_bare)
+    generator = per_item(run_generator)
+    track = per_item(run_track)
+    print(f"bare loop:          {bare * 1e9:6.1f} ns/item")
+    print(f"counting generator: {generator * 1e9:6.1f} ns/item")
+    print(f"Alerter.track:      {track * 1e9:6.1f} ns/item")
+    print(f"overhead:           {(track - bare) * 1e9:6.1f} ns/item")
+
+
+if __name__ == "__main__":
+    main()
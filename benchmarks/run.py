@@ -0,0 +1,157 @@
+"""
+Measures the throughput and latency of sending alerts through each handler, and
+through an alerter with all of them, against local stand-in servers.
+
+    python -m benchmarks.run [--count 200] [--size 256] [--rate 0] [--latency 0]
+        [--handlers email pushover slack all] [--modes sync concurrent queued]
+        [--metrics] [--output bench.json]
+
+Each combination of handler and mode reports alerts/s and the p50/p99 latency of the
+`alert` call in milliseconds. In queued mode throughput includes the time to flush the
+queue. With --metrics, alerters record delivery metrics, to measure their overhead.
+Results are written as JSON so that releases can be compared.
+"""
+import argparse
+import json
+import logging
+import platform
+import sys
+import time
+from datetime import datetime
+
+import simulert
+from benchmarks.servers import APIStub, SMTPSink
+from simulert.alerter import Alerter
+from simulert.delivery import Status
+from simulert.handlers import Emailer, Pushover, Slacker
+
+HANDLERS = ("email", "pushover", "slack", "all")
+MODES = ("sync", "concurrent", "queued")
+
+
+def percentile(sorted_values, fraction):
+    """The value at a fraction of the way through a sorted list."""
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def make_handlers(name, smtp, api):
+    handlers = {
+        "email": lambda: Emailer(
+            host=smtp.host,
+            port=smtp.port,
+            authentication="bench,bench",
+            sender="Bench,bench@example.com",
+            recipient="Bench,bench@example.com",
+        ),
+        "pushover": lambda: Pushover(
+            "token", "user", url=f"{api.url}/1/messages.json"
+        ),
+        "slack": lambda: Slacker(
+            "token", "user", base_url=f"{api.url}/api/", channel="D0"
+        ),
+    }
+    if name == "all":
+        return [make() for make in handlers.values()]
+    return [handlers[name]()]
+
+
+def run_case(handler_name, mode, args, smtp, api):
+    alerter = Alerter("bench").remove_default_handler()
+    handlers = make_handlers(handler_name, smtp, api)
+    for handler in handlers:
+        alerter.add_handler(handler)
+    if mode == "concurrent":
+        alerter.enable_concurrency()
+    elif mode == "queued":
+        alerter.enable_queue(maxsize=args.count)
+    if args.metrics:
+        alerter.enable_metrics()
+    message = "x" * args.size
+    alerter.alert(message)  # Warm up connections and remembered transports.
+    alerter.flush()
+
+    latencies = []
+    failed = 0
+    start = time.perf_counter()
+    for i in range(args.count):
+        if args.rate:
+            delay = start + i / args.rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sent = time.perf_counter()
+        results = alerter.alert(message)
+        latencies.append(time.perf_counter() - sent)
+        failed += sum(result.status is not Status.DELIVERED for result in results or ())
+    alerter.flush()
+    elapsed = time.perf_counter() - start
+    alerter.disable_queue()
+    for handler in handlers:
+        if hasattr(handler, "close"):
+            handler.close()
+
+    latencies.sort()
+    return {
+        "handler": handler_name,
+        "mode": mode,
+        "count": args.count,
+        "size": args.size,
+        "rate": args.rate,
+        "latency": args.latency,
+        "metrics": args.metrics,
+        "alerts_per_sec": args.count / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+        "failed": failed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--count", type=int, default=200, help="alerts per case")
+    parser.add_argument("--size", type=int, default=256, help="message size in bytes")
+    parser.add_argument(
+        "--rate", type=float, default=0, help="alerts per second; 0 for unpaced"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0, help="server response delay in seconds"
+    )
+    parser.add_argument("--handlers", nargs="+", choices=HANDLERS, default=HANDLERS)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument(
+        "--metrics", action="store_true", help="record delivery metrics"
+    )
+    parser.add_argument("--output", help="path to write the results to as JSON")
+    args = parser.parse_args(argv)
+    # The stand-in mail server is plain text, which the email handler warns about.
+    logging.getLogger("simulerts").setLevel(logging.ERROR)
+
+    results = []
+    with SMTPSink(args.latency) as smtp, APIStub(args.latency) as api:
+        for handler_name in args.handlers:
+            for mode in args.modes:
+                result = run_case(handler_name, mode, args, smtp, api)
+                results.append(result)
+                print(
+                    f"{handler_name:>8} {mode:>10}: {result['alerts_per_sec']:9.1f}"
+                    f" alerts/s  p50 {result['p50_ms']:8.3f} ms"
+                    f"  p99 {result['p99_ms']:8.3f} ms  failed {result['failed']}"
+                )
+
+    if args.output:
+        report = {
+            "simulert": simulert.__version__,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(),
+            "arguments": vars(args),
+            "results": results,
+        }
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Local stand-ins for the services that handlers send alerts to, so that the handlers
+can be benchmarked without the network.
+"""
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server:
+    """Runs a socketserver in a background thread."""
+
+    def __init__(self, server):
+        self._server = server
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.01,), daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _SMTPRequestHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        try:
+            self.converse(self.server.stub)
+        except ConnectionError:
+            pass  # Clients probing for SSL hang up abruptly.
+
+    def converse(self, sink):
+        self.reply("220 sink ready")
+        for line in self.rfile:
+            verb = line[:4].upper()
+            if verb in (b"EHLO", b"HELO"):
+                self.reply("250-sink")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif verb == b"AUTH":
+                self.reply("235 authenticated")
+            elif verb == b"DATA":
+                self.reply("354 go ahead")
+                for data in self.rfile:
+                    if data == b".\r\n":
+                        break
+                time.sleep(sink.latency)
+                sink.received += 1
+                self.reply("250 OK")
+            elif verb == b"QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class SMTPSink(_Server):
+    """An SMTP server that accepts and discards every email."""
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Arguments:
+            latency (float): the number of seconds to wait before accepting an email.
+        """
+        self.latency = latency
+        self.received = 0
+        super().__init__(
+            socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SMTPRequestHandler)
+        )
+
+
+class _APIRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Buffer each response so that it is sent in one packet: separate writes for the
+    # headers and body stall kept-alive clients on delayed ACKs.
+    wbufsize = -1
+
+    def do_POST(self):
+        api = self.server.stub
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(api.latency)
+        api.received += 1
+        if self.path.startswith("/api/"):
+            body = {"ok": True, "channel": "D0", "ts": "0.0"}
+        else:
+            body = {"status": 1, "request": "0"}
+        response = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class APIStub(_Server):
+    """
+    An HTTP/1.1 server imitating the Pushover messages endpoint
+    (`/1/messages.json`) and the Slack web api (`/api/<method>`).
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Arguments:
+            latency (float): the number of seconds to wait before responding.
+        """
+        self.latency = latency
+        self.received = 0
+        super().__init__(ThreadingHTTPServer(("127.0.0.1", 0), _APIRequestHandler))
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
@@ -0,0 +1,263 @@
+import json
+import os
+import socket
+import socketserver
+import stat
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+from simulert.dispatch import QueueDispatcher
+from simulert.levels import COMPLETED, FAILED
+from simulert.logger import logger as simulert_logger
+
+logger = simulert_logger.getChild(__name__)
+
+Address = Union[str, Tuple[str, int]]
+
+# The number of failure messages quoted in a summary.
+MAX_QUOTED_FAILURES = 5
+
+
+def parse_address(address: str) -> Address:
+    """
+    Parse the address of an aggregator: "host:port" for TCP or otherwise the path of a
+    Unix domain socket.
+
+    Arguments:
+        address (str): the address to parse.
+
+    Returns:
+        (Union[str, Tuple[str, int]]): the socket address.
+    """
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit() and os.sep not in address:
+        return host, int(port)
+    return address
+
+
+def socket_family(address: Address) -> int:
+    """The socket address family of a parsed address."""
+    return socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+
+
+def _remove_socket(path: str) -> bool:
+    """
+    Remove a Unix domain socket, refusing to remove anything else at the path.
+
+    Returns:
+        (bool): whether there was a socket to remove.
+
+    Raises:
+        (ValueError): if something other than a socket is at the path.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return False
+    if not stat.S_ISSOCK(mode):
+        raise ValueError(f"{path} is not a socket, so the aggregator cannot use it.")
+    os.unlink(path)
+    return True
+
+
+class _Completions:
+    """The completions and failures reported so far by the processes of a run."""
+
+    __slots__ = ("completed", "failures", "timer")
+
+    def __init__(self):
+        self.completed = 0
+        self.failures = []
+        self.timer = None
+
+    def __len__(self):
+        return self.completed + len(self.failures)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                record = json.loads(line)
+                message, level = record["message"], int(record["level"])
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"Aggregator ignored a malformed alert: {line!r}")
+                continue
+            self.server.aggregator.receive(message, level, record.get("alerter", ""))
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Aggregator:
+    """
+    A server that receives alerts from many processes, through `Relay` handlers, and
+    sends them on with a single alerter, so that there is one connection to each
+    service. Completions and failures of processes reporting under the same alerter
+    name are merged into one summary alert, sent once `expected` processes have
+    reported or `window` seconds after the last report.
+    """
+
+    _attr_envvar_map = {"address": "SIMULERT_AGGREGATOR"}
+
+    def __init__(
+        self,
+        alerter,
+        address: Optional[str] = None,
+        expected: Optional[int] = None,
+        window: Optional[float] = 30.0,
+    ):
+        """
+        Arguments:
+            alerter (Alerter): the alerter to send the alerts and summaries with.
+            address (Optional[str]): the path of the Unix domain socket or the
+                "host:port" to listen on
+                [default: os.environ["SIMULERT_AGGREGATOR"]].
+            expected (Optional[int]): the number of processes expected to report their
+                completion under each alerter name.
+            window (Optional[float]): the number of seconds to wait for further
+                reports before sending a summary [default: 30].
+        """
+        address = address or os.environ.get(self._attr_envvar_map["address"])
+        if address is None:
+            raise ValueError(
+                "This aggregator was instantiated without an address. This can be"
+                " defined as an argument to the constructor or with the environment"
+                f" variable {self._attr_envvar_map['address']}."
+            )
+        address = parse_address(address)
+        if not isinstance(address, tuple):
+            _remove_socket(address)  # Left behind by an aggregator that was killed.
+        self.alerter = alerter
+        self.expected = expected
+        self.window = window
+        self._runs: Dict[str, _Completions] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        # A single sender so that every service is used from one thread at a time.
+        self._dispatcher = QueueDispatcher(
+            self._send, maxsize=10000, name="simulert-aggregator"
+        )
+        if isinstance(address, tuple):
+            self._server = _TCPServer(address, _RequestHandler)
+        else:
+            self._server = _UnixServer(address, _RequestHandler)
+        self._server.aggregator = self
+
+    @property
+    def address(self) -> str:
+        """The address the aggregator is listening on, in the form clients use."""
+        address = self._server.server_address
+        if isinstance(address, tuple):
+            return f"{address[0]}:{address[1]}"
+        return address
+
+    def _send(self, item):
+        self.alerter.alert(*item)
+
+    def receive(self, message: str, level: int, alerter: Optional[str] = ""):
+        """
+        Handle an alert from a process: completions and failures are held for the
+        summary and other alerts are sent on straight away.
+
+        Arguments:
+            message (str): the message of the alert.
+            level (int): the level of the alert.
+            alerter (Optional[str]): the name of the alerter that raised the alert.
+        """
+        if level not in (COMPLETED, FAILED):
+            self._dispatcher.put((message, level))
+            return
+        with self._lock:
+            run = self._runs.setdefault(alerter, _Completions())
+            if level == FAILED:
+                prefix = f"{alerter}: "
+                if alerter and message.startswith(prefix):
+                    message = message[len(prefix) :]  # The summary is prefixed.
+                run.failures.append(message)
+            else:
+                run.completed += 1
+            if run.timer is not None:
+                run.timer.cancel()
+                run.timer = None
+            if self.expected is None or len(run) < self.expected:
+                run.timer = threading.Timer(self.window, self.summarise, (alerter,))
+                run.timer.daemon = True
+                run.timer.start()
+                return
+            del self._runs[alerter]
+        self._dispatcher.put(self._summary(alerter, run))
+
+    def summarise(self, alerter: Optional[str] = None):
+        """
+        Send the summary of the processes that have reported so far.
+
+        Arguments:
+            alerter (Optional[str]): the alerter name of the run to summarise; all runs
+                if not given.
+        """
+        with self._lock:
+            names = list(self._runs) if alerter is None else [alerter]
+            runs = [(name, self._runs.pop(name, None)) for name in names]
+        for name, run in runs:
+            if run is None:
+                continue
+            if run.timer is not None:
+                run.timer.cancel()
+            self._dispatcher.put(self._summary(name, run))
+
+    def _summary(self, alerter: str, run: _Completions) -> Tuple[str, int]:
+        prefix = "" if not alerter else f"{alerter}: "
+        total = max(self.expected or 0, len(run))
+        summary = f"{prefix}{run.completed}/{total} processes completed"
+        if run.failures:
+            quoted = run.failures[:MAX_QUOTED_FAILURES]
+            if len(run.failures) > len(quoted):
+                quoted.append(f"and {len(run.failures) - len(quoted)} more")
+            summary += f", {len(run.failures)} failed: {'; '.join(quoted)}"
+        if total > len(run):
+            summary += f"; {total - len(run)} did not report"
+        level = COMPLETED if run.completed == total else FAILED
+        return summary.rstrip(".") + ".", level
+
+    def start(self):
+        """Serve from a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever,
+            args=(0.1,),  # So that closing does not wait long.
+            name="simulert-aggregator-server",
+            daemon=True,
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve until interrupted, then close."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop serving, send the summaries of unfinished runs and wait for them."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        address = self._server.server_address
+        if isinstance(address, str):
+            try:
+                _remove_socket(address)
+            except ValueError:
+                logger.warning(f"{address} was replaced, so it is left in place.")
+        self.summarise()
+        self._dispatcher.close()
@@ -0,0 +1,135 @@
+import mmap
+import os
+import zlib
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+# A multiple of the 57 bytes that base64 encodes as one 76 character MIME line.
+CHUNK_SIZE = 57 * 4096
+
+
+class Attachment:
+    """
+    A file to attach to an alert, such as a plot or the end of a log. Files are read
+    when the alert is sent, through a memory map and one chunk at a time, so that even
+    a multi-GB log can be attached without loading it whole.
+    """
+
+    __slots__ = ("path", "filename", "tail", "compress")
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        filename: Optional[str] = None,
+        tail: Optional[int] = None,
+        compress: Optional[bool] = False,
+    ):
+        """
+        Arguments:
+            path (Union[str, os.PathLike]): the path of the file.
+            filename (Optional[str]): the name the file is attached as
+                [default: the name of the file].
+            tail (Optional[int]): if given, only attach the last this many bytes of the
+                file, starting at the beginning of a line.
+            compress (Optional[bool]): whether to gzip the file, adding ".gz" to its
+                name [default: False].
+        """
+        self.path = os.fspath(path)
+        self.filename = filename or os.path.basename(self.path)
+        self.tail = tail
+        self.compress = compress
+
+    @property
+    def name(self) -> str:
+        """The name the file is attached as."""
+        return f"{self.filename}.gz" if self.compress else self.filename
+
+    @property
+    def mimetype(self) -> str:
+        if self.compress:
+            return "application/gzip"
+        import mimetypes  # Only needed once an alert with attachments is sent.
+
+        return mimetypes.guess_type(self.filename)[0] or "application/octet-stream"
+
+    @property
+    def size(self) -> int:
+        """The number of bytes that will be read from the file."""
+        size = os.path.getsize(self.path)
+        return size if self.tail is None else min(size, self.tail)
+
+    def chunks(self, chunk_size: Optional[int] = CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        The content of the attachment, one chunk at a time.
+
+        Arguments:
+            chunk_size (Optional[int]): the number of bytes read from the file at once
+                [default: CHUNK_SIZE].
+        """
+        compressor = zlib.compressobj(wbits=31) if self.compress else None  # gzip
+        with open(self.path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for offset in range(self._start(mapped, size), size, chunk_size):
+                        chunk = mapped[offset : offset + chunk_size]
+                        if compressor is not None:
+                            chunk = compressor.compress(chunk)
+                        if chunk:
+                            yield chunk
+        if compressor is not None:
+            yield compressor.flush()
+
+    def _start(self, mapped: mmap.mmap, size: int) -> int:
+        if self.tail is None or size <= self.tail:
+            return 0
+        start = size - self.tail
+        # Drop the partial line at the start, unless the tail is a single line.
+        newline = mapped.find(b"\n", start - 1, size - 1)
+        return start if newline == -1 else newline + 1
+
+    def read(self) -> bytes:
+        """The whole content of the attachment."""
+        return b"".join(self.chunks())
+
+    def __repr__(self):
+        return f"Attachment({self.path!r})"
+
+
+def attachment(value: Union[str, os.PathLike, Attachment]) -> Attachment:
+    """An attachment for a path, or the attachment itself."""
+    return value if isinstance(value, Attachment) else Attachment(value)
+
+
+def fit(
+    attachments: Iterable[Attachment], limit: Optional[int]
+) -> Tuple[List[Attachment], List[str]]:
+    """
+    Choose the attachments that fit within a handler's limit on their total size, in
+    order, and say why the rest were left out.
+
+    Arguments:
+        attachments (Iterable[Attachment]): the attachments of an alert.
+        limit (Optional[int]): the most bytes to read for the attachments of an alert,
+            or None for no limit.
+
+    Returns:
+        (Tuple[List[Attachment], List[str]]): the attachments to send and a note for
+            each attachment that was left out.
+    """
+    kept, notes = [], []
+    total = 0
+    for item in attachments:
+        try:
+            size = item.size
+        except OSError as err:
+            notes.append(f"{item.name} could not be attached: {err.strerror}.")
+            continue
+        if limit is not None and total + size > limit:
+            notes.append(
+                f"{item.name} was not attached as it would exceed the limit of"
+                f" {limit} bytes."
+            )
+            continue
+        total += size
+        kept.append(item)
+    return kept, notes
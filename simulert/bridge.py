@@ -0,0 +1,131 @@
+import logging
+import re
+import threading
+from typing import Iterable, Optional
+
+from simulert.dispatch import QueueDispatcher
+from simulert.logger import logger as simulert_logger
+
+_own_logger = simulert_logger.name
+
+
+class AlertBridge(logging.Handler):
+    """
+    A logging handler that turns log records into alerts, so that warnings and errors
+    that a simulation already logs are sent to an alerter's handlers.
+
+    Records are forwarded if they are at or above `level`, or if they come from one of
+    `loggers` and their message matches `pattern`. Both checks are made before the
+    record's message is formatted, so records that are not forwarded are cheap.
+    Forwarded records are sent from a background thread and are dropped if `maxsize`
+    records are already waiting, so that logging never blocks.
+    """
+
+    def __init__(
+        self,
+        alerter,
+        level: Optional[int] = logging.WARNING,
+        loggers: Optional[Iterable[str]] = None,
+        pattern: Optional[str] = None,
+        maxsize: Optional[int] = 1000,
+    ):
+        """
+        Arguments:
+            alerter (Alerter): the alerter to send the alerts with.
+            level (Optional[int]): the level at or above which every record is
+                forwarded [default: logging.WARNING].
+            loggers (Optional[Iterable[str]]): the names of loggers, including their
+                children, from which records below `level` are also forwarded if they
+                match `pattern`.
+            pattern (Optional[str]): a regular expression searched for in the
+                unformatted message of records below `level`.
+            maxsize (Optional[int]): the maximum number of records waiting to be sent
+                [default: 1000].
+        """
+        self.threshold = level
+        self.loggers = tuple(loggers or ())
+        self.pattern = re.compile(pattern) if pattern is not None else None
+        self._prefixes = tuple(f"{name}." for name in self.loggers)
+        self._selective = bool(self.loggers or self.pattern)
+        # Without filters, the logger skips this handler for records below the level.
+        super().__init__(logging.NOTSET if self._selective else level)
+        self.setFormatter(logging.Formatter("%(name)s %(levelname)s: %(message)s"))
+        self.alerter = alerter
+        self._sending = threading.local()
+        self._dispatcher = QueueDispatcher(
+            self._send, maxsize, "drop_newest", name="simulert-bridge"
+        )
+
+    @property
+    def dropped(self) -> int:
+        """The number of records dropped because too many were waiting to be sent."""
+        return self._dispatcher.dropped
+
+    def _matches(self, record: logging.LogRecord) -> bool:
+        if not self._selective:
+            return False
+        if self.loggers and not (
+            record.name in self.loggers or record.name.startswith(self._prefixes)
+        ):
+            return False
+        return self.pattern is None or bool(
+            isinstance(record.msg, str) and self.pattern.search(record.msg)
+        )
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        """
+        Forward a record if it passes the level, logger and message checks and this
+        handler's filters.
+
+        Arguments:
+            record (logging.LogRecord): the record to forward.
+
+        Returns:
+            (bool): whether the record was forwarded.
+        """
+        if record.levelno < self.threshold and not self._matches(record):
+            return False
+        if (
+            record.name == _own_logger
+            or record.name.startswith(_own_logger + ".")
+            or getattr(self._sending, "active", False)
+        ):
+            # Alerts about simulert's own records could fail and log again forever.
+            return False
+        if not self.filter(record):
+            return False
+        self.emit(record)
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        """
+        Queue a record to be sent as an alert at the record's level.
+
+        Arguments:
+            record (logging.LogRecord): the record to send.
+        """
+        try:
+            self._dispatcher.put((self.format(record), record.levelno))
+        except Exception:
+            self.handleError(record)
+
+    def _send(self, item):
+        self._sending.active = True
+        try:
+            self.alerter.alert(*item)
+        finally:
+            self._sending.active = False
+
+    def flush(self, timeout: Optional[float] = None):
+        """
+        Wait until every forwarded record has been sent.
+
+        Arguments:
+            timeout (Optional[float]): the maximum number of seconds to wait.
+        """
+        self._dispatcher.flush(timeout)
+
+    def close(self):
+        """Send every forwarded record and stop the background thread."""
+        self._dispatcher.close()
+        super().close()
@@ -1,10 +1,11 @@
 import runpy
+import sys
 from pathlib import Path
 
 import click
 
-from simulert import getAlerter
-from simulert.handlers import Emailer, Slacker
+from simulert import getAlerter, handlers
+from simulert.outbox import Outbox
 
 alerter = getAlerter()
 
@@ -30,6 +31,11 @@ alerter = getAlerter()
 @click.option(
     "--emailRecipient", help="comma-separated receiver name and email address"
 )
+@click.option(
+    "--outbox",
+    envvar="SIMULERT_OUTBOX",
+    help="a journal file to record alerts in until they are delivered.",
+)
 def cli(
     email,
     slack,
@@ -40,6 +46,7 @@ def cli(
     emailauthentication,
     emailsender,
     emailrecipient,
+    outbox,
 ):
     if not slack and not email:
         print(
@@ -47,17 +54,129 @@ def cli(
         )
         exit(0)
     if slack:
-        slacker = Slacker(slacktoken, slackusername)
+        slacker = handlers.Slacker(slacktoken, slackusername)
         alerter.add_handler(slacker)
     if email:
-        emailer = Emailer(
+        emailer = handlers.Emailer(
             emailhost, emailport, emailauthentication, emailsender, emailrecipient,
         )
         alerter.add_handler(emailer)
+    if outbox:
+        alerter.use_outbox(Outbox(outbox))
 
 @cli.command()
 @click.option("-n", "--name", help="simulation name")
+@click.option(
+    "-p",
+    "--process",
+    is_flag=True,
+    help="run the file in a supervised child process, reporting crashes, exit codes"
+    " and resource usage.",
+)
 @click.argument("filename", required=True)
-def run(name, filename):
+def run(name, filename, process):
+    if process:
+        from simulert.supervise import supervise
+
+        sys.exit(_exit_code(supervise(alerter, [sys.executable, filename], name)))
     with alerter.simulation_alert(name):
         runpy.run_path(str(Path.cwd() / filename))
+
+
+@cli.command("supervise", context_settings={"ignore_unknown_options": True})
+@click.option("-n", "--name", help="simulation name [default: the command]")
+@click.argument("command", nargs=-1, required=True, type=click.UNPROCESSED)
+def supervise_command(name, command):
+    """Run any command as a supervised child process and alert when it ends."""
+    from simulert.supervise import supervise
+
+    sys.exit(_exit_code(supervise(alerter, list(command), name)))
+
+
+def _exit_code(returncode):
+    """The exit status a shell gives a command that ended with the return code."""
+    return 128 - returncode if returncode < 0 else returncode
+
+
+@cli.command()
+def flush():
+    """Retry every alert in the outbox that has not been delivered."""
+    if alerter.outbox is None:
+        raise click.UsageError("Please specify an outbox with --outbox.")
+    counts = alerter.outbox.replay(alerter.handlers, force=True)
+    alerter.outbox.compact()
+    print(
+        ", ".join(f"{count} {status.value}" for status, count in counts.items())
+        or "No alerts to retry."
+    )
+
+
+@cli.command()
+@click.option(
+    "-a",
+    "--address",
+    envvar="SIMULERT_AGGREGATOR",
+    help="the Unix domain socket path or host:port to listen on.",
+)
+@click.option(
+    "--expected", type=int, help="the number of processes expected to complete."
+)
+@click.option(
+    "--window",
+    type=float,
+    default=30.0,
+    help="the number of seconds to wait for more completions before summarising.",
+)
+def aggregate(address, expected, window):
+    """Send on alerts relayed from many processes, summarising their completions."""
+    from simulert.aggregator import Aggregator
+
+    try:
+        aggregator = Aggregator(alerter, address, expected, window)
+    except ValueError as err:
+        raise click.BadParameter(str(err), param_hint="--address")
+    print(f"Aggregating alerts sent to {aggregator.address}.")
+    aggregator.serve_forever()
+
+
+@cli.command()
+@click.option(
+    "-m",
+    "--match",
+    "patterns",
+    multiple=True,
+    required=True,
+    help="a regular expression to alert on lines matching; may be repeated.",
+)
+@click.option(
+    "-l",
+    "--level",
+    type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]),
+    default="WARNING",
+    help="the level of the alerts.",
+)
+@click.option(
+    "--from-start", is_flag=True, help="also search lines already in the files."
+)
+@click.option(
+    "--interval",
+    type=float,
+    default=1.0,
+    help="the number of seconds between checks of files that have not grown.",
+)
+@click.argument("paths", nargs=-1, required=True)
+def watch(patterns, level, from_start, interval, paths):
+    """Follow growing log files and alert on lines matching any pattern."""
+    from simulert import levels
+    from simulert.watch import LogWatcher
+
+    try:
+        watcher = LogWatcher(
+            alerter, paths, patterns, getattr(levels, level), from_start=from_start
+        )
+    except ValueError as err:
+        raise click.BadParameter(str(err), param_hint="--match")
+    try:
+        watcher.run(interval)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,207 @@
+import threading
+from collections import namedtuple
+from enum import Enum
+from time import monotonic
+from typing import Iterable, List, Optional
+
+from simulert.logger import logger as simulert_logger
+
+logger = simulert_logger.getChild(__name__)
+
+MAX_WORKERS = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class Status(Enum):
+    """The outcome of passing an alert to a handler."""
+
+    DELIVERED = "delivered"
+    FAILED = "failed"
+    TIMED_OUT = "timed out"
+    DROPPED = "dropped"
+
+
+DeliveryResult = namedtuple(
+    "DeliveryResult", ("handler", "status", "error", "duration")
+)
+DeliveryResult.__doc__ = """
+The outcome of passing an alert to one handler.
+
+Attributes:
+    handler (BaseHandler): the handler the alert was passed to.
+    status (Status): whether the alert was delivered, failed, timed out or dropped by
+        the handler's rate limit or duplicate suppression.
+    error (Optional[BaseException]): the error raised by the handler, if any.
+    duration (float): the number of seconds waited for the handler.
+"""
+
+
+def shared_executor():
+    """The thread pool shared by all alerters for concurrent delivery."""
+    global _executor
+    if _executor is None:
+        # Imported here, like asyncio below, to keep `import simulert` fast.
+        from concurrent.futures import ThreadPoolExecutor
+
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    MAX_WORKERS, thread_name_prefix="simulert-delivery"
+                )
+    return _executor
+
+
+def deliver(handler, alert) -> DeliveryResult:
+    """
+    Pass an alert to a handler, recording rather than raising any error.
+
+    Arguments:
+        handler (BaseHandler): the handler to deliver the alert with.
+        alert (Alert): the alert to deliver.
+    """
+    messages = handler.admit(alert.message, alert)
+    if not messages:
+        return DeliveryResult(handler, Status.DROPPED, None, 0.0)
+    return _send(handler, alert, messages)
+
+
+def redeliver(handler, alert) -> DeliveryResult:
+    """
+    Pass an alert that has already been admitted to a handler once more, such as
+    when retrying a failed delivery, recording rather than raising any error.
+
+    Arguments:
+        handler (BaseHandler): the handler to deliver the alert with.
+        alert (Alert): the alert to deliver.
+    """
+    return _send(handler, alert, (alert.message,))
+
+
+def _alerts(alert, messages):
+    """The alerts to send for the messages admitted by a handler, which may include
+    a summary of suppressed repeats."""
+    for message in messages:
+        yield alert if message is alert.message else alert.with_message(message)
+
+
+def _send(handler, alert, messages) -> DeliveryResult:
+    """Deliver the messages of an alert that the handler has admitted."""
+    start = monotonic()
+    try:
+        for admitted in _alerts(alert, messages):
+            handler.handle(admitted)
+    except Exception as err:
+        logger.exception(
+            f"{type(handler).__name__} delivery failed with {err.__repr__()}"
+        )
+        return DeliveryResult(handler, Status.FAILED, err, monotonic() - start)
+    return DeliveryResult(handler, Status.DELIVERED, None, monotonic() - start)
+
+
+async def adeliver(handler, alert, timeout: Optional[float] = None) -> DeliveryResult:
+    """
+    Pass an alert to a handler's async method, recording rather than raising any
+    error.
+
+    Arguments:
+        handler (BaseHandler): the handler to deliver the alert with.
+        alert (Alert): the alert to deliver.
+        timeout (Optional[float]): the number of seconds to wait for the handler.
+    """
+    import asyncio
+
+    messages = handler.admit(alert.message, alert)
+    if not messages:
+        return DeliveryResult(handler, Status.DROPPED, None, 0.0)
+
+    async def send():
+        for admitted in _alerts(alert, messages):
+            await handler.ahandle(admitted)
+
+    start = monotonic()
+    try:
+        await asyncio.wait_for(send(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"{type(handler).__name__} delivery timed out.")
+        return DeliveryResult(handler, Status.TIMED_OUT, None, monotonic() - start)
+    except Exception as err:
+        logger.exception(
+            f"{type(handler).__name__} delivery failed with {err.__repr__()}"
+        )
+        return DeliveryResult(handler, Status.FAILED, err, monotonic() - start)
+    return DeliveryResult(handler, Status.DELIVERED, None, monotonic() - start)
+
+
+async def adeliver_concurrently(
+    handlers: Iterable,
+    alert,
+    handler_timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+) -> List[DeliveryResult]:
+    """
+    Pass an alert to every handler's async method at once and wait for them to
+    finish. Handlers still running when their time is up are cancelled.
+
+    Arguments:
+        handlers (Iterable[BaseHandler]): the handlers to deliver the alert with.
+        alert (Alert): the alert to deliver.
+        handler_timeout (Optional[float]): the number of seconds to wait for each
+            handler.
+        deadline (Optional[float]): the number of seconds to wait for all handlers.
+    """
+    import asyncio
+
+    limits = [limit for limit in (handler_timeout, deadline) if limit is not None]
+    limit = min(limits) if limits else None
+    return list(
+        await asyncio.gather(*(adeliver(handler, alert, limit) for handler in handlers))
+    )
+
+
+def deliver_concurrently(
+    handlers: Iterable,
+    alert,
+    handler_timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+) -> List[DeliveryResult]:
+    """
+    Pass an alert to every handler at once on the shared thread pool and wait for
+    them to finish. Handlers still running when their time is up are reported as
+    timed out and left to finish in the background.
+
+    Arguments:
+        handlers (Iterable[BaseHandler]): the handlers to deliver the alert with.
+        alert (Alert): the alert to deliver.
+        handler_timeout (Optional[float]): the number of seconds to wait for each
+            handler.
+        deadline (Optional[float]): the number of seconds to wait for all handlers.
+    """
+    from concurrent.futures import TimeoutError
+
+    start = monotonic()
+    limits = [limit for limit in (handler_timeout, deadline) if limit is not None]
+    limit = min(limits) if limits else None
+    executor = shared_executor()
+    futures = []
+    for handler in handlers:
+        messages = handler.admit(alert.message, alert)
+        if messages:
+            futures.append((handler, executor.submit(_send, handler, alert, messages)))
+        else:
+            futures.append((handler, None))
+    results = []
+    for handler, future in futures:
+        if future is None:
+            results.append(DeliveryResult(handler, Status.DROPPED, None, 0.0))
+            continue
+        try:
+            timeout = None if limit is None else max(0, limit - (monotonic() - start))
+            results.append(future.result(timeout))
+        except TimeoutError:
+            logger.warning(f"{type(handler).__name__} delivery timed out.")
+            results.append(
+                DeliveryResult(handler, Status.TIMED_OUT, None, monotonic() - start)
+            )
+    return results
@@ -0,0 +1,337 @@
+import atexit
+import heapq
+import itertools
+import threading
+import weakref
+from collections import deque
+from time import monotonic
+from typing import Callable, List, Optional
+
+from simulert.logger import logger as simulert_logger
+
+logger = simulert_logger.getChild(__name__)
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+_dispatchers = weakref.WeakSet()
+_buffers = weakref.WeakSet()
+_exit_callbacks = []
+
+
+def at_exit(callback: Callable) -> Callable:
+    """
+    Register a callback to be run at interpreter exit after every queued alert has been
+    dispatched, for handlers that hold on to alerts themselves.
+
+    Arguments:
+        callback (Callable): a function taking no arguments.
+
+    Returns:
+        (Callable): the callback, so that this can be used as a decorator.
+    """
+    _exit_callbacks.append(callback)
+    return callback
+
+
+class ScheduledCall:
+    """A callback set to be run by `call_later`, which can be cancelled."""
+
+    __slots__ = ("callback",)
+
+    def __init__(self, callback: Callable):
+        self.callback = callback
+
+    def cancel(self):
+        """Stop the callback from being run, if it has not been already."""
+        self.callback = None
+
+
+class _Scheduler:
+    """
+    A single background thread that runs callbacks at set times, so that timeouts,
+    such as the end of a digest window, do not each start a thread of their own.
+    """
+
+    def __init__(self):
+        self._due = []  # A heap of (time, sequence number, call).
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def call_later(self, delay: float, callback: Callable) -> ScheduledCall:
+        call = ScheduledCall(callback)
+        with self._condition:
+            heapq.heappush(self._due, (monotonic() + delay, next(self._sequence), call))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="simulert-scheduler", daemon=True
+                )
+                self._thread.start()
+            elif self._due[0][2] is call:
+                self._condition.notify()
+        return call
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if not self._due:
+                        self._condition.wait()
+                        continue
+                    delay = self._due[0][0] - monotonic()
+                    if delay <= 0:
+                        break
+                    self._condition.wait(delay)
+                callback = heapq.heappop(self._due)[2].callback
+            if callback is None:
+                continue  # Cancelled.
+            try:
+                callback()
+            except Exception as err:
+                logger.exception(f"Scheduled callback failed with {err.__repr__()}")
+
+
+_scheduler = _Scheduler()
+
+
+def call_later(delay: float, callback: Callable) -> ScheduledCall:
+    """
+    Run a callback after a delay on simulert's scheduler thread, which is shared by
+    every handler's timeouts. Callbacks are run one at a time, so a callback that
+    waits on the network delays those due after it.
+
+    Arguments:
+        delay (float): the number of seconds to wait.
+        callback (Callable): a function taking no arguments.
+
+    Returns:
+        (ScheduledCall): the scheduled call, which can be cancelled.
+    """
+    return _scheduler.call_later(delay, callback)
+
+
+class Buffer:
+    """
+    Alerts collected by a handler to be sent together, such as in a digest email or a
+    batch of webhook payloads. The collected items are sent once `size` have been
+    collected, `window` seconds after the first, as soon as an alert at or above
+    `flush_level` is added, or at interpreter exit.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[List], None],
+        size: Optional[int] = None,
+        window: Optional[float] = None,
+        flush_level: Optional[int] = None,
+        name: Optional[str] = "Batch",
+    ):
+        """
+        Arguments:
+            send (Callable[[List], None]): sends the collected items, oldest first.
+            size (Optional[int]): if given, the number of items sent together.
+            window (Optional[float]): if given, the most seconds an item is held.
+            flush_level (Optional[int]): if given, the level of alert that is sent
+                straight away along with any collected items.
+            name (Optional[str]): what is being sent, for error messages
+                [default: "Batch"].
+        """
+        self.send = send
+        self.size = size
+        self.window = window
+        self.flush_level = flush_level
+        self.name = name
+        self._items = []
+        self._timer = None
+        self._lock = threading.Lock()
+        if self.enabled:
+            _buffers.add(self)
+
+    @property
+    def enabled(self) -> bool:
+        """Whether items are collected at all, rather than sent one by one."""
+        return bool(self.window or self.size)
+
+    def add(self, item, level: int):
+        """
+        Collect an item, sending the collected items if it fills the buffer or is at
+        or above the flush level. Errors in sending are raised.
+
+        Arguments:
+            item: the item to collect.
+            level (int): the level of the alert the item is for.
+        """
+        with self._lock:
+            self._items.append(item)
+            send_now = (self.flush_level is not None and level >= self.flush_level) or (
+                self.size and len(self._items) >= self.size
+            )
+            if not send_now and self.window and self._timer is None:
+                self._timer = call_later(self.window, self._flush_from_timer)
+        if send_now:
+            self.flush()
+
+    def flush(self):
+        """Send any collected items, raising any error."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            items, self._items = self._items, []
+        if items:
+            self.send(items)
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        except Exception as err:
+            logger.exception(f"{self.name} failed with {err.__repr__()}")
+
+
+class QueueDispatcher:
+    """
+    A bounded queue drained by a background worker thread so that callers can hand off
+    work without waiting for it to be done.
+    """
+
+    def __init__(
+        self,
+        target: Callable,
+        maxsize: Optional[int] = 1000,
+        overflow: Optional[str] = "block",
+        name: Optional[str] = "simulert-dispatch",
+    ):
+        """
+        Arguments:
+            target (Callable): the callable each queued item is passed to by the worker.
+            maxsize (Optional[int]): the maximum number of items waiting in the queue
+                [default: 1000].
+            overflow (Optional[str]): what `put` does when the queue is full; one of
+                "block" (wait for space), "drop_oldest" (discard the oldest waiting
+                item) or "drop_newest" (discard the item being put) [default: "block"].
+            name (Optional[str]): the name of the worker thread.
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"overflow must be one of {OVERFLOW_POLICIES}, not {overflow!r}."
+            )
+        if maxsize < 1:
+            raise ValueError(f"maxsize must be at least 1, not {maxsize}.")
+        self._target = target
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+        self._queue = deque()
+        self._unfinished = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._all_done = threading.Condition(self._lock)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        _dispatchers.add(self)
+
+    def __len__(self):
+        return len(self._queue)
+
+    def put(self, item) -> bool:
+        """
+        Queue an item for the worker.
+
+        Arguments:
+            item: the item to be passed to the target.
+
+        Returns:
+            (bool): whether the item was queued; False if it was dropped.
+        """
+        if threading.current_thread() is self._thread:
+            # A target that queues more work would deadlock a full, blocking queue.
+            self._call(item)
+            return True
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Cannot put to a closed dispatcher.")
+            while len(self._queue) >= self.maxsize:
+                if self.overflow == "drop_newest":
+                    self.dropped += 1
+                    return False
+                if self.overflow == "drop_oldest":
+                    self._queue.popleft()
+                    self._unfinished -= 1
+                    self.dropped += 1
+                    break
+                self._not_full.wait()
+            self._queue.append(item)
+            self._unfinished += 1
+            self._not_empty.notify()
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued item has been passed to the target.
+
+        Arguments:
+            timeout (Optional[float]): the maximum number of seconds to wait.
+
+        Returns:
+            (bool): whether the queue was drained before the timeout.
+        """
+        if threading.current_thread() is self._thread:
+            return False
+        with self._lock:
+            return self._all_done.wait_for(lambda: not self._unfinished, timeout)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Drain the queue and stop the worker thread. Further calls to `put` will raise.
+
+        Arguments:
+            timeout (Optional[float]): the maximum number of seconds to wait.
+
+        Returns:
+            (bool): whether the worker finished before the timeout.
+        """
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify()
+        if threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+        _dispatchers.discard(self)
+        return not self._thread.is_alive()
+
+    def _call(self, item):
+        try:
+            self._target(item)
+        except Exception as err:
+            logger.exception(f"Queued dispatch failed with {err.__repr__()}")
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._not_empty.wait()
+                if not self._queue:
+                    return
+                item = self._queue.popleft()
+                self._not_full.notify()
+            self._call(item)
+            with self._lock:
+                self._unfinished -= 1
+                if not self._unfinished:
+                    self._all_done.notify_all()
+
+
+@atexit.register
+def _close_all():
+    """Drain every live dispatcher, run the exit callbacks and empty the buffers."""
+    for dispatcher in list(_dispatchers):
+        dispatcher.close()
+    for callback in _exit_callbacks:
+        try:
+            callback()
+        except Exception as err:
+            logger.exception(f"Exit callback failed with {err.__repr__()}")
+    # Last, as exit callbacks may add to buffers.
+    for buffer in list(_buffers):
+        buffer._flush_from_timer()
@@ -0,0 +1,94 @@
+from time import monotonic, time
+from typing import Dict, Optional, Tuple
+
+from simulert.attachments import Attachment
+from simulert.levels import INFO, getLevelName
+from simulert.templates import render
+
+
+class Alert:
+    """
+    An alert as it is passed to handlers: its message along with its level, when and
+    by which alerter it was raised, the simulation it concerns, the exception that
+    ended it, the fields of its template, its tag and any attached files, so that
+    handlers can filter and format alerts without parsing their text. Alerts are
+    created by `Alerter.alert` and should not be changed once created, as they are
+    shared by all handlers.
+    """
+
+    __slots__ = (
+        "message",
+        "level",
+        "alerter",
+        "simulation",
+        "exc_info",
+        "fields",
+        "tag",
+        "attachments",
+        "created",
+        "monotonic",
+    )
+
+    def __init__(
+        self,
+        message,
+        level: int = INFO,
+        alerter: str = "",
+        simulation: Optional[str] = None,
+        exc_info: Optional[BaseException] = None,
+        fields: Optional[Dict[str, object]] = None,
+        tag: Optional[str] = None,
+        attachments: Tuple[Attachment, ...] = (),
+        created: Optional[float] = None,
+    ):
+        """
+        Arguments:
+            message (Union[str, Message]): the message of the alert, rendered for each
+                handler that sends it.
+            level (int): the level of the alert (see `simulert.levels`)
+                [default: INFO].
+            alerter (str): the name of the alerter raising the alert [default: ""].
+            simulation (Optional[str]): the name of the simulation the alert concerns.
+            exc_info (Optional[BaseException]): the exception that ended the
+                simulation, if any.
+            fields (Optional[Dict[str, object]]): the fields of the message's template.
+            tag (Optional[str]): a tag used to route the alert (see `Alerter.route`).
+            attachments (Tuple[Attachment, ...]): files to send with the alert, by the
+                handlers that support them.
+            created (Optional[float]): the time the alert was raised, in seconds since
+                the epoch [default: now].
+        """
+        self.message = message
+        self.level = level
+        self.alerter = alerter
+        self.simulation = simulation
+        self.exc_info = exc_info
+        self.fields = {} if fields is None else fields
+        self.tag = tag
+        self.attachments = attachments
+        self.created = time() if created is None else created
+        self.monotonic = monotonic()
+
+    @property
+    def level_name(self) -> str:
+        return getLevelName(self.level)
+
+    def render(self, handler=None) -> str:
+        """
+        The text of the alert's message for a handler.
+
+        Arguments:
+            handler (Optional[BaseHandler]): the handler sending the alert.
+        """
+        return render(self.message, handler)
+
+    def with_message(self, message) -> "Alert":
+        """A copy of the alert with another message, such as a summary of repeats."""
+        alert = Alert.__new__(Alert)
+        for slot in Alert.__slots__:
+            setattr(alert, slot, getattr(self, slot))
+        alert.message = message
+        return alert
+
+    def __repr__(self):
+        return f"<Alert {self.level_name} from {self.alerter!r}: {self.render()!r}>"
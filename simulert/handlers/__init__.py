@@ -1,11 +1,33 @@
-from .email import Emailer
-from .logs import Logger
-from .slack import Slacker
-from .pushover import Pushover
+from importlib import import_module
+
+# Handlers are imported on first access so that importing simulert does not pay for
+# the dependencies of handlers that are never used.
+_handler_modules = {
+    "Emailer": ".email",
+    "Logger": ".logs",
+    "Slacker": ".slack",
+    "Pushover": ".pushover",
+    "Relay": ".relay",
+    "Webhook": ".webhook",
+}
 
 __all__ = (
     "Emailer",
     "Logger",
     "Slacker",
     "Pushover",
+    "Relay",
+    "Webhook",
 )
+
+
+def __getattr__(name):
+    if name in _handler_modules:
+        handler = getattr(import_module(_handler_modules[name], __name__), name)
+        globals()[name] = handler
+        return handler
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
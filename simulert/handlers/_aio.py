@@ -0,0 +1,200 @@
+"""
+Minimal SMTP and HTTP clients over asyncio streams for the handlers' async methods.
+"""
+import asyncio
+import base64
+import ssl
+from smtplib import SMTPResponseException
+from typing import Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class _SMTPConnection:
+    """An SMTP client session on an asyncio stream."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def response(self) -> Tuple[int, str]:
+        lines = []
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError("The SMTP server closed the connection.")
+            lines.append(line[4:].strip().decode(errors="replace"))
+            if line[3:4] != b"-":
+                return int(line[:3]), "\n".join(lines)
+
+    async def command(self, command: str, expected: Iterable[int] = (250,)) -> str:
+        self.writer.write(command.encode() + b"\r\n")
+        await self.writer.drain()
+        code, text = await self.response()
+        if code not in expected:
+            raise SMTPResponseException(code, text)
+        return text
+
+    async def login(self, username: str, password: str, extensions: str):
+        methods = next(
+            (
+                line.split()[1:]
+                for line in extensions.upper().splitlines()
+                if line.startswith("AUTH")
+            ),
+            ["PLAIN"],
+        )
+        if "PLAIN" in methods:
+            token = base64.b64encode(f"\0{username}\0{password}".encode()).decode()
+            await self.command(f"AUTH PLAIN {token}", (235,))
+        else:
+            await self.command("AUTH LOGIN", (334,))
+            await self.command(base64.b64encode(username.encode()).decode(), (334,))
+            await self.command(base64.b64encode(password.encode()).decode(), (235,))
+
+    async def data(self, message: str):
+        await self.command("DATA", (354,))
+        lines = message.replace("\r\n", "\n").split("\n")
+        payload = "\r\n".join(
+            "." + line if line.startswith(".") else line for line in lines
+        )
+        self.writer.write(payload.encode() + b"\r\n.\r\n")
+        await self.writer.drain()
+        code, text = await self.response()
+        if code != 250:
+            raise SMTPResponseException(code, text)
+
+    async def close(self):
+        try:
+            await self.command("QUIT", (221,))
+        except (ConnectionError, SMTPResponseException):
+            pass
+        finally:
+            self.writer.close()
+
+
+async def smtp_send(
+    host: str,
+    port: int,
+    use_ssl: bool,
+    authentication: Optional[Tuple[str, str]],
+    sender: str,
+    recipients: Iterable[str],
+    message: str,
+    timeout: Optional[float] = None,
+):
+    """
+    Send an email over a new SMTP connection.
+
+    Arguments:
+        host (str): the address of the mail server.
+        port (int): the port of the mail server.
+        use_ssl (bool): whether to connect with SSL.
+        authentication (Optional[Tuple[str, str]]): the username and password to log
+            in with, if any.
+        sender (str): the email address of the sender.
+        recipients (Iterable[str]): the email addresses of the recipients.
+        message (str): the whole email, including headers.
+        timeout (Optional[float]): the number of seconds to wait for the email to be
+            sent.
+    """
+    await asyncio.wait_for(
+        _smtp_session(host, port, use_ssl, authentication, sender, recipients, message),
+        timeout,
+    )
+
+
+async def _smtp_session(
+    host, port, use_ssl, authentication, sender, recipients, message
+):
+    reader, writer = await asyncio.open_connection(
+        host, port, ssl=ssl.create_default_context() if use_ssl else None
+    )
+    connection = _SMTPConnection(reader, writer)
+    try:
+        code, text = await connection.response()
+        if code != 220:
+            raise SMTPResponseException(code, text)
+        extensions = await connection.command("EHLO simulert")
+        if authentication and authentication[0]:
+            await connection.login(*authentication, extensions)
+        await connection.command(f"MAIL FROM:<{sender}>")
+        for recipient in recipients:
+            await connection.command(f"RCPT TO:<{recipient}>", (250, 251))
+        await connection.data(message)
+    finally:
+        await connection.close()
+
+
+async def http_post(
+    url: str,
+    body: bytes,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: Optional[float] = None,
+) -> Tuple[int, str, bytes]:
+    """
+    Make an HTTP/1.1 POST request over a new connection.
+
+    Arguments:
+        url (str): the url to post to.
+        body (bytes): the body of the request.
+        headers (Optional[Dict[str, str]]): additional request headers.
+        timeout (Optional[float]): the number of seconds to wait for the response.
+
+    Returns:
+        (Tuple[int, str, bytes]): the status, reason and body of the response.
+    """
+    return await asyncio.wait_for(_http_exchange(url, body, headers or {}), timeout)
+
+
+async def _http_exchange(url, body, headers):
+    url = urlsplit(url)
+    secure = url.scheme == "https"
+    reader, writer = await asyncio.open_connection(
+        url.hostname,
+        url.port or (443 if secure else 80),
+        ssl=ssl.create_default_context() if secure else None,
+    )
+    try:
+        request_headers = {
+            "Host": url.netloc,
+            "Content-Length": str(len(body)),
+            "Connection": "close",
+        }
+        request_headers.update(headers)
+        target = url.path or "/"
+        if url.query:
+            target += "?" + url.query
+        head = f"POST {target} HTTP/1.1\r\n" + "".join(
+            f"{key}: {value}\r\n" for key, value in request_headers.items()
+        )
+        writer.write(head.encode() + b"\r\n" + body)
+        await writer.drain()
+        return await _read_response(reader)
+    finally:
+        writer.close()
+
+
+async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, str, bytes]:
+    status_line = (await reader.readline()).decode().rstrip("\r\n")
+    _, status, reason = (status_line.split(" ", 2) + [""])[:3]
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode().rstrip("\r\n")
+        if not line:
+            break
+        key, _, value = line.partition(":")
+        headers[key.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            chunk = await reader.readexactly(size + 2)
+            if not size:
+                break
+            chunks.append(chunk[:-2])
+        data = b"".join(chunks)
+    elif "content-length" in headers:
+        data = await reader.readexactly(int(headers["content-length"]))
+    else:
+        data = await reader.read()
+    return int(status), reason, data
@@ -1,4 +1,18 @@
+import threading
+import weakref
 from abc import ABC, abstractmethod
+from time import monotonic
+from typing import Optional, Tuple
+
+from simulert.dispatch import at_exit, call_later
+from simulert.events import Alert
+from simulert.levels import INFO, NOTSET
+from simulert.logger import logger as simulert_logger
+from simulert.templates import compile_template
+
+logger = simulert_logger.getChild(__name__)
+
+_suppressing_handlers = weakref.WeakSet()
 
 
 class BaseHandler(ABC):
@@ -8,6 +22,181 @@ class BaseHandler(ABC):
     """
 
     _attr_envvar_map = {}  # A dictionary of argument names to environment variables
+    _target_attrs = ()  # The attributes naming where the handler sends alerts.
+
+    min_level = NOTSET  # Alerts below this level are not passed to the handler.
+
+    # Rate limiting and duplicate suppression are off until configured.
+    _rate = None
+    _duplicate_window = None
+    rate_limited = 0
+    duplicates = 0
+    _templates = {}  # Templates that override the alerter's for this handler.
+
+    def set_level(self, level: int):
+        """Only send alerts at or above a level, such as `WARNING` for a pager. Other
+        alerts are rejected before they are formatted.
+
+        Arguments:
+            level (int): the lowest level of alert to send (see `simulert.levels`).
+        """
+        self.min_level = level
+        return self
+
+    def accepts(self, alert) -> bool:
+        """Whether the handler sends an alert at all, decided before it is formatted.
+        Handlers can override this to filter alerts on their other attributes.
+
+        Arguments:
+            alert (Alert): the alert.
+        """
+        return alert.level >= self.min_level
+
+    def add_template(self, name: str, source: str):
+        """Render alerts using the named template with this format string instead of
+        the alerter's, such as a shorter message for a phone.
+
+        Arguments:
+            name (str): the name of the template, as passed to `Alerter.alert`.
+            source (str): the `str.format` string to render the alert's fields with.
+        """
+        compile_template(source)  # Raises now if the format string is malformed.
+        self._templates = {**self._templates, name: source}
+        return self
+
+    def limit_rate(self, rate: Optional[float], burst: Optional[int] = 1):
+        """Limit the rate of alerts sent by this handler with a token bucket. Alerts
+        beyond the limit are dropped.
+
+        Arguments:
+            rate (Optional[float]): the sustained number of alerts per second; None
+                removes the limit.
+            burst (Optional[int]): the number of alerts that can be sent at once after
+                a quiet period [default: 1].
+        """
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._refilled = monotonic()
+        return self
+
+    def suppress_duplicates(self, window: Optional[float]):
+        """Drop alerts identical to the last one sent within a window of it. The
+        number of dropped repeats is reported with the next alert that is sent, or
+        when the window ends if no alert is sent before then.
+
+        Arguments:
+            window (Optional[float]): the number of seconds after sending an alert in
+                which identical alerts are dropped; None stops suppression.
+        """
+        if self._duplicate_window is not None and self._repeats_check is not None:
+            self._repeats_check.cancel()
+        self._duplicate_window = window
+        self._duplicate_lock = threading.Lock()
+        self._last_message = None
+        self._duplicate_until = 0.0
+        self._repeats = 0
+        self._repeated = None
+        self._repeats_check = None
+        if window is not None:
+            _suppressing_handlers.add(self)
+        return self
+
+    def admit(self, message: str, alert: Optional[Alert] = None) -> Tuple[str, ...]:
+        """Apply rate limiting and duplicate suppression to an alert.
+
+        Arguments:
+            message (str): the message of the alert.
+            alert (Optional[Alert]): the alert, whose level and other attributes are
+                used for a summary of its repeats sent when the window ends.
+
+        Returns:
+            (Tuple[str, ...]): the messages to send: none if the alert was dropped and
+                possibly a summary of suppressed repeats before the alert.
+        """
+        if self._rate is None and self._duplicate_window is None:
+            return (message,)
+        now = monotonic()
+        if (
+            self._duplicate_window is not None
+            and message == self._last_message
+            and now < self._duplicate_until
+        ):
+            self._repeats += 1
+            self.duplicates += 1
+            self._repeated = alert
+            return ()
+        if self._rate is not None:
+            tokens = self._tokens + (now - self._refilled) * self._rate
+            self._tokens = self._burst if tokens > self._burst else tokens
+            self._refilled = now
+            if self._tokens < 1:
+                self.rate_limited += 1
+                return ()
+            self._tokens -= 1
+        if self._duplicate_window is None:
+            return (message,)
+        with self._duplicate_lock:
+            messages = (message,)
+            if self._repeats:
+                summary = self._take_repeats()[0]
+                if message == self._last_message:
+                    messages = (summary,)
+                else:
+                    messages = (summary, message)
+            self._last_message = message
+            self._duplicate_until = now + self._duplicate_window
+            if self._repeats_check is None:
+                self._repeats_check = call_later(
+                    self._duplicate_window, self._check_repeats
+                )
+        return messages
+
+    def _check_repeats(self):
+        """Send the summary of any repeats once the window of the last alert sent has
+        ended, checking again later if another alert has been sent since."""
+        with self._duplicate_lock:
+            if self._duplicate_window is None:
+                return
+            remaining = self._duplicate_until - monotonic()
+            if remaining > 0:
+                self._repeats_check = call_later(remaining, self._check_repeats)
+                return
+            self._repeats_check = None
+        self._send_repeats_from_timer()
+
+    def _take_repeats(self) -> Tuple[str, Optional[Alert]]:
+        """The summary of the suppressed repeats and the last of them, resetting the
+        count. This must be called with the duplicate lock held."""
+        times = "time" if self._repeats == 1 else "times"
+        summary = f"{self._last_message} (repeated {self._repeats} {times})"
+        repeated = self._repeated
+        self._repeats = 0
+        self._repeated = None
+        return summary, repeated
+
+    def send_repeats(self):
+        """Send the summary of repeats suppressed since the last alert was sent, if
+        any, without waiting for the next alert or the end of the window. Errors are
+        raised rather than handled."""
+        if self._duplicate_window is None:
+            return
+        with self._duplicate_lock:
+            if not self._repeats:
+                return
+            summary, repeated = self._take_repeats()
+        if repeated is None:
+            self.handle(Alert(summary))
+        else:
+            self.handle(repeated.with_message(summary))
+
+    def _send_repeats_from_timer(self):
+        try:
+            self.send_repeats()
+        except Exception as err:
+            logger.exception(
+                f"{type(self).__name__} repeat summary failed with {err.__repr__()}"
+            )
 
     @abstractmethod
     def alert(self, message: str):
@@ -16,6 +205,53 @@ class BaseHandler(ABC):
             message (str): The message the alert should contain.
         """
 
+    def handle(self, alert):
+        """Send an alert event, raising any error rather than handling it. This is what
+        an `Alerter` calls; by default the alert's message is rendered for this
+        handler and passed to `deliver`. Handlers that use the alert's other
+        attributes, such as its timestamp or exception, can override this.
+
+        Arguments:
+            alert (Alert): the alert.
+        """
+        self.deliver(alert.render(self), alert.level, alert.alerter)
+
+    async def ahandle(self, alert):
+        """Send an alert event from a coroutine, by default with `adeliver`.
+
+        Arguments:
+            alert (Alert): the alert.
+        """
+        await self.adeliver(alert.render(self), alert.level, alert.alerter)
+
+    def deliver(self, message: str, level: int = INFO, alerter: str = ""):
+        """Send an alert, raising any error rather than handling it. This is what
+        `handle` calls so that an `Alerter` can report on each handler's delivery;
+        handlers that only implement `alert` are called through it.
+
+        Arguments:
+            message (str): The message the alert should contain.
+            level (int): The level of the alert (see `simulert.levels`).
+            alerter (str): The name of the alerter raising the alert.
+        """
+        self.alert(message)
+
+    async def adeliver(self, message: str, level: int = INFO, alerter: str = ""):
+        """Send an alert from a coroutine, raising any error rather than handling it.
+        Handlers without a native async implementation run `deliver` in the event
+        loop's default executor so that the event loop is not blocked.
+
+        Arguments:
+            message (str): The message the alert should contain.
+            level (int): The level of the alert (see `simulert.levels`).
+            alerter (str): The name of the alerter raising the alert.
+        """
+        import asyncio  # Already imported by the running event loop.
+
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.deliver, message, level, alerter
+        )
+
     def check_valid_args(self):
         """Utilitly method that checks whether each argument defined in
         `_attr_envvar_map` was defined and raises if any weren't.
@@ -38,3 +274,10 @@ class BaseHandler(ABC):
                     [f"{key}: {self._attr_envvar_map[key]}" for key in missing_args]
                 )
             )
+
+
+@at_exit
+def _send_repeat_summaries():
+    """Send the summaries of repeats still suppressed when the interpreter exits."""
+    for handler in list(_suppressing_handlers):
+        handler._send_repeats_from_timer()
@@ -1,13 +1,33 @@
+import base64
 import email
 import os
-from smtplib import SMTP, SMTP_SSL
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from smtplib import (
+    SMTP,
+    SMTP_SSL,
+    SMTPDataError,
+    SMTPException,
+    SMTPRecipientsRefused,
+    SMTPSenderRefused,
+    SMTPServerDisconnected,
+)
 from contextlib import contextmanager
 from datetime import datetime
+from email.mime.base import MIMEBase
+from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from email.policy import SMTP as SMTP_POLICY
 from ssl import SSLError
-from typing import Iterable, Union, Tuple, Optional
+from time import monotonic
+from typing import Iterable, Iterator, Union, Tuple, Optional
 
+from simulert.attachments import Attachment, fit
+from simulert.dispatch import Buffer, call_later
 from simulert.handlers.base_handler import BaseHandler
+from simulert.levels import ERROR, INFO
 from simulert.logger import logger as simulert_logger
 
 logger = simulert_logger.getChild(__name__)
@@ -25,6 +45,7 @@ class Emailer(BaseHandler):
         "sender": "SIMULERT_EMAIL_SENDER",
         "recipient": "SIMULERT_EMAIL_RECIPIENT",
     }
+    _target_attrs = ("host", "port", "recipient")
 
     def __init__(
         self,
@@ -33,6 +54,12 @@ class Emailer(BaseHandler):
         authentication: Optional[Union[str, Tuple[str]]] = None,
         sender: Optional[str] = None,
         recipient: Optional[Union[str, Iterable[str]]] = None,
+        idle_timeout: Optional[float] = 60.0,
+        digest_window: Optional[float] = None,
+        digest_size: Optional[int] = None,
+        digest_flush_level: Optional[int] = ERROR,
+        max_attachment_size: Optional[int] = 10 * 2 ** 20,
+        timeout: Optional[float] = 10.0,
     ):
         """
         Arguments:
@@ -50,6 +77,21 @@ class Emailer(BaseHandler):
                 list of comma delimited strings defining the name(s) and email(s) of the
                 recipients of email alerts
                 [default: os.environ["SIMULERT_EMAIL_RECIPIENT"]].
+            idle_timeout (Optional[float]): the number of seconds an unused connection
+                to the mail server is kept open for reuse by later emails. A falsy value
+                closes the connection after every email [default: 60].
+            digest_window (Optional[float]): if given, alerts are collected and sent
+                together in one digest email at most this many seconds after the first
+                of them.
+            digest_size (Optional[int]): if given, alerts are collected and sent
+                together in one digest email once this many have been collected.
+            digest_flush_level (Optional[int]): alerts at or above this level are sent
+                straight away along with any collected alerts [default: ERROR].
+            max_attachment_size (Optional[int]): the most bytes of files attached to
+                one email, before encoding; files that do not fit are left out with a
+                note in the email, and None allows any size [default: 10 MiB].
+            timeout (Optional[float]): the socket timeout in seconds for connecting to
+                and sending emails through the mail server [default: 10].
         """
         self.authentication = authentication or os.environ.get(
             self._attr_envvar_map["authentication"]
@@ -68,36 +110,341 @@ class Emailer(BaseHandler):
         self.port = port or os.environ.get(self._attr_envvar_map["port"])
         self.check_valid_args()
         self.port = int(self.port)
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._session = None
+        self._use_ssl = None  # Unknown until a connection has succeeded.
+        self._last_used = 0.0
+        self._idle_check = None
+        self._lock = threading.RLock()
+        self.digest_window = digest_window
+        self.digest_size = digest_size
+        self.digest_flush_level = digest_flush_level
+        self.max_attachment_size = max_attachment_size
+        self._digest = Buffer(
+            self._send_digest,
+            digest_size,
+            digest_window,
+            digest_flush_level,
+            f"Email digest to {self.recipient[0]}",
+        )
 
-    @contextmanager
-    def _server(self):
-        """A convenience context that connects to an SMTP server."""
-        try:
-            server = SMTP_SSL(self.host, self.port)
-        except (SSLError, ConnectionRefusedError):
-            logger.warning("Using a non TSL server connection.")
-            server = SMTP(self.host, self.port)
+    @property
+    def digesting(self) -> bool:
+        """Whether alerts are collected into digest emails."""
+        return self._digest.enabled
+
+    def _connect(self):
+        """
+        Open and authenticate a new connection to the SMTP server. The transport that
+        works first is remembered so that later connections skip a failing SSL
+        handshake.
+        """
+        if self._use_ssl is False:
+            server = SMTP(self.host, self.port, timeout=self.timeout)
+        else:
+            try:
+                server = SMTP_SSL(self.host, self.port, timeout=self.timeout)
+                self._use_ssl = True
+            except (SSLError, ConnectionRefusedError):
+                if self._use_ssl:
+                    raise
+                logger.warning("Using a non TSL server connection.")
+                server = SMTP(self.host, self.port, timeout=self.timeout)
+                self._use_ssl = False
         try:
             server.ehlo()
             if self.authentication[0]:
                 server.login(*self.authentication)
-            yield server
-        finally:
-            server.quit()
+        except BaseException:
+            server.close()
+            raise
+        return server
+
+    @staticmethod
+    def _is_alive(server) -> bool:
+        """Check whether an open SMTP session still responds."""
+        try:
+            return server.noop()[0] == 250
+        except (SMTPException, OSError):
+            return False
+
+    def _close_session(self):
+        """Politely close the open SMTP session, if there is one."""
+        with self._lock:
+            if self._idle_check is not None:
+                self._idle_check.cancel()
+                self._idle_check = None
+            server, self._session = self._session, None
+        if server is not None:
+            try:
+                server.quit()
+            except (SMTPException, OSError):
+                server.close()
 
-    def send_email(self, subject: str, body: str):
+    def close(self):
+        """Send any collected alerts and close the connection to the mail server."""
+        self.flush()
+        self._close_session()
+
+    @contextmanager
+    def _server(self):
         """
-        Sends an email with the provided subject and body.
-        Arguments:
-            subject (str): the email's subject.
-            body (str): the email's text content.
+        A convenience context that provides an authenticated SMTP session, reusing the
+        previous session while it is still alive.
         """
+        with self._lock:
+            if self._session is not None and not self._is_alive(self._session):
+                self._session.close()
+                self._session = None
+            if self._session is None:
+                self._session = self._connect()
+            try:
+                yield self._session
+            except (SMTPServerDisconnected, OSError):
+                self._session.close()
+                self._session = None
+                raise
+            finally:
+                self._last_used = monotonic()
+                if not self.idle_timeout:
+                    self._close_session()
+                elif self._session is not None and self._idle_check is None:
+                    self._idle_check = call_later(
+                        self.idle_timeout, self._close_if_idle
+                    )
+
+    def _close_if_idle(self):
+        """Close the session if it has not been used for the idle timeout, or check
+        again when it will have been."""
+        with self._lock:
+            self._idle_check = None
+            if self._session is None:
+                return
+            idle = monotonic() - self._last_used
+            if idle < self.idle_timeout:
+                self._idle_check = call_later(
+                    self.idle_timeout - idle, self._close_if_idle
+                )
+            else:
+                self._close_session()
+
+    def _compose(self, subject: str, body: str) -> str:
+        """Build the full text of an email with the provided subject and body."""
         msg = MIMEText(body)
         msg["Subject"] = subject
         msg["To"] = email.utils.formataddr(self.recipient)
         msg["From"] = email.utils.formataddr(self.sender)
-        with self._server() as server:
-            server.sendmail(self.sender, self.recipient, msg.as_string())
+        return msg.as_string()
+
+    def _stream(
+        self, subject: str, body: str, attachments: Iterable[Attachment]
+    ) -> Iterator[bytes]:
+        """
+        The full text of an email with attachments, ready to send after the DATA
+        command, one chunk at a time. The headers are built by the email package with
+        a placeholder for each attachment, which is replaced by the file encoded as
+        base64 as it is read, so that files are never held in memory whole.
+        """
+        msg = MIMEMultipart()
+        msg["Subject"] = subject
+        msg["To"] = email.utils.formataddr(self.recipient)
+        msg["From"] = email.utils.formataddr(self.sender)
+        msg.attach(MIMEText(body))
+        placeholders = {}
+        for attachment in attachments:
+            part = MIMEBase(*attachment.mimetype.split("/", 1))
+            part["Content-Transfer-Encoding"] = "base64"
+            part.add_header(
+                "Content-Disposition", "attachment", filename=attachment.name
+            )
+            placeholder = uuid.uuid4().hex
+            part.set_payload(placeholder)
+            placeholders[placeholder.encode()] = attachment
+            msg.attach(part)
+        text = msg.as_bytes(policy=SMTP_POLICY)
+        pieces = re.split(b"(" + b"|".join(placeholders) + b")", text)
+        for piece in pieces:
+            attachment = placeholders.get(piece)
+            if attachment is None:
+                # Lines starting with a dot are escaped; base64 never starts with one.
+                yield re.sub(rb"(?m)^\.", b"..", piece)
+                continue
+            remainder = b""
+            for chunk in attachment.chunks():
+                data = remainder + chunk
+                end = len(data) - len(data) % 57
+                remainder = data[end:]
+                yield base64.encodebytes(data[:end]).replace(b"\n", b"\r\n")
+            yield base64.encodebytes(remainder).replace(b"\n", b"\r\n").rstrip()
+
+    def _send_streamed(self, server, chunks: Iterable[bytes]):
+        """Send an email to an SMTP session one chunk at a time."""
+        code, reply = server.mail(self.sender[-1])
+        if code != 250:
+            server.rset()
+            raise SMTPSenderRefused(code, reply, self.sender[-1])
+        code, reply = server.rcpt(self.recipient[-1])
+        if code not in (250, 251):
+            server.rset()
+            raise SMTPRecipientsRefused({self.recipient[-1]: (code, reply)})
+        code, reply = server.docmd("DATA")
+        if code != 354:
+            server.rset()
+            raise SMTPDataError(code, reply)
+        for chunk in chunks:
+            server.send(chunk)
+        code, reply = server.docmd(".")  # The email already ends with a line break.
+        if code != 250:
+            raise SMTPDataError(code, reply)
+
+    def send_email(
+        self, subject: str, body: str, attachments: Iterable[Attachment] = ()
+    ):
+        """
+        Sends an email with the provided subject and body.
+        Arguments:
+            subject (str): the email's subject.
+            body (str): the email's text content.
+            attachments (Iterable[Attachment]): files to attach, which are streamed to
+                the server as they are read.
+        """
+        attachments = list(attachments)
+        if attachments:
+
+            def send(server):
+                self._send_streamed(server, self._stream(subject, body, attachments))
+
+        else:
+            msg = self._compose(subject, body)
+
+            def send(server):
+                server.sendmail(self.sender, self.recipient, msg)
+
+        try:
+            with self._server() as server:
+                send(server)
+        except SMTPServerDisconnected:
+            # The server dropped the session between the liveness check and sending.
+            with self._server() as server:
+                send(server)
+
+    async def asend_email(self, subject: str, body: str):
+        """
+        Sends an email with the provided subject and body over an asyncio connection,
+        so that many emails can be sent concurrently from an event loop.
+        Arguments:
+            subject (str): the email's subject.
+            body (str): the email's text content.
+        """
+        from simulert.handlers._aio import smtp_send
+
+        msg = self._compose(subject, body)
+        args = (
+            self.authentication,
+            self.sender[-1],
+            [self.recipient[-1]],
+            msg,
+            self.timeout,
+        )
+        if self._use_ssl is not False:
+            try:
+                await smtp_send(self.host, self.port, True, *args)
+                self._use_ssl = True
+                return
+            except (SSLError, ConnectionRefusedError):
+                if self._use_ssl:
+                    raise
+                logger.warning("Using a non TSL server connection.")
+                self._use_ssl = False
+        await smtp_send(self.host, self.port, False, *args)
+
+    def handle(self, alert):
+        """
+        Sends an alert, emailing any attachments straight away rather than adding them
+        to a digest.
+
+        Arguments:
+            alert (Alert): the alert.
+        """
+        if not alert.attachments:
+            super().handle(alert)
+            return
+        attachments, notes = fit(alert.attachments, self.max_attachment_size)
+        body = "\n\n".join([alert.render(self)] + notes)
+        self.send_email("An update on your simulation", body, attachments)
+
+    async def ahandle(self, alert):
+        """
+        Sends an alert from a coroutine. Emails with attachments are sent from the
+        event loop's default executor, as files are read as they are sent.
+
+        Arguments:
+            alert (Alert): the alert.
+        """
+        if not alert.attachments:
+            await super().ahandle(alert)
+            return
+        import asyncio
+
+        await asyncio.get_running_loop().run_in_executor(None, self.handle, alert)
+
+    def deliver(self, message: str, level: int = INFO, alerter: str = ""):
+        """
+        Sends an email with the subject "An update on your simulation" or, when
+        collecting digests, adds the alert to the next digest email.
+
+        Arguments:
+            message (str): text for the content of the email.
+            level (int): the level of the alert.
+            alerter (str): the name of the alerter raising the alert.
+        """
+        if not self.digesting:
+            self.send_email("An update on your simulation", message)
+            return
+        self._digest.add((datetime.now(), alerter, message), level)
+
+    async def adeliver(self, message: str, level: int = INFO, alerter: str = ""):
+        """
+        Sends an email with the subject "An update on your simulation" from a
+        coroutine or, when collecting digests, adds the alert to the next digest email.
+
+        Arguments:
+            message (str): text for the content of the email.
+            level (int): the level of the alert.
+            alerter (str): the name of the alerter raising the alert.
+        """
+        if self.digesting:
+            import asyncio
+
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.deliver, message, level, alerter
+            )
+        else:
+            await self.asend_email("An update on your simulation", message)
+
+    def flush(self):
+        """Send any collected alerts as a digest email."""
+        self._digest.flush()
+
+    def _send_digest(self, digest):
+        self.send_email(*self._format_digest(digest))
+
+    @staticmethod
+    def _format_digest(digest) -> Tuple[str, str]:
+        """The subject and body of a digest email."""
+        if len(digest) == 1:
+            return "An update on your simulation", digest[0][2]
+        groups = OrderedDict()
+        for time, alerter, message in digest:
+            groups.setdefault(alerter, []).append(f"[{time:%H:%M:%S}] {message}")
+        lines = [
+            f"{len(digest)} alerts from {len(groups)} alerter(s) between"
+            f" {digest[0][0]:%Y-%m-%d %H:%M:%S} and {digest[-1][0]:%H:%M:%S}."
+        ]
+        for alerter, messages in groups.items():
+            lines += ["", f"{alerter or 'Alerts'}:"] + messages
+        return f"{len(digest)} updates on your simulation", "\n".join(lines)
 
     def alert(self, message: str):
         """
@@ -108,7 +455,7 @@ class Emailer(BaseHandler):
             message (str): text for the content of the email.
         """
         try:
-            self.send_email("An update on your simulation", message)
+            self.deliver(message)
         except Exception as err:
             logger.exception(
                 f"Email notification to {self.recipient[0]} failed with"
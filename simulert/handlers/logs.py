@@ -2,6 +2,7 @@ import logging
 from typing import Optional
 
 from simulert.handlers.base_handler import BaseHandler
+from simulert.levels import INFO
 from simulert.logger import logger as simulerts_logger
 
 logger = simulerts_logger.getChild(__name__)
@@ -34,3 +35,14 @@ class Logger(BaseHandler):
             message (str): the message to be logged.
         """
         self.user_logger.log(self.level, message)
+
+    async def adeliver(self, message: str, level: int = INFO, alerter: str = ""):
+        """
+        Log an alert from a coroutine. Logging does not wait on the network, so this is
+        done directly.
+        Arguments:
+            message (str): the message to be logged.
+            level (int): the level of the alert.
+            alerter (str): the name of the alerter raising the alert.
+        """
+        self.alert(message)
@@ -1,15 +1,22 @@
+import json
 import os
+import threading
 from datetime import datetime
-from http.client import HTTPSConnection, HTTPResponse
+from http.client import HTTPConnection, HTTPSConnection, RemoteDisconnected
 from typing import Optional
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlsplit
 
 from simulert.handlers.base_handler import BaseHandler
+from simulert.levels import INFO
 from simulert.logger import logger as simulert_logger
 
 logger = simulert_logger.getChild(__name__)
 
 
+class PushoverError(Exception):
+    """An error reported by the Pushover API in response to a message."""
+
+
 class Pushover(BaseHandler):
     """
     An alert handler that will push alerts to smart phones using the Pushover app (see pushover.net).
@@ -19,8 +26,15 @@ class Pushover(BaseHandler):
         "token": "SIMULERT_PUSHOVER_TOKEN",  # corresponds to APP_TOKEN in the example code on pushover.net
         "username": "SIMULERT_PUSHOVER_USERNAME",  # corresponds to USER_TOKEN in the example code on pushover.net
     }
+    _target_attrs = ("username",)
 
-    def __init__(self, token: Optional[str] = None, username: Optional[str] = None):
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        username: Optional[str] = None,
+        url: Optional[str] = "https://api.pushover.net/1/messages.json",
+        timeout: Optional[float] = 10.0,
+    ):
         """
         Arguments:
             token (Optional[str]): the api token for the pushover service from which alerts
@@ -28,20 +42,82 @@ class Pushover(BaseHandler):
                 [default: os.environ["SIMULERT_PUSHOVER_TOKEN"]].
             username (Optional[str]): the pushover user the message will be sent to
                 [default: os.environ[SIMULERT_PUSHOVER_USERNAME]].
+            url (Optional[str]): the messages endpoint of the pushover api
+                [default: "https://api.pushover.net/1/messages.json"].
+            timeout (Optional[float]): the socket timeout in seconds for requests to the
+                api [default: 10].
         """
         self.token = token or os.environ.get(self._attr_envvar_map["token"])
         self.username = username or os.environ.get(self._attr_envvar_map["username"])
         self.check_valid_args()
+        self.url = url
+        self.timeout = timeout
+        url = urlsplit(url)
+        self._connection_class = (
+            HTTPSConnection if url.scheme == "https" else HTTPConnection
+        )
+        self._netloc = url.netloc
+        self._path = url.path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def close(self):
+        """Close the connection held open to the pushover api."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _request(self, body: bytes) -> dict:
+        """
+        Post to the api over the kept-alive connection, reading the whole response so
+        the connection can be reused.
+        """
+        if self._conn is None:
+            self._conn = self._connection_class(self._netloc, timeout=self.timeout)
+        try:
+            self._conn.request(
+                "POST",
+                self._path,
+                body,
+                {"Content-type": "application/x-www-form-urlencoded"},
+            )
+            response = self._conn.getresponse()
+            data = response.read()
+        except Exception:
+            self._conn.close()
+            self._conn = None
+            raise
+        return self._parse_response(response.status, response.reason, data)
 
-    def _post_to_api(self, message: str) -> HTTPResponse:
-        conn = HTTPSConnection("api.pushover.net:443")
-        conn.request("POST", "/1/messages.json",
-                     urlencode({
-                         "token": self.token,
-                         "user": self.username,
-                         "message": message,
-                     }), {"Content-type": "application/x-www-form-urlencoded"})
-        return conn.getresponse()
+    @staticmethod
+    def _parse_response(status: int, reason: str, data: bytes) -> dict:
+        """Decode a response from the api, raising if it reports an error."""
+        try:
+            content = json.loads(data.decode()) if data else {}
+        except ValueError:
+            content = {"errors": [data.decode(errors="replace")]}
+        if not 200 <= status < 300:
+            raise PushoverError(
+                f"Pushover api responded with {status} {reason}:"
+                f" {content.get('errors', content)}"
+            )
+        return content
+
+    def _encode(self, message: str) -> bytes:
+        # As bytes, http.client sends the body in the same packet as the headers.
+        return urlencode(
+            {"token": self.token, "user": self.username, "message": message}
+        ).encode()
+
+    def _post_to_api(self, message: str) -> dict:
+        body = self._encode(message)
+        with self._lock:
+            try:
+                return self._request(body)
+            except (RemoteDisconnected, ConnectionError):
+                # The server closed the kept-alive connection; retry on a new one.
+                return self._request(body)
 
     def send_message(self, message: str) -> None:
         """
@@ -51,6 +127,45 @@ class Pushover(BaseHandler):
         """
         self._post_to_api(message=message)
 
+    def deliver(self, message: str, level: int = INFO, alerter: str = ""):
+        """
+        Sends a message via pushover.
+
+        Arguments:
+            message (str): the text of the message to be sent.
+            level (int): the level of the alert.
+            alerter (str): the name of the alerter raising the alert.
+        """
+        self.send_message(message)
+
+    async def asend_message(self, message: str) -> None:
+        """
+        Sends a message via pushover over an asyncio connection, so that many messages
+        can be sent concurrently from an event loop.
+        Arguments:
+            message (str): the text of the message to be sent.
+        """
+        from simulert.handlers._aio import http_post
+
+        response = await http_post(
+            self.url,
+            self._encode(message),
+            {"Content-type": "application/x-www-form-urlencoded"},
+            self.timeout,
+        )
+        self._parse_response(*response)
+
+    async def adeliver(self, message: str, level: int = INFO, alerter: str = ""):
+        """
+        Sends a message via pushover from a coroutine.
+
+        Arguments:
+            message (str): the text of the message to be sent.
+            level (int): the level of the alert.
+            alerter (str): the name of the alerter raising the alert.
+        """
+        await self.asend_message(message)
+
     def alert(self, message: str) -> None:
         """
         Sends a message via pushover with error protection.
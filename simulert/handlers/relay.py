@@ -0,0 +1,106 @@
+import json
+import os
+import socket
+import threading
+from typing import Optional
+
+from simulert.aggregator import parse_address, socket_family
+from simulert.handlers.base_handler import BaseHandler
+from simulert.levels import INFO
+from simulert.logger import logger as simulert_logger
+
+logger = simulert_logger.getChild(__name__)
+
+
+class Relay(BaseHandler):
+    """
+    An alert handler that relays alerts to an aggregator (see `simulert aggregate`),
+    which sends them on and merges the completions of many processes into one
+    summary.
+    """
+
+    _attr_envvar_map = {"address": "SIMULERT_AGGREGATOR"}
+    _target_attrs = ("address",)
+
+    def __init__(self, address: Optional[str] = None, timeout: Optional[float] = 5.0):
+        """
+        Arguments:
+            address (Optional[str]): the path of the aggregator's Unix domain socket or
+                its "host:port" [default: os.environ["SIMULERT_AGGREGATOR"]].
+            timeout (Optional[float]): the socket timeout in seconds for connecting and
+                sending to the aggregator [default: 5].
+        """
+        self.address = address or os.environ.get(self._attr_envvar_map["address"])
+        self.check_valid_args()
+        self.timeout = timeout
+        self._address = parse_address(self.address)
+        self._sock = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.socket(socket_family(self._address), socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self._address)
+        except Exception:
+            sock.close()
+            raise
+        self._sock = sock
+        # A forked process must not write to its parent's connection.
+        self._pid = os.getpid()
+
+    def close(self):
+        """Close the connection to the aggregator."""
+        with self._lock:
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+
+    def send(self, message: str, level: int = INFO, alerter: str = ""):
+        """
+        Sends an alert to the aggregator over a kept-alive connection.
+
+        Arguments:
+            message (str): the text of the message to be sent.
+            level (int): the level of the alert.
+            alerter (str): the name of the alerter raising the alert.
+        """
+        data = (
+            json.dumps({"alerter": alerter, "level": level, "message": message}) + "\n"
+        ).encode()
+        with self._lock:
+            if self._sock is None or self._pid != os.getpid():
+                self._connect()
+            try:
+                self._sock.sendall(data)
+            except OSError:
+                # The aggregator restarted since the connection was made; retry once.
+                self._sock.close()
+                self._connect()
+                self._sock.sendall(data)
+
+    def deliver(self, message: str, level: int = INFO, alerter: str = ""):
+        """
+        Sends an alert to the aggregator.
+
+        Arguments:
+            message (str): the text of the message to be sent.
+            level (int): the level of the alert.
+            alerter (str): the name of the alerter raising the alert.
+        """
+        self.send(message, level, alerter)
+
+    def alert(self, message: str):
+        """
+        Sends a message to the aggregator with error protection.
+
+        Arguments:
+            message (str): the text of the message to be sent.
+        """
+        try:
+            self.send(message)
+        except Exception as err:
+            logger.exception(
+                f"Relay to aggregator at {self.address} failed with {err.__repr__()}"
+            )
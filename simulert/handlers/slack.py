@@ -1,15 +1,29 @@
 from datetime import datetime
+import io
 import os
+import threading
+import time
 from typing import Optional
 
 from slack import WebClient
+from slack.errors import SlackApiError
 
+from simulert.attachments import fit
 from simulert.handlers.base_handler import BaseHandler
+from simulert.levels import COMPLETED, FAILED, INFO, PROGRESS
 from simulert.logger import logger as simulert_logger
 
 logger = simulert_logger.getChild(__name__)
 
 
+def _retry_after(err: SlackApiError) -> Optional[float]:
+    """The seconds slack asked to wait before retrying, if it rate limited a call."""
+    response = getattr(err, "response", None)
+    if getattr(response, "status_code", None) != 429:
+        return None
+    return float(response.headers.get("Retry-After", 1))
+
+
 class Slacker(BaseHandler):
     """
     An alert handler that will post alerts to Slack.
@@ -19,20 +33,135 @@ class Slacker(BaseHandler):
         "token": "SIMULERT_SLACK_TOKEN",
         "username": "SIMULERT_SLACK_USERNAME",
     }
+    _target_attrs = ("username",)
 
-    def __init__(self, token: Optional[str] = None, username: Optional[str] = None):
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        username: Optional[str] = None,
+        base_url: Optional[str] = None,
+        channel: Optional[str] = None,
+        live_status: Optional[bool] = False,
+        max_retries: Optional[int] = 3,
+        max_attachment_size: Optional[int] = 50 * 2 ** 20,
+    ):
         """
         Arguments:
             token (Optional[str]): the api token for the slack bot from which alerts
                 from this handler will be sent from
                 [default: os.environ["SIMULERT_SLACK_TOKEN"]].
-            username (Optional[str]): the username the slack message will be sent to
-                [default: os.environ[SIMULERT_SLACK_USERNAME]].
+            username (Optional[str]): the username, email address or user ID the slack
+                message will be sent to [default: os.environ[SIMULERT_SLACK_USERNAME]].
+            base_url (Optional[str]): the url of the slack web api
+                [default: the slack client's default].
+            channel (Optional[str]): the ID of the channel to post to [default: the
+                direct message channel with the user, looked up on the first alert].
+            live_status (Optional[bool]): whether to show progress alerts by editing
+                a single status message for each alerter, rather than posting each one;
+                other alerts are still posted [default: False].
+            max_retries (Optional[int]): the number of times to retry a call that slack
+                rate limited, after waiting as long as slack asks [default: 3].
+            max_attachment_size (Optional[int]): the most bytes of files uploaded with
+                one alert; files that do not fit are left out with a note in the
+                message, and None allows any size [default: 50 MiB].
         """
         self.token = token or os.environ.get(self._attr_envvar_map["token"])
         self.username = username or os.environ.get(self._attr_envvar_map["username"])
         self.check_valid_args()
-        self.client = WebClient(self.token)
+        self._client_options = {"base_url": base_url} if base_url else {}
+        self.client = WebClient(self.token, **self._client_options)
+        self._async_client = None
+        self._channel = channel
+        self.live_status = live_status
+        self.max_retries = max_retries
+        self.max_attachment_size = max_attachment_size
+        self._status_messages = {}  # The timestamp of each alerter's status message.
+        self._lock = threading.Lock()
+
+    @property
+    def async_client(self) -> WebClient:
+        """A slack client whose api methods are coroutines, created on first use."""
+        if self._async_client is None:
+            self._async_client = WebClient(
+                self.token, run_async=True, **self._client_options
+            )
+        return self._async_client
+
+    @property
+    def channel(self) -> str:
+        """The ID of the channel alerts are posted to, looked up once."""
+        if self._channel is None:
+            with self._lock:
+                if self._channel is None:
+                    self._channel = self._open_direct_message()
+        return self._channel
+
+    def _open_direct_message(self) -> str:
+        try:
+            user = self._find_user()
+            response = self._call("conversations_open", users=user)
+            return response["channel"]["id"]
+        except SlackApiError as err:
+            # Without the scopes to look up users, fall back on the deprecated address.
+            logger.warning(
+                f"Slack could not open a conversation with {self.username}, so alerts"
+                f" will be posted to @{self.username}: {err.__repr__()}"
+            )
+            return f"@{self.username}"
+
+    def _find_user(self) -> str:
+        username = self.username.lstrip("@")
+        if username[:1] in ("U", "W") and username.isalnum() and username.isupper():
+            return username
+        if "@" in username:
+            response = self._call("users_lookupByEmail", email=username)
+            return response["user"]["id"]
+        page = {}
+        while True:
+            response = self._call("users_list", limit=200, **page)
+            for member in response["members"]:
+                if username in (member.get("name"), member.get("id")):
+                    return member["id"]
+            cursor = response.get("response_metadata", {}).get("next_cursor")
+            if not cursor:
+                raise ValueError(f"There is no slack user called {self.username}.")
+            page = {"cursor": cursor}
+
+    def _call(self, method: str, **kwargs):
+        """Call a slack api method, waiting and retrying if slack rate limits it."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return getattr(self.client, method)(**kwargs)
+            except SlackApiError as err:
+                delay = _retry_after(err)
+                if delay is None or attempt == self.max_retries:
+                    raise
+                logger.info(f"Slack rate limited {method}; retrying in {delay}s.")
+                time.sleep(delay)
+
+    async def _acall(self, method: str, **kwargs):
+        """Call a slack api method from a coroutine, retrying if it is rate limited."""
+        import asyncio  # Already imported by the running event loop.
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await getattr(self.async_client, method)(**kwargs)
+            except SlackApiError as err:
+                delay = _retry_after(err)
+                if delay is None or attempt == self.max_retries:
+                    raise
+                logger.info(f"Slack rate limited {method}; retrying in {delay}s.")
+                await asyncio.sleep(delay)
+
+    async def _achannel(self) -> str:
+        if self._channel is None:
+            import asyncio
+
+            # Looked up once, so the blocking client is used off the event loop.
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self.channel
+            )
+        return self._channel
 
     def send_message(self, message: str):
         """
@@ -40,10 +169,137 @@ class Slacker(BaseHandler):
         Arguments:
             message (str): the text of the message to be sent.
         """
-        self.client.chat_postMessage(
-            channel=f"@{self.username}", text=message,
+        return self._call("chat_postMessage", channel=self.channel, text=message)
+
+    def update_status(self, message: str, alerter: str = ""):
+        """
+        Shows a message in an alerter's status message, posting the status message if
+        there isn't one yet.
+        Arguments:
+            message (str): the text of the message to be shown.
+            alerter (str): the name of the alerter the status is for.
+        """
+        timestamp = self._status_messages.get(alerter)
+        if timestamp is not None:
+            self._call("chat_update", channel=self.channel, ts=timestamp, text=message)
+            return
+        response = self.send_message(message)
+        self._status_messages[alerter] = response["ts"]
+
+    async def asend_message(self, message: str):
+        """
+        Sends a message via slack's async client, so that many messages can be sent
+        concurrently from an event loop.
+        Arguments:
+            message (str): the text of the message to be sent.
+        """
+        channel = await self._achannel()
+        return await self._acall("chat_postMessage", channel=channel, text=message)
+
+    async def aupdate_status(self, message: str, alerter: str = ""):
+        """
+        Shows a message in an alerter's status message from a coroutine.
+        Arguments:
+            message (str): the text of the message to be shown.
+            alerter (str): the name of the alerter the status is for.
+        """
+        timestamp = self._status_messages.get(alerter)
+        if timestamp is not None:
+            channel = await self._achannel()
+            await self._acall(
+                "chat_update", channel=channel, ts=timestamp, text=message
+            )
+            return
+        response = await self.asend_message(message)
+        self._status_messages[alerter] = response["ts"]
+
+    def upload_file(self, attachment, comment: Optional[str] = None):
+        """
+        Uploads a file to the channel via slack's files api.
+        Arguments:
+            attachment (Attachment): the file to upload.
+            comment (Optional[str]): a message to post with the file.
+        """
+        # The slack client reads the file into memory to upload it, so the size of
+        # what is uploaded is bounded by max_attachment_size.
+        content = io.BytesIO(attachment.read())
+        options = {} if comment is None else {"initial_comment": comment}
+        return self._call(
+            "files_upload",
+            channels=self.channel,
+            file=content,
+            filename=attachment.name,
+            **options,
         )
 
+    def handle(self, alert):
+        """
+        Sends an alert, uploading any attachments with its message.
+
+        Arguments:
+            alert (Alert): the alert.
+        """
+        if not alert.attachments:
+            super().handle(alert)
+            return
+        attachments, notes = fit(alert.attachments, self.max_attachment_size)
+        message = "\n".join([alert.render(self)] + notes)
+        if not attachments:
+            self.send_message(message)
+        for number, attachment in enumerate(attachments):
+            self.upload_file(attachment, message if number == 0 else None)
+        if alert.level in (COMPLETED, FAILED):
+            self._status_messages.pop(alert.alerter, None)
+
+    async def ahandle(self, alert):
+        """
+        Sends an alert from a coroutine. Alerts with attachments are uploaded from the
+        event loop's default executor, as files are read as they are uploaded.
+
+        Arguments:
+            alert (Alert): the alert.
+        """
+        if not alert.attachments:
+            await super().ahandle(alert)
+            return
+        import asyncio
+
+        await asyncio.get_running_loop().run_in_executor(None, self.handle, alert)
+
+    async def adeliver(self, message: str, level: int = INFO, alerter: str = ""):
+        """
+        Sends a message via slack from a coroutine.
+
+        Arguments:
+            message (str): the text of the message to be sent.
+            level (int): the level of the alert.
+            alerter (str): the name of the alerter raising the alert.
+        """
+        if self.live_status and level == PROGRESS:
+            await self.aupdate_status(message, alerter)
+            return
+        await self.asend_message(message)
+        if level in (COMPLETED, FAILED):
+            self._status_messages.pop(alerter, None)
+
+    def deliver(self, message: str, level: int = INFO, alerter: str = ""):
+        """
+        Sends a message via slack. In live status mode, progress alerts update the
+        alerter's status message instead, and the alerter's next progress alert after
+        it completes or fails starts a new one.
+
+        Arguments:
+            message (str): the text of the message to be sent.
+            level (int): the level of the alert.
+            alerter (str): the name of the alerter raising the alert.
+        """
+        if self.live_status and level == PROGRESS:
+            self.update_status(message, alerter)
+            return
+        self.send_message(message)
+        if level in (COMPLETED, FAILED):
+            self._status_messages.pop(alerter, None)
+
     def alert(self, message):
         """
         Sends a message via slack with error protection.
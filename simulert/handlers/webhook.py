@@ -0,0 +1,329 @@
+import json
+import os
+import threading
+from datetime import datetime
+from http.client import HTTPConnection, HTTPSConnection, RemoteDisconnected
+from queue import Empty, Full, LifoQueue
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from simulert.dispatch import Buffer
+from simulert.events import Alert
+from simulert.handlers.base_handler import BaseHandler
+from simulert.levels import ERROR, INFO
+from simulert.logger import logger as simulert_logger
+from simulert.templates import compile_template
+
+logger = simulert_logger.getChild(__name__)
+
+# The default payload, which Slack and Teams incoming webhooks accept.
+DEFAULT_PAYLOAD = {"text": "{message}"}
+
+_pools: Dict[Tuple[str, str], "ConnectionPool"] = {}
+_pools_lock = threading.Lock()
+
+
+class WebhookError(Exception):
+    """An error response from a webhook endpoint."""
+
+
+class ConnectionPool:
+    """
+    A few kept-alive HTTP connections to one host, shared by the webhooks posting to
+    it so that concurrent alerts do not queue for a single connection.
+    """
+
+    def __init__(self, scheme: str, netloc: str, size: int = 4):
+        """
+        Arguments:
+            scheme (str): "http" or "https".
+            netloc (str): the host and optional port.
+            size (int): the most idle connections kept open [default: 4].
+        """
+        self._connection_class = (
+            HTTPSConnection if scheme == "https" else HTTPConnection
+        )
+        self.netloc = netloc
+        self._idle = LifoQueue(size)
+
+    def grow(self, size: int):
+        """
+        Keep at least this many idle connections open.
+
+        Arguments:
+            size (int): the most idle connections kept open.
+        """
+        with self._idle.mutex:
+            self._idle.maxsize = max(self._idle.maxsize, size)
+
+    def _connection(self, timeout: Optional[float]):
+        try:
+            conn = self._idle.get_nowait()
+        except Empty:
+            return self._connection_class(self.netloc, timeout=timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _release(self, conn):
+        try:
+            self._idle.put_nowait(conn)
+        except Full:
+            conn.close()
+
+    def post(
+        self,
+        path: str,
+        body: bytes,
+        headers: Dict[str, str],
+        timeout: Optional[float] = None,
+    ) -> Tuple[int, str, bytes]:
+        """
+        Post to the host over an idle connection, or a new one if there is none,
+        retrying once on a new connection if a reused one turns out to be closed.
+
+        Returns:
+            (Tuple[int, str, bytes]): the status, reason and body of the response.
+        """
+        while True:
+            conn, reused = self._connection(timeout)
+            try:
+                conn.request("POST", path, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (RemoteDisconnected, ConnectionError):
+                conn.close()
+                if reused:
+                    continue  # The server closed the idle connection.
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return response.status, response.reason, data
+
+    def close(self):
+        """Close the idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                return
+
+
+def connection_pool(url: str, size: int = 4) -> ConnectionPool:
+    """
+    The connection pool shared by webhooks posting to the host of a url, which keeps
+    as many idle connections as the largest size asked for.
+    """
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(parts.scheme, parts.netloc, size)
+        else:
+            pool.grow(size)
+        return pool
+
+
+class Webhook(BaseHandler):
+    """
+    An alert handler that posts alerts as JSON to a webhook, such as those of Discord,
+    Microsoft Teams or an in-house incident API.
+    """
+
+    _attr_envvar_map = {"url": "SIMULERT_WEBHOOK_URL"}
+    _target_attrs = ("url",)
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        payload: Optional[object] = None,
+        timeout: Optional[float] = 10.0,
+        pool_size: Optional[int] = 4,
+        batch_size: Optional[int] = None,
+        batch_window: Optional[float] = None,
+        batch_flush_level: Optional[int] = ERROR,
+    ):
+        """
+        Arguments:
+            url (Optional[str]): the url of the webhook
+                [default: os.environ["SIMULERT_WEBHOOK_URL"]].
+            headers (Optional[Dict[str, str]]): additional request headers, such as
+                an "Authorization" header.
+            payload (Optional[object]): the JSON payload of each alert, in which every
+                string is a `str.format` template for the alert's "message", "level",
+                "level_name", "alerter", "simulation", "time" and template fields. A
+                string that is a single field, such as "{level}", keeps the field's
+                type [default: {"text": "{message}"}].
+            timeout (Optional[float]): the socket timeout in seconds for requests to the
+                webhook [default: 10].
+            pool_size (Optional[int]): the most idle connections kept open to the
+                webhook's host, which is shared with other webhooks on the host
+                [default: 4].
+            batch_size (Optional[int]): if given, alerts are collected and posted
+                together as a JSON array once this many have been collected, for
+                endpoints that accept arrays.
+            batch_window (Optional[float]): if given, alerts are collected and posted
+                together as a JSON array at most this many seconds after the first.
+            batch_flush_level (Optional[int]): alerts at or above this level are
+                posted straight away along with any collected alerts [default: ERROR].
+        """
+        self.url = url or os.environ.get(self._attr_envvar_map["url"])
+        self.check_valid_args()
+        parts = urlsplit(self.url)
+        self._target = parts.path or "/"
+        if parts.query:
+            self._target += "?" + parts.query
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.payload = DEFAULT_PAYLOAD if payload is None else payload
+        self._compile(self.payload)  # Raises now if a template is malformed.
+        self.timeout = timeout
+        self._pool = connection_pool(self.url, pool_size)
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.batch_flush_level = batch_flush_level
+        self._batch = Buffer(
+            self._post, batch_size, batch_window, batch_flush_level, "Webhook batch"
+        )
+
+    @property
+    def batching(self) -> bool:
+        """Whether alerts are collected and posted together."""
+        return self._batch.enabled
+
+    @classmethod
+    def _compile(cls, payload):
+        if isinstance(payload, str):
+            compile_template(payload)
+        elif isinstance(payload, dict):
+            for value in payload.values():
+                cls._compile(value)
+        elif isinstance(payload, (list, tuple)):
+            for value in payload:
+                cls._compile(value)
+
+    def render_payload(self, alert: Alert) -> object:
+        """
+        The JSON payload of an alert.
+
+        Arguments:
+            alert (Alert): the alert.
+        """
+        fields = {
+            **alert.fields,
+            "message": alert.render(self),
+            "level": alert.level,
+            "level_name": alert.level_name,
+            "alerter": alert.alerter,
+            "simulation": alert.simulation,
+            "time": datetime.fromtimestamp(alert.created).isoformat(),
+        }
+        return _fill(self.payload, fields)
+
+    def _post(self, payload: object):
+        body = json.dumps(payload).encode()
+        status, reason, data = self._pool.post(
+            self._target, body, self.headers, self.timeout
+        )
+        if not 200 <= status < 300:
+            raise WebhookError(
+                f"Webhook responded with {status} {reason}:"
+                f" {data.decode(errors='replace')[:200]}"
+            )
+
+    def handle(self, alert: Alert):
+        """
+        Posts an alert to the webhook or, when batching, adds it to the next batch.
+
+        Arguments:
+            alert (Alert): the alert.
+        """
+        payload = self.render_payload(alert)
+        if self.batching:
+            self._batch.add(payload, alert.level)
+        else:
+            self._post(payload)
+
+    async def ahandle(self, alert: Alert):
+        """
+        Posts an alert to the webhook from a coroutine over an asyncio connection or,
+        when batching, adds it to the next batch.
+
+        Arguments:
+            alert (Alert): the alert.
+        """
+        if self.batching:
+            import asyncio
+
+            await asyncio.get_running_loop().run_in_executor(None, self.handle, alert)
+            return
+        from simulert.handlers._aio import http_post
+
+        body = json.dumps(self.render_payload(alert)).encode()
+        status, reason, data = await http_post(
+            self.url, body, self.headers, self.timeout
+        )
+        if not 200 <= status < 300:
+            raise WebhookError(
+                f"Webhook responded with {status} {reason}:"
+                f" {data.decode(errors='replace')[:200]}"
+            )
+
+    def deliver(self, message: str, level: int = INFO, alerter: str = ""):
+        """
+        Posts a message to the webhook.
+
+        Arguments:
+            message (str): the text of the message to be sent.
+            level (int): the level of the alert.
+            alerter (str): the name of the alerter raising the alert.
+        """
+        self.handle(Alert(message, level, alerter))
+
+    def flush(self):
+        """Post any collected alerts as one JSON array."""
+        self._batch.flush()
+
+    def close(self):
+        """Post any collected alerts and close the idle connections to the host."""
+        self.flush()
+        self._pool.close()
+
+    def alert(self, message: str):
+        """
+        Posts a message to the webhook with error protection.
+
+        Arguments:
+            message (str): the text of the message to be sent.
+        """
+        try:
+            self.deliver(message)
+        except Exception as err:
+            logger.exception(
+                f"Webhook notification to {self.url} failed with {err.__repr__()}"
+            )
+
+    def send_test_message(self):
+        """Posts a test message to the webhook."""
+        self.deliver(f"This test message was sent at {datetime.now()}")
+
+
+def _fill(payload, fields: dict):
+    """Render every string in a JSON payload with the fields."""
+    if isinstance(payload, str):
+        template = compile_template(payload)
+        if len(template.fields) == 1 and payload == f"{{{template.fields[0]}}}":
+            return fields.get(template.fields[0])  # A single field keeps its type.
+        return template.render(fields)
+    if isinstance(payload, dict):
+        return {key: _fill(value, fields) for key, value in payload.items()}
+    if isinstance(payload, (list, tuple)):
+        return [_fill(value, fields) for value in payload]
+    return payload
@@ -0,0 +1,39 @@
+"""
+Alert levels, which follow the numbering of the levels in the `logging` package with
+additional levels for the outcome of a simulation.
+"""
+
+NOTSET = 0
+DEBUG = 10
+PROGRESS = 15
+INFO = 20
+COMPLETED = 25
+WARNING = 30
+ERROR = 40
+FAILED = 45
+CRITICAL = 50
+
+_level_names = {
+    NOTSET: "NOTSET",
+    DEBUG: "DEBUG",
+    PROGRESS: "PROGRESS",
+    INFO: "INFO",
+    COMPLETED: "COMPLETED",
+    WARNING: "WARNING",
+    ERROR: "ERROR",
+    FAILED: "FAILED",
+    CRITICAL: "CRITICAL",
+}
+
+
+def getLevelName(level: int) -> str:
+    """
+    The name of an alert level, akin to logging.getLevelName.
+
+    Arguments:
+        level (int): the alert level.
+    """
+    return _level_names.get(level, f"Level {level}")
+
+
+__all__ = [name for name in _level_names.values()] + ["getLevelName"]
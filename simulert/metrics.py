@@ -0,0 +1,200 @@
+import os
+import threading
+import weakref
+from bisect import bisect_left
+from time import monotonic
+from typing import Callable, Dict, Iterable, List, Optional
+
+from simulert.delivery import Status
+from simulert.dispatch import at_exit
+
+# The upper bounds, in seconds, of the buckets of the delivery latency histograms.
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+_STATUSES = tuple(Status)
+_DROPPED = Status.DROPPED  # Looking up enum members on their class is slow.
+_textfile_metrics = weakref.WeakSet()
+
+
+class HandlerMetrics:
+    """The counts of the outcomes of one handler's deliveries and a histogram of how
+    long they took."""
+
+    __slots__ = ("name", "counts", "buckets", "latency_sum")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counts = dict.fromkeys(_STATUSES, 0)
+        # One bucket per bound and a last one for anything slower.
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+
+    def as_dict(self) -> dict:
+        cumulative = []
+        total = 0
+        for count in self.buckets:
+            total += count
+            cumulative.append(total)
+        return {
+            **{status.value: count for status, count in self.counts.items()},
+            "latency": {
+                "buckets": dict(zip(LATENCY_BUCKETS + (float("inf"),), cumulative)),
+                "sum": self.latency_sum,
+                "count": total,
+            },
+        }
+
+
+class Metrics:
+    """
+    The delivery metrics of an alerter: for each handler, how many alerts it
+    delivered, failed, timed out on or dropped and how long it took to send them,
+    optionally written out as a Prometheus text file.
+    """
+
+    def __init__(
+        self,
+        alerter: str,
+        textfile: Optional[str] = None,
+        interval: Optional[float] = 15.0,
+        queue: Optional[Callable[[], Optional[dict]]] = None,
+    ):
+        """
+        Arguments:
+            alerter (str): the name of the alerter, used as a label.
+            textfile (Optional[str]): the path of a file to write the metrics to in the
+                Prometheus text format, such as into the directory read by
+                node_exporter's textfile collector.
+            interval (Optional[float]): the minimum number of seconds between writes of
+                the text file [default: 15].
+            queue (Optional[Callable[[], Optional[dict]]]): a function returning the
+                depth of the alerter's queue and the number of alerts it dropped, or
+                None if it has no queue.
+        """
+        self.alerter = alerter
+        self.textfile = textfile
+        self.interval = interval
+        self.handlers: Dict[object, HandlerMetrics] = {}
+        self._names = set()
+        self.queue = queue or (lambda: None)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._written = None
+        if textfile is not None:
+            _textfile_metrics.add(self)
+
+    def _handler(self, handler) -> HandlerMetrics:
+        metrics = self.handlers.get(handler)
+        if metrics is None:
+            name = type(handler).__name__
+            number = 1
+            while name in self._names:
+                number += 1
+                name = f"{type(handler).__name__}-{number}"
+            self._names.add(name)
+            metrics = self.handlers[handler] = HandlerMetrics(name)
+        return metrics
+
+    def record(self, results: Iterable):
+        """
+        Record the outcome of delivering an alert.
+
+        Arguments:
+            results (Iterable[DeliveryResult]): the outcome for each handler.
+        """
+        with self._lock:
+            for result in results:
+                metrics = self._handler(result.handler)
+                metrics.counts[result.status] += 1
+                if result.status is not _DROPPED:
+                    metrics.buckets[bisect_left(LATENCY_BUCKETS, result.duration)] += 1
+                    metrics.latency_sum += result.duration
+        if self.textfile is not None and (
+            self._written is None or monotonic() - self._written >= self.interval
+        ):
+            self.write()
+
+    def as_dict(self) -> Dict[str, dict]:
+        """The metrics of each handler, by handler name."""
+        with self._lock:
+            return {
+                metrics.name: metrics.as_dict() for metrics in self.handlers.values()
+            }
+
+    def prometheus(self) -> str:
+        """The metrics in the Prometheus text format."""
+        alerter = _escape(self.alerter)
+        lines: List[str] = [
+            "# HELP simulert_alerts_total Alerts passed to each handler, by outcome.",
+            "# TYPE simulert_alerts_total counter",
+        ]
+        histogram = [
+            "# HELP simulert_delivery_seconds Time taken to send alerts by handler.",
+            "# TYPE simulert_delivery_seconds histogram",
+        ]
+        for name, metrics in self.as_dict().items():
+            labels = f'alerter="{alerter}",handler="{_escape(name)}"'
+            for status in _STATUSES:
+                lines.append(
+                    f'simulert_alerts_total{{{labels},status="{status.value}"}}'
+                    f" {metrics[status.value]}"
+                )
+            latency = metrics["latency"]
+            for bound, count in latency["buckets"].items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                histogram.append(
+                    f'simulert_delivery_seconds_bucket{{{labels},le="{le}"}} {count}'
+                )
+            histogram += [
+                f"simulert_delivery_seconds_sum{{{labels}}} {latency['sum']}",
+                f"simulert_delivery_seconds_count{{{labels}}} {latency['count']}",
+            ]
+        lines += histogram
+        queue = self.queue()
+        if queue is not None:
+            lines += [
+                "# HELP simulert_queue_depth Alerts waiting in the alerter's queue.",
+                "# TYPE simulert_queue_depth gauge",
+                f'simulert_queue_depth{{alerter="{alerter}"}} {queue["depth"]}',
+                "# HELP simulert_queue_dropped_total Alerts dropped by a full queue.",
+                "# TYPE simulert_queue_dropped_total counter",
+                f'simulert_queue_dropped_total{{alerter="{alerter}"}}'
+                f' {queue["dropped"]}',
+            ]
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        """
+        Write the metrics to the text file, replacing it at once so that it is never
+        read half written.
+        """
+        with self._write_lock:
+            self._written = monotonic()
+            temporary = f"{self.textfile}.{os.getpid()}.tmp"
+            with open(temporary, "w") as textfile:
+                textfile.write(self.prometheus())
+            os.replace(temporary, self.textfile)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+@at_exit
+def _write_textfiles():
+    """Write the final metrics of every alerter with a text file at exit."""
+    for metrics in list(_textfile_metrics):
+        metrics.write()
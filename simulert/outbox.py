@@ -0,0 +1,418 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+import weakref
+from collections import OrderedDict, namedtuple
+from time import monotonic, time
+from typing import Dict, Iterable, List, Optional
+
+from simulert.delivery import Status, redeliver
+from simulert.dispatch import at_exit
+from simulert.events import Alert
+from simulert.logger import logger as simulert_logger
+
+try:
+    import fcntl
+except ImportError:  # Journals are not locked against compaction on Windows.
+    fcntl = None
+
+logger = simulert_logger.getChild(__name__)
+
+Entry = namedtuple(
+    "Entry",
+    ("id", "alerter", "handler", "message", "level", "attempts", "next_attempt"),
+)
+Entry.__doc__ = """
+An alert waiting in an outbox to be delivered by one handler.
+
+Attributes:
+    id (str): the identifier of the entry in the journal.
+    alerter (str): the name of the alerter that raised the alert.
+    handler (str): the key of the handler that is to deliver the alert.
+    message (str): the message of the alert.
+    level (int): the level of the alert.
+    attempts (int): the number of failed attempts to deliver the alert.
+    next_attempt (float): the time, in seconds since the epoch, after which delivery
+        should be retried.
+"""
+
+_outboxes = weakref.WeakSet()
+
+
+def handler_key(handler) -> str:
+    """
+    The key an outbox uses to match entries to handlers across processes: the type of
+    the handler and, for handlers that name where they send alerts, a digest of that
+    target, so that handlers of one type are told apart without writing their
+    targets, which may hold tokens, to the journal.
+    """
+    key = type(handler).__name__
+    attrs = getattr(handler, "_target_attrs", ())
+    if not attrs:
+        return key
+    target = "\0".join(str(getattr(handler, attr, None)) for attr in attrs)
+    return f"{key}:{hashlib.sha256(target.encode()).hexdigest()[:16]}"
+
+
+class Outbox:
+    """
+    A durable record of alerts that have not yet been delivered, kept as an
+    append-only journal of JSON lines. Alerts are recorded before they are sent and
+    marked as done once a handler has delivered them, so that alerts which could not
+    be sent are retried with exponential backoff and can be replayed by a later
+    process (see `simulert flush`).
+
+    Records are written with one `write` each, so they survive the process being
+    killed, but are only synced to disk every `fsync_interval` seconds or
+    `fsync_batch` records to keep recording cheap. The entries pending when the
+    outbox is made, and those it records itself, are also kept in memory so that
+    retries do not re-read the journal.
+
+    An alert is done once its handler returns, so alerts that a handler holds on to,
+    such as those collected into an email digest or a webhook batch, are not retried
+    if the process dies before they are sent.
+    """
+
+    _attr_envvar_map = {"path": "SIMULERT_OUTBOX"}
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        fsync_interval: Optional[float] = 1.0,
+        fsync_batch: Optional[int] = 64,
+        retry_base: Optional[float] = 30.0,
+        retry_max: Optional[float] = 3600.0,
+    ):
+        """
+        Arguments:
+            path (Optional[str]): the path of the journal file
+                [default: os.environ["SIMULERT_OUTBOX"]].
+            fsync_interval (Optional[float]): the maximum number of seconds between
+                syncs of the journal to disk [default: 1].
+            fsync_batch (Optional[int]): the maximum number of records written between
+                syncs of the journal to disk [default: 64].
+            retry_base (Optional[float]): the number of seconds before the first retry
+                of a failed delivery, doubling with every further failure
+                [default: 30].
+            retry_max (Optional[float]): the maximum number of seconds between retries
+                [default: 3600].
+        """
+        self.path = path or os.environ.get(self._attr_envvar_map["path"])
+        if self.path is None:
+            raise ValueError(
+                "This outbox was instantiated without a path. This can be defined as"
+                " an argument to the constructor or with the environment variable"
+                f" {self._attr_envvar_map['path']}."
+            )
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._fd = None
+        self._unsynced = 0
+        self._synced = monotonic()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict((entry.id, entry) for entry in self.pending())
+        self._handlers = {}  # The handler objects of the entries recorded here.
+        _outboxes.add(self)
+
+    def _write(self, records: Iterable[dict]):
+        data = "".join(json.dumps(record) + "\n" for record in records).encode()
+        with self._lock:
+            if self._fd is None:
+                self._open()
+            os.write(self._fd, data)
+            self._unsynced += data.count(b"\n")
+            if (
+                self._unsynced >= self.fsync_batch
+                or monotonic() - self._synced >= self.fsync_interval
+            ):
+                self._sync()
+
+    def _open(self):
+        while True:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            if fcntl is not None:
+                # Held while the journal is open so that it is not compacted.
+                fcntl.flock(fd, fcntl.LOCK_SH)
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                stat = None
+            opened = os.fstat(fd)
+            if stat is not None and (stat.st_dev, stat.st_ino) == (
+                opened.st_dev,
+                opened.st_ino,
+            ):
+                self._fd = fd
+                return
+            # The journal was compacted into a new file while waiting for the lock.
+            os.close(fd)
+
+    def _sync(self):
+        if self._fd is not None and self._unsynced:
+            os.fsync(self._fd)
+        self._unsynced = 0
+        self._synced = monotonic()
+
+    def sync(self):
+        """Sync any unsynced records to disk."""
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        """Sync and close the journal."""
+        with self._lock:
+            self._sync()
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def add(
+        self, alerter: str, handlers: Iterable, message: str, level: int
+    ) -> List[str]:
+        """
+        Record an alert for delivery by each of the handlers.
+
+        Arguments:
+            alerter (str): the name of the alerter raising the alert.
+            handlers (Iterable[BaseHandler]): the handlers to deliver the alert.
+            message (str): the message of the alert.
+            level (int): the level of the alert.
+
+        Returns:
+            (List[str]): the identifier of the entry for each handler.
+        """
+        handlers = list(handlers)
+        now = time()
+        records = [
+            {
+                "op": "add",
+                "id": uuid.uuid4().hex,
+                "alerter": alerter,
+                "handler": handler_key(handler),
+                "message": message,
+                "level": level,
+                "time": now,
+            }
+            for handler in handlers
+        ]
+        with self._lock:
+            for record, handler in zip(records, handlers):
+                self._entries[record["id"]] = Entry(
+                    record["id"], alerter, record["handler"], message, level, 0, now
+                )
+                self._handlers[record["id"]] = handler
+        self._write(records)
+        return [record["id"] for record in records]
+
+    def resolve(self, entries: Dict[str, int], results: Iterable) -> bool:
+        """
+        Record the outcome of delivering entries: delivered (or deliberately dropped)
+        entries are done and the rest are scheduled to be retried.
+
+        Arguments:
+            entries (Dict[str, int]): the identifiers of the entries mapped to the
+                number of previous failed attempts.
+            results (Iterable[DeliveryResult]): the outcome of each delivery, in the
+                same order as the entries.
+
+        Returns:
+            (bool): whether any entry is to be retried.
+        """
+        records = []
+        now = time()
+        for (entry_id, attempts), result in zip(entries.items(), results):
+            if result.status in (Status.DELIVERED, Status.DROPPED):
+                records.append({"op": "done", "id": entry_id})
+            else:
+                delay = min(self.retry_max, self.retry_base * 2 ** attempts)
+                records.append(
+                    {
+                        "op": "retry",
+                        "id": entry_id,
+                        "attempts": attempts + 1,
+                        "next": now + delay,
+                    }
+                )
+        if records:
+            with self._lock:
+                for record in records:
+                    if record["op"] == "done":
+                        self._entries.pop(record["id"], None)
+                        self._handlers.pop(record["id"], None)
+                    elif record["id"] in self._entries:
+                        entry = self._entries[record["id"]]
+                        self._entries[record["id"]] = entry._replace(
+                            attempts=record["attempts"], next_attempt=record["next"]
+                        )
+            self._write(records)
+        return any(record["op"] == "retry" for record in records)
+
+    def pending(self) -> List[Entry]:
+        """The entries in the journal that have not been delivered, oldest first."""
+        entries = OrderedDict()
+        try:
+            journal = open(self.path, encoding="utf-8")
+        except FileNotFoundError:
+            return []
+        with journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # A record cut short by a crash.
+                op = record.get("op")
+                if op == "add":
+                    entries[record["id"]] = Entry(
+                        record["id"],
+                        record["alerter"],
+                        record["handler"],
+                        record["message"],
+                        record["level"],
+                        0,
+                        record["time"],
+                    )
+                elif op == "done":
+                    entries.pop(record["id"], None)
+                elif op == "retry" and record["id"] in entries:
+                    entries[record["id"]] = entries[record["id"]]._replace(
+                        attempts=record["attempts"], next_attempt=record["next"]
+                    )
+        return list(entries.values())
+
+    def failed(self, alerter: Optional[str] = None) -> List[Entry]:
+        """
+        The entries that have failed to be delivered at least once, oldest first. This
+        reads the outbox's memory rather than the journal, so it does not include
+        entries recorded by other processes since the outbox was made, nor entries
+        that are still being sent.
+
+        Arguments:
+            alerter (Optional[str]): if given, only return this alerter's entries.
+        """
+        with self._lock:
+            entries = list(self._entries.values())
+        return [
+            entry
+            for entry in entries
+            if entry.attempts and (alerter is None or entry.alerter == alerter)
+        ]
+
+    def replay(
+        self,
+        handlers: Iterable,
+        alerter: Optional[str] = None,
+        force: Optional[bool] = False,
+        failed_only: Optional[bool] = False,
+    ) -> Dict[Status, int]:
+        """
+        Retry pending entries with the matching handlers: the handler an entry was
+        recorded for by this outbox, or otherwise one with the same `handler_key`.
+
+        Arguments:
+            handlers (Iterable[BaseHandler]): the handlers to deliver entries with.
+                Entries for other handlers are left pending.
+            alerter (Optional[str]): if given, only replay this alerter's entries.
+            force (Optional[bool]): retry entries even if their backoff has not
+                elapsed [default: False].
+            failed_only (Optional[bool]): only retry entries that have failed (see
+                `failed`), leaving those that are queued or being sent by this
+                process alone, rather than every entry in the journal
+                [default: False].
+
+        Returns:
+            (Dict[Status, int]): the number of entries by outcome.
+        """
+        handlers = list(handlers)
+        by_key = {handler_key(handler): handler for handler in handlers}
+        given = {id(handler) for handler in handlers}
+        now = time()
+        counts = {}
+        for entry in self.failed(alerter) if failed_only else self.pending():
+            handler = self._handlers.get(entry.id)
+            if handler is None or id(handler) not in given:
+                handler = by_key.get(entry.handler)
+            if handler is None or (alerter is not None and entry.alerter != alerter):
+                continue
+            if not force and entry.next_attempt > now:
+                continue
+            alert = Alert(entry.message, entry.level, entry.alerter)
+            result = redeliver(handler, alert)
+            self.resolve({entry.id: entry.attempts}, [result])
+            counts[result.status] = counts.get(result.status, 0) + 1
+        return counts
+
+    def next_retry(self, alerter: Optional[str] = None) -> Optional[float]:
+        """
+        The time, in seconds since the epoch, at which the next retry is due, if any.
+
+        Arguments:
+            alerter (Optional[str]): if given, only consider this alerter's entries.
+        """
+        due = [entry.next_attempt for entry in self.failed(alerter)]
+        return min(due) if due else None
+
+    def compact(self) -> bool:
+        """
+        Rewrite the journal with only the pending entries. This is skipped if another
+        outbox has the journal open.
+
+        Returns:
+            (bool): whether the journal was compacted.
+        """
+        self.close()
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    return False
+            temporary = f"{self.path}.{os.getpid()}.tmp"
+            with open(temporary, "w", encoding="utf-8") as journal:
+                for entry in self.pending():
+                    journal.write(
+                        json.dumps(
+                            {
+                                "op": "add",
+                                "id": entry.id,
+                                "alerter": entry.alerter,
+                                "handler": entry.handler,
+                                "message": entry.message,
+                                "level": entry.level,
+                                "time": entry.next_attempt,
+                            }
+                        )
+                        + "\n"
+                    )
+                    if entry.attempts:
+                        journal.write(
+                            json.dumps(
+                                {
+                                    "op": "retry",
+                                    "id": entry.id,
+                                    "attempts": entry.attempts,
+                                    "next": entry.next_attempt,
+                                }
+                            )
+                            + "\n"
+                        )
+                journal.flush()
+                os.fsync(journal.fileno())
+            os.replace(temporary, self.path)
+            return True
+        finally:
+            os.close(fd)
+
+
+@at_exit
+def _close_outboxes():
+    """Sync every outbox to disk at exit."""
+    for outbox in list(_outboxes):
+        outbox.close()
@@ -0,0 +1,132 @@
+from datetime import timedelta
+from math import ceil, inf
+from time import monotonic
+from typing import Iterable, Optional
+
+
+class ProgressTracker:
+    """
+    Tracks progress through a known number of steps and decides when it is worth an
+    alert. Callers compare the number of steps done with `next` and only call `update`
+    once it has been reached, so that steps between alerts cost one comparison and no
+    clock reads.
+    """
+
+    __slots__ = (
+        "total",
+        "next",
+        "interval",
+        "smoothing",
+        "_milestones",
+        "_start",
+        "_last_check",
+        "_last_done",
+        "_last_alert",
+        "_step",
+        "_rate",
+    )
+
+    def __init__(
+        self,
+        total: Optional[int],
+        milestones: Optional[Iterable[float]] = (0.25, 0.5, 0.75),
+        interval: Optional[float] = None,
+        smoothing: Optional[float] = 0.3,
+    ):
+        """
+        Arguments:
+            total (Optional[int]): the number of steps to be done, or None if it is not
+                known, in which case only the interval is used.
+            milestones (Optional[Iterable[float]]): the fractions of the total at which
+                to alert [default: (0.25, 0.5, 0.75)].
+            interval (Optional[float]): if given, also alert when this many seconds
+                have passed since the last alert.
+            smoothing (Optional[float]): the weight given to the latest rate in the
+                exponentially smoothed rate used for the ETA [default: 0.3].
+        """
+        self.total = total
+        self.interval = interval
+        self.smoothing = smoothing
+        self._milestones = (
+            []
+            if total is None
+            else sorted(
+                {ceil(fraction * total) for fraction in milestones if 0 < fraction < 1}
+            )
+        )
+        self._start = None
+        self._last_check = None
+        self._last_done = 0
+        self._last_alert = None
+        self._step = 1
+        self._rate = None
+        self.next = 0
+
+    @property
+    def done(self) -> int:
+        """The number of steps done when progress was last checked."""
+        return self._last_done
+
+    def update(self, done: int) -> Optional[str]:
+        """
+        Check progress once `next` has been reached.
+
+        Arguments:
+            done (int): the number of steps done.
+
+        Returns:
+            (Optional[str]): a description of the progress if it is worth an alert.
+        """
+        now = monotonic()
+        if self._start is None:
+            self._start = self._last_check = self._last_alert = now
+            self._last_done = done
+            self._schedule(done, now)
+            return None
+        elapsed = now - self._last_check
+        if elapsed > 0 and done > self._last_done:
+            rate = (done - self._last_done) / elapsed
+            self._rate = (
+                rate
+                if self._rate is None
+                else self.smoothing * rate + (1 - self.smoothing) * self._rate
+            )
+        self._last_check = now
+        self._last_done = done
+        milestone = False
+        while self._milestones and done >= self._milestones[0]:
+            self._milestones.pop(0)
+            milestone = True
+        due = self.interval is not None and now - self._last_alert >= self.interval
+        self._schedule(done, now)
+        if not (milestone or due):
+            return None
+        self._last_alert = now
+        return self._describe(done)
+
+    def _schedule(self, done: int, now: float):
+        """Choose the number of steps at which progress is next checked."""
+        if self.total is not None and done >= self.total:
+            self.next = inf
+            return
+        target = self._milestones[0] if self._milestones else inf
+        if self.interval is not None:
+            # Guess when the interval will be up from the rate, growing the gap between
+            # checks gradually so that a poor early guess cannot overshoot by much.
+            remaining = self._last_alert + self.interval - now
+            steps = 1 if self._rate is None else int(self._rate * remaining)
+            self._step = max(1, min(steps, 2 * self._step))
+            target = min(target, done + self._step)
+        self.next = target if self.total is None else min(target, self.total)
+
+    def _describe(self, done: int) -> str:
+        if self.total is None:
+            description = f"has done {done} steps"
+            if self._rate:
+                description += f" at {self._rate:.3g} steps/s"
+            return description + "."
+        description = f"is {done / self.total:.0%} done ({done}/{self.total})"
+        if self._rate:
+            eta = timedelta(seconds=round((self.total - done) / self._rate))
+            description += f" at {self._rate:.3g} steps/s, ETA {eta}"
+        return description + "."
@@ -0,0 +1,90 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+from simulert.levels import NOTSET
+
+
+class Route:
+    """
+    A rule sending the alerts within a range of levels, and optionally with one of a
+    set of tags, to some of an alerter's handlers.
+    """
+
+    __slots__ = ("handlers", "min_level", "max_level", "tags")
+
+    def __init__(
+        self,
+        handlers: Iterable,
+        min_level: Optional[int] = NOTSET,
+        max_level: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+    ):
+        """
+        Arguments:
+            handlers (Iterable[BaseHandler]): the handlers the matching alerts go to.
+            min_level (Optional[int]): the lowest level of alert to match
+                [default: NOTSET].
+            max_level (Optional[int]): the highest level of alert to match
+                [default: no limit].
+            tags (Optional[Iterable[str]]): the tags of the alerts to match
+                [default: any tag or none].
+        """
+        self.handlers = tuple(handlers)
+        self.min_level = NOTSET if min_level is None else min_level
+        self.max_level = max_level
+        self.tags = None if tags is None else frozenset(tags)
+
+    def matches(self, level: int, tag: Optional[str] = None) -> bool:
+        """Whether alerts with a level and tag take this route."""
+        if level < self.min_level:
+            return False
+        if self.max_level is not None and level > self.max_level:
+            return False
+        return self.tags is None or tag in self.tags
+
+
+class RoutingTable:
+    """
+    The handlers each alert is sent to, given the routes of an alerter: a handler that
+    is named by any route only receives the alerts matching one of its routes and the
+    other handlers receive every alert. The handlers for each level and tag are worked
+    out the first time they are needed and are then looked up in a dict, so the cost
+    of an alert does not grow with the number of routes.
+    """
+
+    def __init__(self, handlers: Iterable, routes: Iterable[Route]):
+        """
+        Arguments:
+            handlers (Iterable[BaseHandler]): the handlers of the alerter, in order.
+            routes (Iterable[Route]): the alerter's routes.
+        """
+        self.handlers = tuple(handlers)
+        self._routes: Dict[object, list] = {}
+        for route in routes:
+            for handler in route.handlers:
+                self._routes.setdefault(handler, []).append(route)
+        self._index: Dict[Tuple[int, Optional[str]], Tuple] = {}
+
+    def targets(self, level: int, tag: Optional[str] = None) -> Tuple:
+        """
+        The handlers alerts with a level and tag are sent to.
+
+        Arguments:
+            level (int): the level of the alert.
+            tag (Optional[str]): the tag of the alert.
+        """
+        key = (level, tag)
+        try:
+            return self._index[key]
+        except KeyError:
+            pass
+        if not self._routes:
+            targets = self.handlers
+        else:
+            targets = tuple(
+                handler
+                for handler in self.handlers
+                if handler not in self._routes
+                or any(route.matches(level, tag) for route in self._routes[handler])
+            )
+        self._index[key] = targets
+        return targets
@@ -0,0 +1,213 @@
+import os
+import shlex
+import signal
+import subprocess
+import threading
+from collections import namedtuple
+from datetime import timedelta
+from time import monotonic
+from typing import List, Optional
+
+from simulert.levels import COMPLETED, FAILED
+
+Usage = namedtuple("Usage", ("returncode", "wall_time", "cpu_time", "peak_rss"))
+Usage.__doc__ = """
+How a supervised process ended and the resources it used.
+
+Attributes:
+    returncode (int): the exit code of the process, or minus the signal that killed
+        it.
+    wall_time (float): the number of seconds the process ran for.
+    cpu_time (Optional[float]): the user and system CPU seconds used by the process.
+    peak_rss (Optional[int]): the peak resident set size of the process in bytes, if
+        known.
+"""
+
+# Signals that stop simulert and are passed on so that the process is not orphaned.
+_FORWARDED_SIGNALS = ("SIGTERM", "SIGHUP", "SIGUSR1", "SIGUSR2")
+
+# The longest wait between readings of a process's peak memory from /proc.
+_SAMPLE_INTERVAL = 0.1
+
+# Slack for the kernel's memory counters, which are approximate on many-core machines.
+_RSS_TOLERANCE = 1.05
+
+
+def run_process(command: List[str]) -> Usage:
+    """
+    Run a command as a child process and wait for it, taking its resource usage from
+    the kernel when it is reaped.
+
+    The kernel's peak RSS for a child includes the memory of simulert that it was
+    forked from, before the command was started. Where /proc is available, the peak
+    is also read from it while the child runs, and used when the kernel's figure is
+    no larger than simulert's own peak. That reading may miss a peak reached just
+    before the child exits.
+
+    Arguments:
+        command (List[str]): the program and its arguments.
+
+    Returns:
+        (Usage): how the process ended and the resources it used.
+    """
+    start = monotonic()
+    process = subprocess.Popen(command)
+    # Read after the child has started, so this covers the image it was forked from.
+    parent_rss = _read_peak_rss("self")
+    previous = _forward_signals(process)
+    try:
+        if hasattr(os, "wait4"):
+            sampled = [None]
+            stop = threading.Event()
+            if parent_rss is not None:
+                sampler = threading.Thread(
+                    target=_sample_peak_rss, args=(process.pid, stop, sampled)
+                )
+                sampler.start()
+                # Wait without reaping so that the pid is not reused while sampled.
+                os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+                stop.set()
+                sampler.join()
+            _, status, rusage = os.wait4(process.pid, 0)
+            process.returncode = _returncode(status)
+            cpu_time = rusage.ru_utime + rusage.ru_stime
+            # ru_maxrss is in kilobytes on Linux but bytes on macOS.
+            scale = 1 if os.uname().sysname == "Darwin" else 1024
+            peak_rss = rusage.ru_maxrss * scale
+            if parent_rss is not None and peak_rss <= parent_rss * _RSS_TOLERANCE:
+                peak_rss = sampled[0]
+        else:
+            process.wait()
+            cpu_time = peak_rss = None
+    finally:
+        for signum, handler in previous.items():
+            signal.signal(signum, handler)
+    return Usage(process.returncode, monotonic() - start, cpu_time, peak_rss)
+
+
+def _read_peak_rss(pid) -> Optional[int]:
+    """The peak resident set size of a running process in bytes, from /proc."""
+    try:
+        with open(f"/proc/{pid}/status", "rb") as status:
+            for line in status:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None  # Not Linux, or the process has exited.
+
+
+def _sample_peak_rss(pid: int, stop: threading.Event, sampled: list):
+    """Read the peak RSS of a process until stopped, more slowly as it runs on."""
+    interval = 0.001
+    while True:
+        peak_rss = _read_peak_rss(pid)
+        if peak_rss is not None:
+            sampled[0] = peak_rss
+        if stop.wait(interval):
+            return
+        interval = min(interval * 2, _SAMPLE_INTERVAL)
+
+
+def _returncode(status: int) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def _forward_signals(process: subprocess.Popen) -> dict:
+    previous = {}
+    for name in _FORWARDED_SIGNALS:
+        signum = getattr(signal, name, None)
+        if signum is None:
+            continue
+        try:
+            # Not process.send_signal, which may reap the process before wait4.
+            previous[signum] = signal.signal(
+                signum, lambda signum, frame: os.kill(process.pid, signum)
+            )
+        except ValueError:  # Signal handlers can only be set in the main thread.
+            return previous
+    # Ctrl-C reaches the whole process group, so wait for the process to report it.
+    previous[signal.SIGINT] = signal.signal(signal.SIGINT, signal.SIG_IGN)
+    return previous
+
+
+def describe(usage: Usage) -> str:
+    """
+    Describe how a process ended and the resources it used.
+
+    Arguments:
+        usage (Usage): the usage of the process.
+
+    Returns:
+        (str): for example "exit code 1, wall time 0:02:03, CPU time 0:01:59, peak
+            RSS 1.2 GiB".
+    """
+    if usage.returncode < 0:
+        try:
+            ending = f"signal {signal.Signals(-usage.returncode).name}"
+        except ValueError:
+            ending = f"signal {-usage.returncode}"
+    else:
+        ending = f"exit code {usage.returncode}"
+    parts = [ending, f"wall time {_format_duration(usage.wall_time)}"]
+    if usage.cpu_time is not None:
+        parts.append(f"CPU time {_format_duration(usage.cpu_time)}")
+    if usage.peak_rss is not None:
+        parts.append(f"peak RSS {_format_bytes(usage.peak_rss)}")
+    return ", ".join(parts)
+
+
+def _format_duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.2f}s"
+    return str(timedelta(seconds=round(seconds)))
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = "TiB"
+    return f"{size:.3g} {unit}"
+
+
+def supervise(
+    alerter, command: List[str], simulation_name: Optional[str] = None
+) -> int:
+    """
+    Run a command as a child process and alert when it completes or fails, with how it
+    ended and the resources it used. Unlike `simulation_alert`, this alerts even if the
+    process crashes, is killed or exits.
+
+    Arguments:
+        alerter (Alerter): the alerter to send the alert with.
+        command (List[str]): the program and its arguments.
+        simulation_name (Optional[str]): the name of the simulation for reference in
+            the alert [default: the command].
+
+    Returns:
+        (int): the exit code of the process, or minus the signal that killed it.
+    """
+    name = simulation_name or " ".join(shlex.quote(arg) for arg in command)
+    prefix = "" if not alerter.name else f"{alerter.name}: "
+    try:
+        usage = run_process(command)
+    except OSError as err:
+        alerter.alert(
+            f"{prefix}{name} failed to start because of {err.__repr__()}.", FAILED
+        )
+        alerter.flush()
+        return 127
+    if usage.returncode == 0:
+        message = f"{prefix}{name} has completed without error ({describe(usage)})."
+        level = COMPLETED
+    else:
+        message = f"{prefix}{name} failed to complete because of {describe(usage)}."
+        level = FAILED
+    alerter.alert(message, level)
+    alerter.flush()
+    return usage.returncode
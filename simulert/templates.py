@@ -0,0 +1,122 @@
+from functools import lru_cache
+from string import Formatter
+from typing import Callable, Dict, Optional, Tuple
+
+# Templates used by the alerter itself, which can be replaced with `add_template`.
+DEFAULT_TEMPLATES = {
+    "completed": "{prefix}{simulation} has completed without error.",
+    "failed": "{prefix}{simulation} failed to complete because of {error!r}.",
+    "finished": "{prefix}{simulation} finished {done} steps in {elapsed}.",
+    "stopped": "{prefix}{simulation} stopped after {done}/{total} steps in {elapsed}.",
+}
+
+
+class Template:
+    """
+    A `str.format` string parsed once, so that errors in it are found when it is
+    configured and so that the fields it uses are known.
+    """
+
+    __slots__ = ("source", "fields")
+
+    def __init__(self, source: str):
+        """
+        Arguments:
+            source (str): the format string, such as "{simulation} took {hours:.1f}h".
+
+        Raises:
+            (ValueError): if the format string is malformed.
+        """
+        self.source = source
+        self.fields: Tuple[str, ...] = tuple(
+            field for _, field, _, _ in Formatter().parse(source) if field
+        )
+
+    def render(self, fields: Dict[str, object]) -> str:
+        """
+        Render the template with the fields.
+
+        Arguments:
+            fields (Dict[str, object]): the values of the fields.
+        """
+        return self.source.format_map(fields)
+
+
+@lru_cache(maxsize=256)
+def compile_template(source: str) -> Template:
+    """The template for a format string, parsed on first use and cached."""
+    return Template(source)
+
+
+class Message:
+    """
+    The message of an alert given as a template and fields, which is only rendered
+    for the handlers that send it, using each handler's own template if it has one.
+    """
+
+    __slots__ = ("template", "fields", "_lookup", "_rendered")
+
+    def __init__(
+        self,
+        template: str,
+        fields: Dict[str, object],
+        lookup: Optional[Callable[[str], Optional[str]]] = None,
+    ):
+        """
+        Arguments:
+            template (str): the name of a template or a format string.
+            fields (Dict[str, object]): the values of the template's fields.
+            lookup (Optional[Callable[[str], Optional[str]]]): a function returning
+                the source of a named template, such as the alerter's, or None.
+        """
+        self.template = template
+        self.fields = fields
+        self._lookup = lookup
+        self._rendered = {}
+
+    def source(self, handler=None) -> str:
+        """The format string the handler renders the message with."""
+        source = getattr(handler, "_templates", {}).get(self.template)
+        if source is None and self._lookup is not None:
+            source = self._lookup(self.template)
+        return self.template if source is None else source
+
+    def render(self, handler=None) -> str:
+        """
+        Render the message for a handler, once for each distinct template.
+
+        Arguments:
+            handler (Optional[BaseHandler]): the handler sending the message.
+        """
+        source = self.source(handler)
+        rendered = self._rendered.get(source)
+        if rendered is None:
+            rendered = self._rendered[source] = compile_template(source).render(
+                self.fields
+            )
+        return rendered
+
+    def __str__(self):
+        return self.render()
+
+    def __repr__(self):
+        return f"Message({self.template!r}, {self.fields!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Message):
+            return NotImplemented
+        return self.template == other.template and self.fields == other.fields
+
+    def __hash__(self):
+        return hash(self.template)
+
+
+def render(message, handler=None) -> str:
+    """
+    The text of a message for a handler, rendering it if it is a `Message`.
+
+    Arguments:
+        message (Union[str, Message]): the message.
+        handler (Optional[BaseHandler]): the handler sending the message.
+    """
+    return message.render(handler) if isinstance(message, Message) else message
@@ -1,4 +1,9 @@
+import asyncio
+import socketserver
+import threading
+from collections import namedtuple
 from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 
@@ -47,3 +52,154 @@ def alerter_with_mock_handler(mock_handler):
     An alerter with the default handler replaced with a mock handler.
     """
     return Alerter("mock").remove_default_handler().add_handler(mock_handler)
+
+
+Request = namedtuple("Request", ("method", "path", "headers", "body", "client"))
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        stub = self.server.stub
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        stub.requests.append(
+            Request("POST", self.path, dict(self.headers), body, self.client_address)
+        )
+        self.send_response(stub.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(stub.response)))
+        self.end_headers()
+        self.wfile.write(stub.response)
+        # Hang up without announcing it, as a server dropping idle connections would.
+        self.close_connection = stub.drop_connections
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubHTTPServer:
+    """
+    A local HTTP/1.1 server that records the requests it receives and replies to each
+    with the same canned response.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.status = 200
+        self.response = b'{"status": 1}'
+        self.drop_connections = False
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _StubRequestHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.01,), daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def http_server():
+    """
+    A local HTTP server standing in for the web APIs used by handlers.
+    """
+    server = StubHTTPServer()
+    yield server
+    server.close()
+
+
+class _StubSMTPRequestHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        stub = self.server.stub
+        self.reply("220 stub ready")
+        envelope = {}
+        for line in self.rfile:
+            command = line.decode().rstrip("\r\n")
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250-stub")
+                self.reply("250 AUTH PLAIN LOGIN")
+            elif verb == "AUTH":
+                self.reply("235 authenticated")
+            elif verb == "MAIL":
+                envelope = {"sender": command[10:].strip("<>"), "recipients": []}
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                envelope["recipients"].append(command[8:].strip("<>"))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 go ahead")
+                lines = []
+                for data in self.rfile:
+                    if data == b".\r\n":
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                envelope["message"] = b"".join(lines).decode()
+                stub.messages.append(envelope)
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class StubSMTPServer:
+    """
+    A local SMTP server that accepts any email and records the messages it receives.
+    """
+
+    def __init__(self):
+        self.messages = []
+        self._server = socketserver.ThreadingTCPServer(
+            ("127.0.0.1", 0), _StubSMTPRequestHandler
+        )
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.01,), daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def host(self):
+        return self._server.server_address[0]
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def smtp_server():
+    """
+    A local SMTP server standing in for a mail server.
+    """
+    server = StubSMTPServer()
+    yield server
+    server.close()
+
+
+def run(coroutine):
+    """Run a coroutine to completion on a new event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
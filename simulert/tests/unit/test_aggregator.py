@@ -0,0 +1,116 @@
+import os
+import socket
+import time
+
+import pytest
+
+from simulert import levels
+from simulert.aggregator import Aggregator, parse_address
+from simulert.alerter import Alerter
+from simulert.handlers.relay import Relay
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / "aggregator.sock")
+
+
+def _process(name, address):
+    """An alerter as a worker process would make it, relaying to the aggregator."""
+    return Alerter(name).remove_default_handler().add_handler(Relay(address))
+
+
+@pytest.mark.parametrize(
+    "address, parsed",
+    [
+        ("/tmp/simulert.sock", "/tmp/simulert.sock"),
+        ("localhost:9000", ("localhost", 9000)),
+        ("simulert.sock", "simulert.sock"),
+    ],
+)
+def test_parse_address(address, parsed):
+    """Test that addresses are parsed as TCP addresses or Unix socket paths."""
+    assert parse_address(address) == parsed
+
+
+def test_only_sockets_are_replaced(tmp_path, alerter_with_mock_handler):
+    """Test that an aggregator replaces a stale socket but not any other file."""
+    path = tmp_path / "precious.txt"
+    path.write_text("keep me")
+    with pytest.raises(ValueError):
+        Aggregator(alerter_with_mock_handler, str(path))
+    assert path.read_text() == "keep me"
+    socket_path = str(tmp_path / "aggregator.sock")
+    with socket.socket(socket.AF_UNIX) as stale:
+        stale.bind(socket_path)
+    aggregator = Aggregator(alerter_with_mock_handler, socket_path)
+    os.unlink(socket_path)
+    path.rename(socket_path)
+    aggregator.close()
+    assert open(socket_path).read() == "keep me"
+
+
+def test_summarises_completions(socket_path, alerter_with_mock_handler, mock_handler):
+    """Test that completions and failures are merged once all processes report."""
+    aggregator = Aggregator(alerter_with_mock_handler, socket_path, expected=4)
+    aggregator.start()
+    for rank in range(4):
+        process = _process("sweep", socket_path)
+        try:
+            with process.simulation_alert(f"rank {rank}"):
+                if rank == 2:
+                    raise ValueError("diverged")
+        except ValueError:
+            pass
+        process.handlers[0].close()
+    time.sleep(0.1)
+    aggregator.close()
+    assert mock_handler._messages == [
+        "sweep: 3/4 processes completed, 1 failed: rank 2 failed to complete because"
+        " of ValueError('diverged')."
+    ]
+    assert not os.path.exists(socket_path)
+
+
+def test_forwards_other_alerts(alerter_with_mock_handler, mock_handler):
+    """Test that alerts other than completions are sent on straight away over TCP."""
+    aggregator = Aggregator(alerter_with_mock_handler, "127.0.0.1:0").start()
+    relay = Relay(aggregator.address)
+    relay.deliver("Half way", levels.PROGRESS, "sweep")
+    relay.deliver("Half way", levels.PROGRESS, "sweep")
+    deadline = time.monotonic() + 5
+    while len(mock_handler._messages) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    relay.close()
+    aggregator.close()
+    assert mock_handler._messages == ["Half way", "Half way"]
+
+
+def test_summary_after_window(socket_path, alerter_with_mock_handler, mock_handler):
+    """Test that a summary is sent after a quiet window, noting missing processes."""
+    aggregator = Aggregator(
+        alerter_with_mock_handler, socket_path, expected=3, window=0.05
+    ).start()
+    relay = Relay(socket_path)
+    relay.deliver("done", levels.COMPLETED, "")
+    relay.deliver("done", levels.COMPLETED, "")
+    deadline = time.monotonic() + 5
+    while not mock_handler._messages and time.monotonic() < deadline:
+        time.sleep(0.01)
+    relay.close()
+    aggregator.close()
+    assert mock_handler._messages == ["2/3 processes completed; 1 did not report."]
+
+
+def test_relay_reconnects(socket_path, alerter_with_mock_handler, mock_handler):
+    """Test that a relay reconnects to an aggregator that has restarted."""
+    relay = Relay(socket_path)
+    Aggregator(alerter_with_mock_handler, socket_path).start().close()
+    with pytest.raises(OSError):
+        relay.deliver("lost", levels.INFO)
+    aggregator = Aggregator(alerter_with_mock_handler, socket_path).start()
+    relay.deliver("found", levels.INFO)
+    relay.close()
+    time.sleep(0.05)
+    aggregator.close()
+    assert mock_handler._messages == ["found"]
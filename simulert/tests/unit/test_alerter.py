@@ -1,7 +1,14 @@
+import asyncio
+import time
+
 import pytest
 
+from simulert import levels
 from simulert.alerter import Alerter, getAlerter
+from simulert.delivery import Status
+from simulert.handlers.base_handler import BaseHandler
 from simulert.handlers.logs import Logger
+from simulert.tests.unit.conftest import run
 
 MESSAGE = "ALERT! ALERT! ALERT!"
 
@@ -81,3 +88,261 @@ def test_run_simulation_context_with_error(alerter_with_mock_handler, mock_handl
             "mock: simulation failed to complete because of RuntimeError()."
         )
         assert reraise
+
+
+@pytest.mark.parametrize(
+    "error, message",
+    [
+        (
+            KeyboardInterrupt(),
+            "mock: simulation failed to complete because of KeyboardInterrupt().",
+        ),
+        (
+            SystemExit(3),
+            "mock: simulation failed to complete because of SystemExit(3).",
+        ),
+        (SystemExit(0), "mock: simulation has completed without error."),
+    ],
+)
+def test_run_simulation_context_with_exit(
+    alerter_with_mock_handler, mock_handler, error, message
+):
+    """
+    Test that the simulation context also alerts on interrupts and exits, which are
+    not `Exception`s.
+    """
+    with pytest.raises(type(error)):
+        with alerter_with_mock_handler.simulation_alert():
+            raise error
+    assert mock_handler.last_called_with(message)
+
+
+def test_queued_alert(alerter_with_mock_handler, mock_handler):
+    """
+    Test that a queued alerter delivers alerts after a flush.
+    """
+    alerter_with_mock_handler.enable_queue(maxsize=10)
+    alerter_with_mock_handler.alert(MESSAGE)
+    assert alerter_with_mock_handler.flush(5)
+    assert mock_handler.last_called_with(MESSAGE)
+    alerter_with_mock_handler.disable_queue()
+
+
+def test_queued_simulation_context_flushes(alerter_with_mock_handler, mock_handler):
+    """
+    Test that the simulation context flushes queued alerts on exit.
+    """
+    alerter_with_mock_handler.enable_queue()
+    with alerter_with_mock_handler.simulation_alert():
+        pass
+    assert mock_handler.last_called_with(
+        "mock: simulation has completed without error."
+    )
+    alerter_with_mock_handler.disable_queue()
+
+
+class SlowHandler(BaseHandler):
+    """A handler that takes a while to send each alert, optionally failing."""
+
+    def __init__(self, delay, error=None):
+        self.delay = delay
+        self.error = error
+
+    def alert(self, message):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+
+
+def test_delivery_results(alerter_with_mock_handler, mock_handler):
+    """
+    Test that alerts report the outcome for each handler.
+    """
+    failing = SlowHandler(0, RuntimeError("down"))
+    alerter_with_mock_handler.add_handler(failing)
+    results = alerter_with_mock_handler.alert(MESSAGE)
+    assert [result.handler for result in results] == [mock_handler, failing]
+    assert results[0].status is Status.DELIVERED
+    assert results[1].status is Status.FAILED
+    assert isinstance(results[1].error, RuntimeError)
+
+
+def test_concurrent_alert(alerter_with_mock_handler, mock_handler):
+    """
+    Test that concurrent delivery waits for the slowest handler rather than the sum
+    of the handlers, and reports handlers that exceed the timeout.
+    """
+    alerter = alerter_with_mock_handler.enable_concurrency(handler_timeout=0.5)
+    alerter.add_handler(SlowHandler(0.2)).add_handler(SlowHandler(0.2))
+    alerter.add_handler(SlowHandler(2))
+    start = time.monotonic()
+    results = alerter.alert(MESSAGE)
+    assert time.monotonic() - start < 1
+    assert mock_handler.last_called_with(MESSAGE)
+    assert [result.status for result in results] == [Status.DELIVERED] * 3 + [
+        Status.TIMED_OUT
+    ]
+
+
+class LevelHandler(BaseHandler):
+    """A handler that records the level and alerter of each alert it delivers."""
+
+    def __init__(self):
+        self.delivered = []
+
+    def alert(self, message):
+        pass
+
+    def deliver(self, message, level=levels.INFO, alerter=""):
+        self.delivered.append((level, alerter))
+
+
+def test_simulation_context_levels():
+    """
+    Test that the simulation context alerts completions and failures at their levels.
+    """
+    handler = LevelHandler()
+    alerter = Alerter("levels").remove_default_handler().add_handler(handler)
+    with alerter.simulation_alert():
+        pass
+    with pytest.raises(RuntimeError):
+        with alerter.simulation_alert():
+            raise RuntimeError()
+    assert handler.delivered == [
+        (levels.COMPLETED, "levels"),
+        (levels.FAILED, "levels"),
+    ]
+
+
+def test_aalert(alerter_with_mock_handler, mock_handler):
+    """
+    Test that async alerts reach every handler and report their outcomes.
+    """
+    alerter_with_mock_handler.add_handler(SlowHandler(0, RuntimeError("down")))
+    results = run(alerter_with_mock_handler.aalert(MESSAGE))
+    assert mock_handler.last_called_with(MESSAGE)
+    assert [result.status for result in results] == [Status.DELIVERED, Status.FAILED]
+
+
+def test_async_simulation_context(alerter_with_mock_handler, mock_handler):
+    """
+    Test that the simulation context alerts on completion and failure when used with
+    `async with`.
+    """
+
+    async def simulate(error):
+        async with alerter_with_mock_handler.simulation_alert("async"):
+            await asyncio.sleep(0)
+            if error:
+                raise error
+
+    run(simulate(None))
+    assert mock_handler.last_called_with("mock: async has completed without error.")
+    with pytest.raises(RuntimeError):
+        run(simulate(RuntimeError()))
+    assert mock_handler.last_called_with(
+        "mock: async failed to complete because of RuntimeError()."
+    )
+
+
+def test_stall_watchdog(alerter_with_mock_handler, mock_handler):
+    """
+    Test that the simulation context alerts when heartbeats stop and again when they
+    resume.
+    """
+    with alerter_with_mock_handler.simulation_alert(stall_timeout=0.2) as simulation:
+        for _ in range(10):
+            simulation.heartbeat()
+            time.sleep(0.01)
+        assert mock_handler._messages == []
+        time.sleep(0.4)
+        assert mock_handler._messages == [
+            "mock: simulation has made no progress for 0:00:00."
+        ]
+        simulation.heartbeat()
+        time.sleep(0.1)
+    assert mock_handler._messages == [
+        "mock: simulation has made no progress for 0:00:00.",
+        "mock: simulation has resumed after making no progress for 0:00:00.",
+        "mock: simulation has completed without error.",
+    ]
+
+
+def test_async_exit_does_not_wait_on_the_watchdog():
+    """
+    Test that leaving an async simulation context does not block the event loop while
+    the watchdog is sending a stall alert.
+    """
+    alerter = Alerter("slow").remove_default_handler().add_handler(SlowHandler(0.5))
+
+    async def simulate():
+        async with alerter.simulation_alert(stall_timeout=0.05):
+            await asyncio.sleep(0.1)
+
+    async def longest_pause():
+        task = asyncio.ensure_future(simulate())
+        pauses = []
+        while not task.done():
+            start = time.monotonic()
+            await asyncio.sleep(0.01)
+            pauses.append(time.monotonic() - start)
+        await task
+        return max(pauses)
+
+    assert run(longest_pause()) < 0.3
+
+
+def test_no_watchdog_by_default(alerter_with_mock_handler, mock_handler):
+    """Test that heartbeats are optional without a stall timeout."""
+    with alerter_with_mock_handler.simulation_alert() as simulation:
+        simulation.heartbeat()
+        assert simulation._watchdog is None
+    assert mock_handler._messages == ["mock: simulation has completed without error."]
+
+
+def test_get_alerter_does_not_construct_existing(monkeypatch):
+    """Test that getting an existing alerter does not make a new one."""
+    getAlerter("existing")
+    monkeypatch.setattr(Alerter, "__init__", None)
+    assert getAlerter("existing").name == "existing"
+
+
+def test_get_alerter_concurrently():
+    """Test that alerters made by many threads at once are the same alerter."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(8) as executor:
+        alerters = list(executor.map(getAlerter, ["concurrent.child"] * 64))
+    assert all(alerter is alerters[0] for alerter in alerters)
+
+
+def test_hierarchy(mock_handler):
+    """
+    Test that dotted alerters send their alerts to their ancestors' handlers and have
+    no default handler.
+    """
+    parent = getAlerter("sweep").remove_default_handler()
+    child = getAlerter("sweep.run42.phase1")
+    assert child.parent is getAlerter("sweep.run42")
+    assert child.parent.parent is parent
+    assert child.handlers == []
+    with mock_handler.bind(parent):
+        child.alert(MESSAGE)
+        assert mock_handler.last_called_with(MESSAGE)
+        child.parent.propagate = False
+        child.alert("not propagated")
+        child.parent.propagate = True
+    assert not mock_handler.called_with("not propagated")
+    child.alert("after removal")
+    assert not mock_handler.called_with("after removal")
+
+
+def test_effective_handlers_are_cached(mock_handler):
+    """Test that the handlers of an alerter and its ancestors are cached."""
+    parent = Alerter("parent")
+    child = Alerter("parent.child", parent)
+    handlers = child.effective_handlers()
+    assert handlers == tuple(parent.handlers)
+    assert child.effective_handlers() is handlers
+    child.add_handler(mock_handler)
+    assert child.effective_handlers() == (mock_handler,) + handlers
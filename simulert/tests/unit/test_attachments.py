@@ -0,0 +1,123 @@
+import email
+import gzip
+from unittest.mock import patch
+
+import pytest
+
+from simulert.alerter import Alerter
+from simulert.attachments import Attachment, attachment, fit
+from simulert.handlers import Emailer, Slacker
+from simulert.levels import COMPLETED
+from simulert.tests.unit.test_events import EventHandler
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "run.log"
+    path.write_bytes(b"".join(b"line %d\n" % number for number in range(10000)))
+    return path
+
+
+def test_chunks_read_the_whole_file(log):
+    """Test that a file read in chunks is read exactly."""
+    chunks = list(Attachment(log).chunks(chunk_size=1000))
+    assert len(chunks) > 1
+    assert b"".join(chunks) == log.read_bytes()
+
+
+def test_tail_starts_at_a_line(log):
+    """Test that only the end of a file is attached, from the start of a line."""
+    tail = Attachment(log, tail=20).read()
+    assert tail == b"line 9998\nline 9999\n"
+    assert Attachment(log, tail=20).size == 20
+
+
+def test_compressed_attachments_are_gzipped(log):
+    """Test that compressed attachments are gzip files named as such."""
+    item = Attachment(log, compress=True)
+    content = item.read()
+    assert gzip.decompress(content) == log.read_bytes()
+    assert len(content) < log.stat().st_size
+    assert (item.name, item.mimetype) == ("run.log.gz", "application/gzip")
+
+
+def test_empty_files(tmp_path):
+    """Test that empty files can be attached."""
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    assert Attachment(path).read() == b""
+
+
+def test_fit_leaves_out_attachments_over_the_limit(log, tmp_path):
+    """Test that attachments are kept in order while they fit within the limit."""
+    small = tmp_path / "plot.png"
+    small.write_bytes(b"png")
+    missing = Attachment(tmp_path / "missing.txt")
+    kept, notes = fit([Attachment(log), attachment(small), missing], limit=100)
+    assert [item.name for item in kept] == ["plot.png"]
+    assert [note.split(" ")[0] for note in notes] == ["run.log", "missing.txt"]
+    assert fit([Attachment(log)], limit=None)[0][0].path == str(log)
+
+
+def test_completion_alerts_carry_attachments(log):
+    """Test that `simulation_alert` attaches files to the alert at the end."""
+    handler = EventHandler()
+    alerter = Alerter().remove_default_handler().add_handler(handler)
+    with alerter.simulation_alert("sim", attachments=[log]):
+        pass
+    (alert,) = handler.alerts
+    assert alert.level == COMPLETED
+    assert [item.path for item in alert.attachments] == [str(log)]
+
+
+def test_email_attachments_are_streamed(smtp_server, log, tmp_path):
+    """Test that an email with attachments arrives with the files intact."""
+    plot = tmp_path / "plot.png"
+    plot.write_bytes(bytes(range(256)) * 3)
+    emailer = Emailer(
+        authentication="user,key",
+        sender=("see", "sail@example.com"),
+        recipient=("soo", "rail@example.com"),
+        host=smtp_server.host,
+        port=smtp_server.port,
+        max_attachment_size=100000,
+    )
+    alerter = Alerter().remove_default_handler().add_handler(emailer)
+    alerter.alert(
+        "done\n.hidden",
+        attachments=[plot, Attachment(log, tail=50000, compress=True), log],
+    )
+    emailer.close()
+    (received,) = smtp_server.messages
+    assert received["recipients"] == ["rail@example.com"]
+    parts = email.message_from_string(received["message"]).get_payload()
+    body, image, archive = parts
+    assert body.get_payload().splitlines()[:2] == ["done", ".hidden"]
+    assert "run.log was not attached" in body.get_payload()
+    assert image.get_filename() == "plot.png"
+    assert image.get_payload(decode=True) == plot.read_bytes()
+    assert archive.get_filename() == "run.log.gz"
+    tail = gzip.decompress(archive.get_payload(decode=True))
+    assert log.read_bytes().endswith(tail) and len(tail) <= 50000
+
+
+def test_slack_uploads_attachments(log):
+    """Test that slack uploads attachments with the message as their comment."""
+    with patch(
+        "simulert.handlers.slack.WebClient.users_list", set=True
+    ) as users_list, patch(
+        "simulert.handlers.slack.WebClient.conversations_open", set=True
+    ) as conversations_open, patch(
+        "simulert.handlers.slack.WebClient.files_upload", set=True
+    ) as files_upload:
+        users_list.return_value = {"members": [{"id": "U1", "name": "fee"}]}
+        conversations_open.return_value = {"channel": {"id": "D1"}}
+        slacker = Slacker("grok", "fee")
+        alerter = Alerter().remove_default_handler().add_handler(slacker)
+        alerter.alert("done", COMPLETED, attachments=[Attachment(log, tail=20)])
+    files_upload.assert_called_once()
+    kwargs = files_upload.call_args[1]
+    assert kwargs["channels"] == "D1"
+    assert kwargs["filename"] == "run.log"
+    assert kwargs["initial_comment"] == "done"
+    assert kwargs["file"].read() == b"line 9998\nline 9999\n"
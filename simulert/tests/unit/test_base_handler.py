@@ -0,0 +1,94 @@
+import threading
+import time
+
+from simulert.alerter import Alerter
+from simulert.delivery import Status
+from simulert.handlers.base_handler import _send_repeat_summaries
+from simulert.levels import WARNING
+
+
+def test_admit_without_limits(mock_handler):
+    """Test that a handler without limits admits every alert unchanged."""
+    assert [mock_handler.admit("a") for _ in range(3)] == [("a",)] * 3
+
+
+def test_rate_limit(mock_handler, monkeypatch):
+    """Test that the token bucket drops alerts beyond the burst until it refills."""
+    now = [100.0]
+    monkeypatch.setattr("simulert.handlers.base_handler.monotonic", lambda: now[0])
+    mock_handler.limit_rate(rate=2, burst=2)
+    assert [bool(mock_handler.admit(str(i))) for i in range(4)] == [
+        True,
+        True,
+        False,
+        False,
+    ]
+    assert mock_handler.rate_limited == 2
+    now[0] += 0.5
+    assert mock_handler.admit("a") == ("a",)
+    assert mock_handler.admit("b") == ()
+
+
+def test_duplicate_suppression(mock_handler, monkeypatch):
+    """
+    Test that repeats within the window are dropped and reported with the next alert.
+    """
+    now = [100.0]
+    monkeypatch.setattr("simulert.handlers.base_handler.monotonic", lambda: now[0])
+    mock_handler.suppress_duplicates(10)
+    assert mock_handler.admit("a") == ("a",)
+    assert mock_handler.admit("a") == ()
+    assert mock_handler.admit("a") == ()
+    assert mock_handler.admit("b") == ("a (repeated 2 times)", "b")
+    assert mock_handler.admit("b") == ()
+    now[0] += 11
+    assert mock_handler.admit("b") == ("b (repeated 1 time)",)
+    assert mock_handler.admit("c") == ("c",)
+    assert mock_handler.duplicates == 3
+
+
+def test_alerter_reports_dropped(mock_handler):
+    """Test that alerts dropped by a handler are reported by the alerter."""
+    alerter = Alerter().remove_default_handler().add_handler(mock_handler)
+    mock_handler.suppress_duplicates(60)
+    assert alerter.alert("a")[0].status is Status.DELIVERED
+    assert alerter.alert("a")[0].status is Status.DROPPED
+    alerter.enable_concurrency()
+    assert alerter.alert("a")[0].status is Status.DROPPED
+    assert alerter.alert("b")[0].status is Status.DELIVERED
+    assert mock_handler._messages == ["a", "a (repeated 2 times)", "b"]
+
+
+def test_repeats_reported_when_window_ends(mock_handler):
+    """Test that repeats are reported when the window ends if no alert follows them."""
+    alerter = Alerter().remove_default_handler().add_handler(mock_handler)
+    mock_handler.suppress_duplicates(0.05)
+    for _ in range(3):
+        alerter.alert("a", WARNING)
+    deadline = time.monotonic() + 5
+    while len(mock_handler._messages) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert mock_handler._messages == ["a", "a (repeated 2 times)"]
+    alerter.alert("a", WARNING)
+    assert mock_handler._messages == ["a", "a (repeated 2 times)", "a"]
+
+
+def test_repeats_reported_at_exit(mock_handler):
+    """Test that repeats still being suppressed at exit are reported."""
+    mock_handler.suppress_duplicates(60)
+    assert mock_handler.admit("a") == ("a",)
+    assert mock_handler.admit("a") == ()
+    _send_repeat_summaries()
+    assert mock_handler._messages == ["a (repeated 1 time)"]
+
+
+def test_dropping_repeats_is_lock_free(mock_handler):
+    """Test that dropping a repeat takes no lock and starts no thread."""
+    mock_handler.suppress_duplicates(60)
+    assert mock_handler.admit("a") == ("a",)
+    threads = threading.active_count()
+    lock, mock_handler._duplicate_lock = mock_handler._duplicate_lock, None
+    assert [mock_handler.admit("a") for _ in range(100)] == [()] * 100
+    assert threading.active_count() == threads
+    mock_handler._duplicate_lock = lock
+    assert mock_handler.duplicates == 100
@@ -0,0 +1,94 @@
+import logging
+import threading
+
+import pytest
+
+from simulert import levels
+from simulert.bridge import AlertBridge
+from simulert.logger import logger as simulert_logger
+
+
+def _record(name, msg, *args, levelno=logging.INFO):
+    return logging.makeLogRecord(
+        {
+            "name": name,
+            "msg": msg,
+            "args": args,
+            "levelno": levelno,
+            "levelname": logging.getLevelName(levelno),
+        }
+    )
+
+
+@pytest.fixture
+def bridged_logger(alerter_with_mock_handler):
+    """A logger with records at WARNING and above bridged to the mock handler."""
+    user_logger = logging.getLogger("simulation")
+    user_logger.setLevel(logging.DEBUG)
+    bridge = AlertBridge(alerter_with_mock_handler)
+    user_logger.addHandler(bridge)
+    yield user_logger, bridge
+    user_logger.removeHandler(bridge)
+    bridge.close()
+
+
+def test_forwards_records_above_level(bridged_logger, mock_handler):
+    """Test that only records at or above the level become alerts."""
+    user_logger, bridge = bridged_logger
+    user_logger.info("Step %d done", 1)
+    user_logger.warning("Step %d diverged", 2)
+    bridge.flush()
+    assert mock_handler._messages == ["simulation WARNING: Step 2 diverged"]
+
+
+def test_keeps_record_level(alerter_with_mock_handler):
+    """Test that alerts are raised at the level of the record."""
+    raised = []
+    alerter_with_mock_handler.alert = lambda msg, level: raised.append(level)
+    bridge = AlertBridge(alerter_with_mock_handler)
+    bridge.handle(_record("simulation", "oops", levelno=logging.ERROR))
+    bridge.close()
+    assert raised == [levels.ERROR]
+
+
+def test_does_not_format_skipped_records(alerter_with_mock_handler, mock_handler):
+    """Test that records that are not forwarded are never formatted."""
+
+    class Unformattable:
+        def __str__(self):
+            raise AssertionError("formatted")
+
+    bridge = AlertBridge(alerter_with_mock_handler, loggers=["solver"], pattern="^NaN")
+    records = [
+        _record("solver.linear", "%s", Unformattable()),
+        _record("other", "NaN %s", 1),
+        _record("solver", "NaN in %s", "u"),
+        _record("solvers", "NaN"),
+    ]
+    assert [bridge.handle(record) for record in records] == [False, False, True, False]
+    bridge.close()
+    assert mock_handler._messages == ["solver INFO: NaN in u"]
+
+
+def test_ignores_own_records(alerter_with_mock_handler, mock_handler):
+    """Test that records from simulert's own loggers are not forwarded."""
+    bridge = AlertBridge(alerter_with_mock_handler)
+    simulert_logger.addHandler(bridge)
+    try:
+        simulert_logger.getChild("delivery").error("Delivery failed")
+    finally:
+        simulert_logger.removeHandler(bridge)
+        bridge.close()
+    assert mock_handler._messages == []
+
+
+def test_does_not_block(alerter_with_mock_handler):
+    """Test that records are dropped rather than waiting for a full queue."""
+    released = threading.Event()
+    alerter_with_mock_handler.alert = lambda msg, level: released.wait(5)
+    bridge = AlertBridge(alerter_with_mock_handler, maxsize=1)
+    for _ in range(5):
+        bridge.handle(_record("simulation", "oops", levelno=logging.ERROR))
+    released.set()
+    bridge.close()
+    assert bridge.dropped >= 3
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from simulert.dispatch import QueueDispatcher, call_later
+
+
+class Gate:
+    """A dispatch target that records items but waits for the gate to open first."""
+
+    def __init__(self):
+        self.items = []
+        self.open = threading.Event()
+
+    def __call__(self, item):
+        self.open.wait(5)
+        self.items.append(item)
+
+
+def test_put_and_flush():
+    """Test that queued items reach the target in order once flushed."""
+    target = Gate()
+    target.open.set()
+    dispatcher = QueueDispatcher(target)
+    for i in range(10):
+        assert dispatcher.put(i)
+    assert dispatcher.flush(5)
+    assert target.items == list(range(10))
+    dispatcher.close()
+
+
+def test_put_does_not_wait_for_target():
+    """Test that `put` returns while the target is still blocked."""
+    target = Gate()
+    dispatcher = QueueDispatcher(target)
+    dispatcher.put("a")
+    assert not dispatcher.flush(0.05)
+    target.open.set()
+    assert dispatcher.flush(5)
+    assert target.items == ["a"]
+    dispatcher.close()
+
+
+@pytest.mark.parametrize(
+    "overflow, expected", [("drop_newest", [0, 1, 2]), ("drop_oldest", [0, 3, 4])]
+)
+def test_overflow_policies(overflow, expected):
+    """
+    Test that the drop policies discard the expected items. The first item is taken by
+    the blocked worker so the queue holds the next two.
+    """
+    target = Gate()
+    dispatcher = QueueDispatcher(target, maxsize=2, overflow=overflow)
+    dispatcher.put(0)
+    while len(dispatcher):
+        pass
+    for i in range(1, 5):
+        dispatcher.put(i)
+    assert dispatcher.dropped == 2
+    target.open.set()
+    dispatcher.close(5)
+    assert target.items == expected
+
+
+def test_close_drains_queue():
+    """Test that closing the dispatcher sends everything that was queued."""
+    target = Gate()
+    dispatcher = QueueDispatcher(target)
+    for i in range(3):
+        dispatcher.put(i)
+    target.open.set()
+    assert dispatcher.close(5)
+    assert target.items == [0, 1, 2]
+    with pytest.raises(RuntimeError):
+        dispatcher.put(3)
+
+
+def test_invalid_overflow():
+    """Test that an unknown overflow policy is rejected."""
+    with pytest.raises(ValueError):
+        QueueDispatcher(print, overflow="explode")
+
+
+def test_call_later():
+    """Test that scheduled calls run in order of time unless cancelled."""
+    calls = []
+    done = threading.Event()
+    call_later(0.05, done.set)
+    call_later(0.02, lambda: calls.append("second"))
+    call_later(0.01, lambda: calls.append("first"))
+    call_later(0.01, lambda: calls.append("cancelled")).cancel()
+    assert done.wait(5)
+    assert calls == ["first", "second"]
@@ -0,0 +1,135 @@
+import logging
+
+from simulert.alerter import Alerter
+from simulert.delivery import Status
+from simulert.events import Alert
+from simulert.handlers.base_handler import BaseHandler
+from simulert.handlers.logs import Logger
+from simulert.levels import COMPLETED, FAILED, INFO, PROGRESS, WARNING
+
+
+class EventHandler(BaseHandler):
+    """A handler that keeps the alert events it is passed."""
+
+    def __init__(self):
+        self.alerts = []
+
+    def alert(self, message):
+        raise AssertionError("handle should be called instead")
+
+    def handle(self, alert):
+        self.alerts.append(alert)
+
+
+class Counted:
+    """A field that counts how many times it is formatted."""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __format__(self, spec):
+        self.formatted += 1
+        return "counted"
+
+
+def test_handlers_reject_alerts_below_their_level(mock_handler):
+    """Test that alerts below a handler's level are neither formatted nor sent."""
+    alerter = Alerter("e").remove_default_handler()
+    alerter.add_handler(mock_handler.set_level(WARNING))
+    field = Counted()
+    assert alerter.alert("{field}", INFO, field=field) == []
+    assert field.formatted == 0
+    results = alerter.alert("{field}", WARNING, field=field)
+    assert [result.handler for result in results] == [mock_handler]
+    assert mock_handler.last_called_with("counted")
+
+
+def test_logging_level_is_not_a_threshold(caplog):
+    """Test that the level a `Logger` logs at does not filter the alerts it gets."""
+    alerter = Alerter("levels")
+    with caplog.at_level(logging.DEBUG, logger="simulerts"):
+        (result,) = alerter.alert("step", PROGRESS)
+    assert result.status == Status.DELIVERED
+    assert "step" in caplog.messages
+    user_logger = logging.getLogger("simulert.tests.levels")
+    alerter = Alerter("levels").remove_default_handler()
+    alerter.add_handler(Logger(user_logger, logging.ERROR))
+    with caplog.at_level(logging.DEBUG, logger=user_logger.name):
+        alerter.alert("done", COMPLETED)
+    assert caplog.records[-1].levelno == logging.ERROR
+    assert caplog.records[-1].getMessage() == "done"
+
+
+def test_handlers_are_passed_alert_events():
+    """Test that handlers overriding `handle` receive the structured alert."""
+    handler = EventHandler()
+    alerter = Alerter("e").remove_default_handler().add_handler(handler)
+    error = ValueError("diverged")
+    try:
+        with alerter.simulation_alert("sim"):
+            raise error
+    except ValueError:
+        pass
+    (alert,) = handler.alerts
+    assert alert.level == FAILED
+    assert alert.simulation == "sim"
+    assert alert.exc_info is error
+    assert alert.alerter == "e"
+    assert alert.render() == (
+        "e: sim failed to complete because of ValueError('diverged')."
+    )
+
+
+def test_completed_and_progress_alerts_carry_the_simulation():
+    """Test that simulation outcomes and progress can be told apart by level."""
+    handler = EventHandler()
+    alerter = Alerter().remove_default_handler().add_handler(handler)
+    alerter.progress(0, 4, "sim")
+    alerter.progress(1, 4, "sim")
+    with alerter.simulation_alert("sim"):
+        pass
+    assert [(alert.level, alert.simulation) for alert in handler.alerts] == [
+        (PROGRESS, "sim"),
+        (COMPLETED, "sim"),
+    ]
+    assert handler.alerts[-1].exc_info is None
+
+
+def test_plain_messages_make_alerts():
+    """Test that string messages are passed on as alerts with timestamps."""
+    handler = EventHandler()
+    alerter = Alerter("e").remove_default_handler().add_handler(handler)
+    alerter.alert("plain", WARNING)
+    (alert,) = handler.alerts
+    assert alert.message == "plain"
+    assert alert.level_name == "WARNING"
+    assert alert.created > 0 and alert.monotonic > 0
+    assert alert.simulation is None and alert.fields == {}
+
+
+def test_repeats_summary_is_an_alert():
+    """Test that a summary of suppressed repeats is passed as a copy of the alert."""
+    handler = EventHandler().suppress_duplicates(60)
+    alerter = Alerter().remove_default_handler().add_handler(handler)
+    for message in ("a", "a", "b"):
+        alerter.alert(message, WARNING)
+    assert [alert.render() for alert in handler.alerts] == [
+        "a",
+        "a (repeated 1 time)",
+        "b",
+    ]
+    assert all(alert.level == WARNING for alert in handler.alerts)
+
+
+def test_with_message_copies_the_alert():
+    """Test that copying an alert keeps everything but the message."""
+    alert = Alert("a", WARNING, "e", "sim", fields={"x": 1})
+    copy = alert.with_message("b")
+    assert (copy.message, alert.message) == ("b", "a")
+    assert (copy.level, copy.alerter, copy.simulation, copy.fields) == (
+        WARNING,
+        "e",
+        "sim",
+        {"x": 1},
+    )
+    assert copy.created == alert.created
@@ -1,7 +1,13 @@
+import threading
+import time
+
 import pytest
+from smtplib import SMTPServerDisconnected
 from unittest.mock import patch
 
 from simulert.handlers import Emailer
+from simulert.levels import FAILED
+from simulert.tests.unit.conftest import run
 
 
 @pytest.fixture(autouse=True, params=[True, False])
@@ -131,3 +137,198 @@ def test_send_test_message(mock_send):
     assert mock_send.call_args[0][0] == ("see", "sail")
     assert mock_send.call_args[0][1] == ("soo", "rail")
     assert "Subject: Test email" in mock_send.call_args[0][2]
+
+
+def _emailer(**kwargs):
+    return Emailer(
+        authentication="user,key",
+        sender=("see", "sail"),
+        recipient=("soo", "rail"),
+        host="tiberius",
+        port=1025,
+        **kwargs,
+    )
+
+
+def test_timeout_is_forwarded():
+    """Test that the timeout is used for connections to the mail server."""
+    with patch("simulert.handlers.email.SMTP_SSL", set=True) as mock_server:
+        _emailer(timeout=3).send_email("subject", "body")
+        mock_server.assert_called_with("tiberius", 1025, timeout=3)
+
+
+def test_session_is_reused():
+    """
+    Test that consecutive emails share one SMTP session while it answers NOOP.
+    """
+    with patch("simulert.handlers.email.SMTP_SSL", set=True) as mock_server:
+        mock_server().noop.return_value = (250, b"OK")
+        mock_server.reset_mock()
+        emailer = _emailer()
+        emailer.send_email("subject", "one")
+        emailer.send_email("subject", "two")
+        mock_server.assert_called_once()
+        assert mock_server().sendmail.call_count == 2
+        mock_server().quit.assert_not_called()
+        emailer.close()
+        mock_server().quit.assert_called_once()
+
+
+def test_dead_session_is_replaced():
+    """
+    Test that a session that fails NOOP is replaced by a new connection.
+    """
+    with patch("simulert.handlers.email.SMTP_SSL", set=True) as mock_server:
+        mock_server().noop.side_effect = SMTPServerDisconnected()
+        mock_server.reset_mock()
+        emailer = _emailer()
+        emailer.send_email("subject", "one")
+        emailer.send_email("subject", "two")
+        assert mock_server.call_count == 2
+        emailer.close()
+
+
+def test_disconnect_while_sending_is_retried():
+    """
+    Test that an email is resent on a new session if the server drops the session.
+    """
+    with patch("simulert.handlers.email.SMTP_SSL", set=True) as mock_server:
+        mock_server().sendmail.side_effect = [SMTPServerDisconnected(), {}]
+        mock_server.reset_mock()
+        emailer = _emailer()
+        emailer.send_email("subject", "body")
+        assert mock_server.call_count == 2
+        assert mock_server().sendmail.call_count == 2
+        emailer.close()
+
+
+def test_plain_transport_is_remembered():
+    """
+    Test that the SSL handshake is not attempted again after it failed once.
+    """
+    with patch("simulert.handlers.email.SMTP_SSL", set=True) as mock_ssl_server:
+        mock_ssl_server.side_effect = ConnectionRefusedError()
+        with patch("simulert.handlers.email.SMTP", set=True) as mock_server:
+            emailer = _emailer(idle_timeout=0)
+            emailer.send_email("subject", "one")
+            emailer.send_email("subject", "two")
+            mock_ssl_server.assert_called_once()
+            assert mock_server.call_count == 2
+            assert mock_server().quit.call_count == 2
+
+
+def test_idle_session_is_closed():
+    """
+    Test that an unused session is closed once the idle timeout expires.
+    """
+    with patch("simulert.handlers.email.SMTP_SSL", set=True) as mock_server:
+        emailer = _emailer(idle_timeout=0.01)
+        emailer.send_email("subject", "body")
+        deadline = time.monotonic() + 5
+        while emailer._session is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        mock_server().quit.assert_called_once()
+        assert emailer._session is None
+
+
+def test_sessions_start_no_threads():
+    """Test that keeping sessions open for reuse does not start a thread per email."""
+    with patch("simulert.handlers.email.SMTP_SSL", set=True):
+        emailer = _emailer()
+        emailer.send_email("subject", "first")
+        with patch.object(threading.Thread, "start", side_effect=AssertionError):
+            for _ in range(20):
+                emailer.send_email("subject", "body")
+        emailer.close()
+
+
+def test_deliver_raises(mock_send):
+    """
+    Test that `deliver` sends the alert email but leaves errors to the caller.
+    """
+    emailer = _emailer()
+    emailer.deliver("a message")
+    assert "Subject: An update on your simulation" in mock_send.call_args[0][2]
+    mock_send.side_effect = ValueError("valueerror")
+    with pytest.raises(ValueError):
+        emailer.deliver("a message")
+
+
+def test_digest_by_size(mock_send):
+    """
+    Test that digest alerts are sent together once enough have been collected, grouped
+    by alerter.
+    """
+    emailer = _emailer(digest_size=3)
+    emailer.deliver("one", alerter="sweep")
+    emailer.deliver("two", alerter="other")
+    mock_send.assert_not_called()
+    emailer.deliver("three", alerter="sweep")
+    mock_send.assert_called_once()
+    content = mock_send.call_args[0][2]
+    assert "Subject: 3 updates on your simulation" in content
+    assert "3 alerts from 2 alerter(s)" in content
+    assert content.index("sweep:") < content.index("one") < content.index("three")
+    assert content.index("three") < content.index("other:") < content.index("two")
+
+
+def test_digest_by_window(mock_send):
+    """
+    Test that digest alerts are sent once the window since the first alert closes.
+    """
+    emailer = _emailer(digest_window=0.05)
+    emailer.alert("one")
+    emailer.alert("two")
+    mock_send.assert_not_called()
+    deadline = time.monotonic() + 5
+    while not mock_send.called and time.monotonic() < deadline:
+        time.sleep(0.01)
+    mock_send.assert_called_once()
+    assert "Subject: 2 updates on your simulation" in mock_send.call_args[0][2]
+
+
+def test_digest_flushes_on_failure(mock_send):
+    """
+    Test that a failure alert is sent straight away with the collected alerts.
+    """
+    emailer = _emailer(digest_window=60)
+    emailer.deliver("one")
+    emailer.deliver("it broke", level=FAILED)
+    mock_send.assert_called_once()
+    assert emailer._digest._timer is None
+    assert mock_send.call_args[0][2].rstrip().endswith("it broke")
+
+
+def test_asend_email(smtp_server):
+    """
+    Test that `asend_email` sends an email to a local server over asyncio, falling
+    back to a plain connection.
+    """
+    emailer = Emailer(
+        authentication="user,key",
+        sender=("see", "sail@example.com"),
+        recipient=("soo", "rail@example.com"),
+        host=smtp_server.host,
+        port=smtp_server.port,
+    )
+    run(emailer.asend_email("subject", "body"))
+    assert emailer._use_ssl is False
+    run(emailer.adeliver("a message"))
+    assert [message["recipients"] for message in smtp_server.messages] == [
+        ["rail@example.com"]
+    ] * 2
+    assert smtp_server.messages[0]["sender"] == "sail@example.com"
+    assert "Subject: subject" in smtp_server.messages[0]["message"]
+    assert smtp_server.messages[1]["message"].rstrip().endswith("a message")
+
+
+def test_asend_email_timeout(monkeypatch):
+    """Test that `asend_email` passes the timeout on to the asyncio connection."""
+    calls = []
+
+    async def smtp_send(*args):
+        calls.append(args)
+
+    monkeypatch.setattr("simulert.handlers._aio.smtp_send", smtp_send)
+    run(_emailer(timeout=3).asend_email("subject", "body"))
+    assert calls[0][-1] == 3
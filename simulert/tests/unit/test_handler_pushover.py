@@ -3,6 +3,8 @@ from unittest.mock import patch
 import pytest
 
 from simulert.handlers import Pushover
+from simulert.handlers.pushover import PushoverError
+from simulert.tests.unit.conftest import run
 
 
 def test_constructor_from_args():
@@ -77,3 +79,72 @@ def test_send_test_message(monkeypatch):
     ) as mock_post:
         Pushover("grok", "fee").send_test_message()
         mock_post.assert_called_once()
+
+
+def test_post_to_local_server(http_server):
+    """
+    Test that messages are posted over one kept-alive connection.
+    """
+    handler = Pushover("grok", "fee", url=f"{http_server.url}/1/messages.json")
+    handler.send_message("one")
+    handler.send_message("two")
+    assert [request.path for request in http_server.requests] == [
+        "/1/messages.json"
+    ] * 2
+    assert http_server.requests[0].body == b"token=grok&user=fee&message=one"
+    assert http_server.requests[0].client == http_server.requests[1].client
+    handler.close()
+
+
+def test_reconnect_after_disconnect(http_server):
+    """
+    Test that a message is resent on a new connection when the server has hung up.
+    """
+    http_server.drop_connections = True
+    handler = Pushover("grok", "fee", url=f"{http_server.url}/1/messages.json")
+    handler.send_message("one")
+    handler.send_message("two")
+    assert [request.body[-3:] for request in http_server.requests] == [
+        b"one",
+        b"two",
+    ]
+    assert http_server.requests[0].client != http_server.requests[1].client
+    handler.close()
+
+
+def test_api_error_raises(http_server):
+    """
+    Test that an error response from the api raises with the reported errors.
+    """
+    http_server.status = 400
+    http_server.response = b'{"status": 0, "errors": ["user identifier is invalid"]}'
+    handler = Pushover("grok", "fee", url=f"{http_server.url}/1/messages.json")
+    with pytest.raises(PushoverError, match="user identifier is invalid"):
+        handler.send_message("a message")
+    handler.close()
+
+
+def test_deliver_raises():
+    """
+    Test that `deliver` calls `_post_to_api` but leaves errors to the caller.
+    """
+    with patch(
+        "simulert.handlers.pushover.Pushover._post_to_api", set=True
+    ) as mock_post:
+        mock_post.side_effect = ValueError("valueerror")
+        with pytest.raises(ValueError):
+            Pushover("grok", "fee").deliver("a message")
+        mock_post.assert_called_once_with(message="a message")
+
+
+def test_asend_message(http_server):
+    """
+    Test that `asend_message` posts to the api over asyncio and checks the response.
+    """
+    handler = Pushover("grok", "fee", url=f"{http_server.url}/1/messages.json")
+    run(handler.adeliver("a message"))
+    assert http_server.requests[0].body == b"token=grok&user=fee&message=a+message"
+    http_server.status = 400
+    http_server.response = b'{"status": 0, "errors": ["message cannot be blank"]}'
+    with pytest.raises(PushoverError, match="message cannot be blank"):
+        run(handler.asend_message(""))
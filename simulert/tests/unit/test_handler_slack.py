@@ -1,8 +1,32 @@
 import pytest
 from slack import WebClient
-from unittest.mock import patch
+from slack.errors import SlackApiError
+from unittest.mock import MagicMock, patch
 
+from simulert import levels
 from simulert.handlers import Slacker
+from simulert.tests.unit.conftest import run
+
+
+@pytest.fixture(autouse=True)
+def slack_users():
+    """Patch the slack client to find the user fee and their direct message channel."""
+    with patch(
+        "simulert.handlers.slack.WebClient.users_list", set=True
+    ) as users_list, patch(
+        "simulert.handlers.slack.WebClient.conversations_open", set=True
+    ) as conversations_open:
+        users_list.return_value = {
+            "members": [{"id": "U0", "name": "foo"}, {"id": "U1", "name": "fee"}],
+            "response_metadata": {"next_cursor": ""},
+        }
+        conversations_open.return_value = {"channel": {"id": "D1"}}
+        yield users_list, conversations_open
+
+
+def _rate_limited():
+    response = MagicMock(status_code=429, headers={"Retry-After": "0"})
+    return SlackApiError("ratelimited", response)
 
 
 def test_constructor_from_args():
@@ -43,7 +67,7 @@ def test_send_message(monkeypatch):
         "simulert.handlers.slack.WebClient.chat_postMessage", set=True
     ) as mock_post:
         Slacker("grok", "fee").send_message("a message")
-        mock_post.assert_called_once_with(channel="@fee", text="a message")
+        mock_post.assert_called_once_with(channel="D1", text="a message")
 
 
 def test_alert(monkeypatch):
@@ -54,7 +78,7 @@ def test_alert(monkeypatch):
         "simulert.handlers.slack.WebClient.chat_postMessage", set=True
     ) as mock_post:
         Slacker("grok", "fee").alert("a message")
-        mock_post.assert_called_once_with(channel="@fee", text="a message")
+        mock_post.assert_called_once_with(channel="D1", text="a message")
 
 
 def test_alert_raises(monkeypatch, caplog):
@@ -83,3 +107,128 @@ def test_send_test_message(monkeypatch):
     ) as mock_post:
         Slacker("grok", "fee").send_test_message()
         mock_post.assert_called_once()
+
+
+def test_deliver_raises():
+    """
+    Test that `deliver` calls `chat_postMessage` but leaves errors to the caller.
+    """
+    with patch(
+        "simulert.handlers.slack.WebClient.chat_postMessage", set=True
+    ) as mock_post:
+        mock_post.side_effect = ValueError("valueerror")
+        with pytest.raises(ValueError):
+            Slacker("grok", "fee").deliver("a message")
+        mock_post.assert_called_once_with(channel="D1", text="a message")
+
+
+def test_adeliver():
+    """
+    Test that `adeliver` awaits `chat_postMessage` of the async slack webclient.
+    """
+    calls = []
+
+    async def chat_postMessage(**kwargs):
+        calls.append(kwargs)
+
+    handler = Slacker("grok", "fee")
+    assert handler.async_client.run_async
+    with patch.object(handler.async_client, "chat_postMessage", chat_postMessage):
+        run(handler.adeliver("a message"))
+    assert calls == [{"channel": "D1", "text": "a message"}]
+
+
+def test_channel_is_looked_up_once(slack_users):
+    """Test that the direct message channel is looked up on the first message only."""
+    users_list, conversations_open = slack_users
+    with patch("simulert.handlers.slack.WebClient.chat_postMessage", set=True):
+        handler = Slacker("grok", "fee")
+        handler.send_message("one")
+        handler.send_message("two")
+    users_list.assert_called_once()
+    conversations_open.assert_called_once_with(users="U1")
+    assert handler.channel == "D1"
+
+
+def test_channel_given(slack_users):
+    """Test that a given channel is used without looking it up."""
+    with patch(
+        "simulert.handlers.slack.WebClient.chat_postMessage", set=True
+    ) as mock_post:
+        Slacker("grok", "fee", channel="C9").send_message("a message")
+    mock_post.assert_called_once_with(channel="C9", text="a message")
+    slack_users[0].assert_not_called()
+
+
+def test_channel_falls_back(slack_users):
+    """Test that the deprecated @username is used if the user can't be looked up."""
+    slack_users[0].side_effect = SlackApiError("missing_scope", MagicMock())
+    assert Slacker("grok", "fee").channel == "@fee"
+
+
+def test_live_status():
+    """
+    Test that progress alerts edit one status message in live status mode, and that
+    completion posts a new message.
+    """
+    with patch(
+        "simulert.handlers.slack.WebClient.chat_postMessage", set=True
+    ) as mock_post, patch(
+        "simulert.handlers.slack.WebClient.chat_update", set=True
+    ) as mock_update:
+        mock_post.return_value = {"ts": "1.5"}
+        handler = Slacker("grok", "fee", live_status=True)
+        handler.deliver("25%", levels.PROGRESS, "sim")
+        handler.deliver("50%", levels.PROGRESS, "sim")
+        handler.deliver("done", levels.COMPLETED, "sim")
+        handler.deliver("25%", levels.PROGRESS, "sim")
+    assert [call.kwargs["text"] for call in mock_post.call_args_list] == [
+        "25%",
+        "done",
+        "25%",
+    ]
+    mock_update.assert_called_once_with(channel="D1", ts="1.5", text="50%")
+
+
+def test_retry_after():
+    """Test that rate limited messages are retried rather than failing."""
+    with patch(
+        "simulert.handlers.slack.WebClient.chat_postMessage", set=True
+    ) as mock_post:
+        mock_post.side_effect = [_rate_limited(), _rate_limited(), {"ts": "1"}]
+        Slacker("grok", "fee").deliver("a message")
+    assert mock_post.call_count == 3
+
+
+def test_retry_after_gives_up():
+    """Test that a message still rate limited after the retries fails."""
+    with patch(
+        "simulert.handlers.slack.WebClient.chat_postMessage", set=True
+    ) as mock_post:
+        mock_post.side_effect = _rate_limited()
+        with pytest.raises(SlackApiError):
+            Slacker("grok", "fee", max_retries=1).deliver("a message")
+    assert mock_post.call_count == 2
+
+
+def test_adeliver_live_status():
+    """Test that `adeliver` edits the status message with the async client."""
+    calls = []
+
+    async def chat_postMessage(**kwargs):
+        calls.append(("post", kwargs))
+        return {"ts": "2.5"}
+
+    async def chat_update(**kwargs):
+        calls.append(("update", kwargs))
+
+    handler = Slacker("grok", "fee", live_status=True)
+    with patch.object(
+        handler.async_client, "chat_postMessage", chat_postMessage
+    ), patch.object(handler.async_client, "chat_update", chat_update):
+        run(handler.adeliver("25%", levels.PROGRESS))
+        run(handler.adeliver("50%", levels.PROGRESS))
+    assert calls == [
+        ("post", {"channel": "D1", "text": "25%"}),
+        ("update", {"channel": "D1", "ts": "2.5", "text": "50%"}),
+    ]
@@ -0,0 +1,123 @@
+import json
+import time
+
+import pytest
+
+from simulert.alerter import Alerter
+from simulert.handlers import Webhook
+from simulert.handlers.webhook import WebhookError
+from simulert.levels import ERROR, INFO, WARNING
+from simulert.tests.unit.conftest import run
+
+
+def _payloads(http_server):
+    return [json.loads(request.body) for request in http_server.requests]
+
+
+def test_constructor_from_environ(monkeypatch):
+    """Test that the webhook handler takes its url from the environment."""
+    monkeypatch.setenv("SIMULERT_WEBHOOK_URL", "http://localhost:1/hook")
+    assert Webhook().url == "http://localhost:1/hook"
+
+
+def test_constructor_raises(monkeypatch):
+    """Test that the webhook handler raises without a url or a valid payload."""
+    monkeypatch.delenv("SIMULERT_WEBHOOK_URL", raising=False)
+    with pytest.raises(ValueError):
+        Webhook()
+    with pytest.raises(ValueError):
+        Webhook("http://localhost:1/hook", payload={"text": "{message"})
+
+
+def test_deliver(http_server):
+    """Test that alerts are posted as JSON with the configured headers."""
+    webhook = Webhook(f"{http_server.url}/hook?x=1", headers={"Authorization": "k"})
+    webhook.deliver("a message")
+    (request,) = http_server.requests
+    assert request.path == "/hook?x=1"
+    assert request.headers["Authorization"] == "k"
+    assert request.headers["Content-Type"] == "application/json"
+    assert json.loads(request.body) == {"text": "a message"}
+
+
+def test_payload_template(http_server):
+    """Test that the payload is rendered from the alert's attributes and fields."""
+    webhook = Webhook(
+        http_server.url,
+        payload={
+            "content": "{level_name}: {message}",
+            "severity": "{level}",
+            "tags": ["{alerter}", "run {run}"],
+            "fixed": 1,
+        },
+    )
+    alerter = Alerter("hooked").remove_default_handler().add_handler(webhook)
+    alerter.alert("{prefix}sweep {run} done", WARNING, run=7)
+    assert _payloads(http_server) == [
+        {
+            "content": "WARNING: hooked: sweep 7 done",
+            "severity": WARNING,
+            "tags": ["hooked", "run 7"],
+            "fixed": 1,
+        }
+    ]
+
+
+def test_connections_are_reused(http_server):
+    """Test that a kept-alive connection is reused for later alerts."""
+    webhook = Webhook(http_server.url)
+    for number in range(3):
+        webhook.deliver(str(number))
+    assert len({request.client for request in http_server.requests}) == 1
+
+
+def test_closed_connections_are_replaced(http_server):
+    """Test that a connection closed by the server is replaced and the post retried."""
+    http_server.drop_connections = True
+    webhook = Webhook(http_server.url)
+    webhook.deliver("a")
+    webhook.deliver("b")
+    assert [payload["text"] for payload in _payloads(http_server)] == ["a", "b"]
+
+
+def test_error_responses_raise(http_server):
+    """Test that error responses raise, so the alerter reports a failure."""
+    http_server.status = 500
+    with pytest.raises(WebhookError):
+        Webhook(http_server.url).deliver("a")
+
+
+def test_batch_by_size(http_server):
+    """Test that batched alerts are posted together as a JSON array."""
+    webhook = Webhook(http_server.url, batch_size=3)
+    for number in range(4):
+        webhook.deliver(str(number), INFO)
+    assert _payloads(http_server) == [[{"text": "0"}, {"text": "1"}, {"text": "2"}]]
+    webhook.deliver("error", ERROR)
+    assert _payloads(http_server)[1] == [{"text": "3"}, {"text": "error"}]
+
+
+def test_batch_by_window(http_server):
+    """Test that batched alerts are posted once the window has passed."""
+    webhook = Webhook(http_server.url, batch_window=0.05)
+    webhook.deliver("a")
+    webhook.deliver("b")
+    assert http_server.requests == []
+    time.sleep(0.3)
+    assert _payloads(http_server) == [[{"text": "a"}, {"text": "b"}]]
+
+
+def test_pool_size_is_the_largest_asked_for(http_server):
+    """Test that webhooks on one host share a pool as large as any of them asked."""
+    pool = Webhook(http_server.url, pool_size=2)._pool
+    assert Webhook(http_server.url + "/other", pool_size=6)._pool is pool
+    Webhook(http_server.url, pool_size=3)
+    assert pool._idle.maxsize == 6
+
+
+def test_ahandle(http_server):
+    """Test that alerts are posted over asyncio from a coroutine."""
+    webhook = Webhook(http_server.url)
+    alerter = Alerter().remove_default_handler().add_handler(webhook)
+    run(alerter.aalert("async", WARNING))
+    assert _payloads(http_server) == [{"text": "async"}]
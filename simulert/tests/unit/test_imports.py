@@ -0,0 +1,63 @@
+import subprocess
+import sys
+
+import pytest
+
+# Modules that only the handlers or the async api need, which importing simulert or
+# its CLI must not load.
+DEFERRED = ("slack", "aiohttp", "smtplib", "http.client", "asyncio")
+
+
+def imported_modules(statement):
+    """
+    The modules imported by a fresh interpreter running the statement, with their
+    cumulative import times in microseconds, as reported by `-X importtime`.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                modules[name.strip()] = int(cumulative)
+    return modules
+
+
+@pytest.mark.parametrize("statement", ["import simulert", "import simulert.cli"])
+def test_handler_dependencies_are_deferred(statement):
+    """Test that importing simulert does not import the handlers' dependencies."""
+    modules = imported_modules(statement)
+    assert "simulert" in modules
+    assert not [name for name in DEFERRED if name in modules]
+
+
+def test_handlers_import_on_access():
+    """Test that handlers are imported when they are first accessed."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from simulert.handlers import Emailer; print(*sys.modules)",
+        ],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    modules = result.stdout.split()
+    assert "simulert.handlers.email" in modules
+    assert "slack" not in modules
+    assert "simulert.handlers.slack" not in modules
+
+
+def test_unknown_handler():
+    """Test that accessing an undefined handler raises an AttributeError."""
+    import simulert.handlers
+
+    with pytest.raises(AttributeError):
+        simulert.handlers.Telegraph
+    assert "Slacker" in dir(simulert.handlers)
@@ -0,0 +1,66 @@
+from simulert.delivery import DeliveryResult, Status
+from simulert.metrics import Metrics
+from simulert.tests.unit.conftest import MockHandler
+
+
+class FailingHandler(MockHandler):
+    def alert(self, message):
+        raise ConnectionError("down")
+
+
+def test_stats(alerter_with_mock_handler):
+    """Test that the outcome and latency of each delivery are counted."""
+    alerter = alerter_with_mock_handler.add_handler(FailingHandler()).enable_metrics()
+    alerter.add_handler(MockHandler().suppress_duplicates(60))
+    alerter.alert("one")
+    alerter.alert("one")
+    stats = alerter.stats()
+    assert stats["queue"] is None
+    assert set(stats["handlers"]) == {"MockHandler", "FailingHandler", "MockHandler-2"}
+    mock = stats["handlers"]["MockHandler"]
+    assert (mock["delivered"], mock["failed"], mock["dropped"]) == (2, 0, 0)
+    assert mock["latency"]["count"] == 2
+    assert mock["latency"]["buckets"][float("inf")] == 2
+    assert stats["handlers"]["FailingHandler"]["failed"] == 2
+    suppressing = stats["handlers"]["MockHandler-2"]
+    assert (suppressing["delivered"], suppressing["dropped"]) == (1, 1)
+    assert suppressing["latency"]["count"] == 1
+
+
+def test_queue_stats(alerter_with_mock_handler):
+    """Test that the queue depth is reported when alerts are queued."""
+    alerter = alerter_with_mock_handler.enable_metrics().enable_queue()
+    alerter.alert("one")
+    alerter.flush()
+    assert alerter.stats()["queue"] == {"depth": 0, "dropped": 0}
+    assert alerter.stats()["handlers"]["MockHandler"]["delivered"] == 1
+    alerter.disable_queue()
+
+
+def test_no_metrics(alerter_with_mock_handler):
+    """Test that nothing is recorded until metrics are enabled."""
+    alerter_with_mock_handler.alert("one")
+    assert alerter_with_mock_handler.stats() == {"handlers": {}, "queue": None}
+
+
+def test_prometheus_textfile(tmp_path):
+    """Test that metrics are written in the Prometheus text format."""
+    path = tmp_path / "simulert.prom"
+    metrics = Metrics('my "sim"', str(path), queue=lambda: {"depth": 3, "dropped": 1})
+    handler = MockHandler()
+    metrics.record(
+        [
+            DeliveryResult(handler, Status.DELIVERED, None, 0.02),
+            DeliveryResult(handler, Status.TIMED_OUT, None, 12.0),
+        ]
+    )
+    lines = path.read_text().splitlines()
+    labels = 'alerter="my \\"sim\\"",handler="MockHandler"'
+    assert f'simulert_alerts_total{{{labels},status="delivered"}} 1' in lines
+    assert f'simulert_alerts_total{{{labels},status="timed out"}} 1' in lines
+    assert f'simulert_delivery_seconds_bucket{{{labels},le="0.01"}} 0' in lines
+    assert f'simulert_delivery_seconds_bucket{{{labels},le="0.025"}} 1' in lines
+    assert f'simulert_delivery_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f"simulert_delivery_seconds_count{{{labels}}} 2" in lines
+    assert 'simulert_queue_depth{alerter="my \\"sim\\""} 3' in lines
+    assert "# TYPE simulert_delivery_seconds histogram" in lines
@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from simulert.alerter import Alerter
+from simulert.delivery import Status
+from simulert.handlers.base_handler import BaseHandler
+from simulert.outbox import Outbox, fcntl
+
+
+class FlakyHandler(BaseHandler):
+    """
+    A handler that fails a set number of times before delivering alerts, taking a
+    while to send each.
+    """
+
+    def __init__(self, failures=0, delay=0):
+        self.failures = failures
+        self.delay = delay
+        self.messages = []
+
+    def alert(self, message):
+        time.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("down")
+        self.messages.append(message)
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    outbox = Outbox(str(tmp_path / "outbox.jsonl"), retry_base=60)
+    yield outbox
+    outbox.close()
+
+
+def test_delivered_alerts_are_done(outbox, mock_handler):
+    """Test that delivered alerts are recorded and then marked as done."""
+    alerter = Alerter("box").remove_default_handler().add_handler(mock_handler)
+    alerter.use_outbox(outbox).alert("a message")
+    outbox.sync()
+    with open(outbox.path) as journal:
+        ops = [json.loads(line)["op"] for line in journal]
+    assert ops == ["add", "done"]
+    assert outbox.pending() == []
+
+
+def test_failed_alerts_are_pending(outbox, mock_handler):
+    """
+    Test that an alert that failed for one handler is pending for that handler only,
+    with a backoff.
+    """
+    flaky = FlakyHandler(failures=1)
+    alerter = Alerter("box").remove_default_handler()
+    alerter.add_handler(mock_handler).add_handler(flaky).use_outbox(outbox)
+    alerter.alert("a message")
+    (entry,) = outbox.pending()
+    assert (entry.alerter, entry.handler, entry.message) == (
+        "box",
+        "FlakyHandler",
+        "a message",
+    )
+    assert entry.attempts == 1
+    assert entry.next_attempt > time.time() + 50
+    alerter.use_outbox(None)
+
+
+def test_replay_in_another_process(outbox):
+    """Test that a new outbox on the same journal replays pending alerts in bulk."""
+    alerter = Alerter("box").remove_default_handler()
+    alerter.add_handler(FlakyHandler(failures=2)).use_outbox(outbox)
+    alerter.alert("one")
+    alerter.alert("two")
+    alerter.use_outbox(None)
+    outbox.close()
+
+    later = Outbox(outbox.path)
+    handler = FlakyHandler()
+    assert later.replay([handler]) == {}  # Still backing off.
+    assert later.replay([handler], force=True) == {Status.DELIVERED: 2}
+    assert handler.messages == ["one", "two"]
+    assert later.pending() == []
+    assert later.compact()
+    with open(outbox.path) as journal:
+        assert journal.read() == ""
+    later.close()
+
+
+def test_compact_keeps_pending(outbox):
+    """Test that compacting the journal keeps pending alerts and their backoff."""
+    alerter = Alerter("box").remove_default_handler()
+    alerter.add_handler(FlakyHandler(failures=1)).use_outbox(outbox)
+    alerter.alert("one")
+    alerter.alert("two")
+    alerter.use_outbox(None)
+    pending = outbox.pending()
+    assert outbox.compact()
+    assert outbox.pending() == pending
+    with open(outbox.path) as journal:
+        assert len(journal.readlines()) == 2
+
+
+@pytest.mark.skipif(fcntl is None, reason="journals are only locked with fcntl")
+def test_write_after_compaction(outbox, mock_handler):
+    """
+    Test that an outbox that waited for a compaction to finish writes to the new
+    journal rather than the one it replaced.
+    """
+    with open(outbox.path, "w"):
+        pass
+    fd = os.open(outbox.path, os.O_RDONLY)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    writer = threading.Thread(target=outbox.add, args=("box", [mock_handler], "a", 20))
+    writer.start()
+    time.sleep(0.1)
+    with open(outbox.path + ".tmp", "w"):
+        pass
+    os.replace(outbox.path + ".tmp", outbox.path)
+    os.close(fd)
+    writer.join(5)
+    assert [entry.message for entry in outbox.pending()] == ["a"]
+
+
+def test_automatic_retry(tmp_path):
+    """Test that failed alerts are retried by the alerter after the backoff."""
+    outbox = Outbox(str(tmp_path / "outbox.jsonl"), retry_base=0.05)
+    handler = FlakyHandler(failures=1)
+    alerter = Alerter("box").remove_default_handler().add_handler(handler)
+    alerter.use_outbox(outbox)
+    assert alerter.alert("a message")[0].status is Status.FAILED
+    timer = alerter._retry_timer
+    timer.join(5)
+    assert handler.messages == ["a message"]
+    assert outbox.pending() == []
+    outbox.close()
+
+
+def test_missing_path(monkeypatch):
+    """Test that an outbox cannot be made without a path."""
+    monkeypatch.delenv("SIMULERT_OUTBOX", raising=False)
+    with pytest.raises(ValueError):
+        Outbox()
+
+
+def test_retry_skips_queued_alerts(tmp_path):
+    """
+    Test that retrying a failed alert does not also resend the alerts queued or being
+    sent after it.
+    """
+    outbox = Outbox(str(tmp_path / "outbox.jsonl"), retry_base=0.01)
+    handler = FlakyHandler(failures=1, delay=0.05)
+    alerter = Alerter("box").remove_default_handler().add_handler(handler)
+    alerter.use_outbox(outbox).enable_queue()
+    for message in ("first", "second", "third"):
+        alerter.alert(message)
+    assert alerter.flush(5)
+    time.sleep(0.1)
+    assert sorted(handler.messages) == ["first", "second", "third"]
+    assert outbox.failed() == []
+    assert outbox.pending() == []
+    alerter.disable_queue()
+    alerter.use_outbox(None)
+    outbox.close()
+
+
+class TargetedHandler(FlakyHandler):
+    """A flaky handler that sends alerts to a named target."""
+
+    _target_attrs = ("target",)
+
+    def __init__(self, target, failures=0):
+        super().__init__(failures)
+        self.target = target
+
+
+def test_handlers_of_one_type_are_told_apart(tmp_path):
+    """
+    Test that an alert that failed for one of two handlers of the same type is retried
+    with that handler, in this process and in another.
+    """
+    outbox = Outbox(str(tmp_path / "outbox.jsonl"), retry_base=0.05)
+    teams = TargetedHandler("teams", failures=1)
+    discord = TargetedHandler("discord")
+    alerter = Alerter("box").remove_default_handler()
+    alerter.add_handler(teams).add_handler(discord).use_outbox(outbox)
+    alerter.alert("hello")
+    alerter._retry_timer.join(5)
+    assert (teams.messages, discord.messages) == (["hello"], ["hello"])
+    alerter.use_outbox(None)
+
+    outbox.retry_base = 60
+    teams.failures = 1
+    alerter.use_outbox(outbox).alert("goodbye")
+    alerter.use_outbox(None)
+    outbox.close()
+    later = Outbox(outbox.path)
+    teams, discord = TargetedHandler("teams"), TargetedHandler("discord")
+    assert later.replay([teams, discord], force=True) == {Status.DELIVERED: 1}
+    assert (teams.messages, discord.messages) == (["goodbye"], [])
+    later.close()
@@ -0,0 +1,141 @@
+from math import inf
+
+from simulert import levels
+from simulert.progress import ProgressTracker
+from simulert.tests.unit.conftest import run as run_coroutine
+
+
+class Clock:
+    """A stand-in for `monotonic` that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(tracker, clock, total, step_time):
+    """Step a tracker through to the total, returning the alerts and clock reads."""
+    alerts = []
+    checks = 0
+    for done in range(total + 1):
+        clock.now += step_time
+        if done >= tracker.next:
+            checks += 1
+            description = tracker.update(done)
+            if description:
+                alerts.append((done, description))
+    return alerts, checks
+
+
+def test_milestones(monkeypatch):
+    """Test that the tracker alerts once at each milestone and rarely checks."""
+    clock = Clock()
+    monkeypatch.setattr("simulert.progress.monotonic", clock)
+    tracker = ProgressTracker(1000)
+    alerts, checks = run(tracker, clock, 1000, 0.01)
+    assert [done for done, _ in alerts] == [250, 500, 750]
+    assert alerts[1][1] == "is 50% done (500/1000) at 100 steps/s, ETA 0:00:05."
+    assert checks == 5
+    assert tracker.next == inf
+
+
+def test_interval(monkeypatch):
+    """
+    Test that the tracker alerts at intervals while reading the clock far less often
+    than once a step.
+    """
+    clock = Clock()
+    monkeypatch.setattr("simulert.progress.monotonic", clock)
+    tracker = ProgressTracker(100000, milestones=(), interval=10)
+    alerts, checks = run(tracker, clock, 100000, 0.001)
+    expected = range(10000, 100000, 10000)
+    assert len(alerts) == len(expected)
+    assert all(0 <= done - due < 20 for (done, _), due in zip(alerts, expected))
+    assert checks < 200
+
+
+def test_alerter_progress(alerter_with_mock_handler, mock_handler):
+    """Test that the alerter sends progress alerts at the milestones."""
+    alerter_with_mock_handler.configure_progress(milestones=(0.5,))
+    for done in range(11):
+        alerter_with_mock_handler.progress(done, 10, "sim")
+    assert len(mock_handler._messages) == 1
+    assert mock_handler._messages[0].startswith("mock: sim is 50% done (5/10)")
+    assert levels.getLevelName(levels.PROGRESS) == "PROGRESS"
+
+
+def test_unknown_total(monkeypatch):
+    """Test that a tracker without a total alerts at intervals with the count."""
+    clock = Clock()
+    monkeypatch.setattr("simulert.progress.monotonic", clock)
+    tracker = ProgressTracker(None, interval=10)
+    alerts, _ = run(tracker, clock, 30000, 0.001)
+    assert len(alerts) == 2
+    assert alerts[0][1].startswith("has done 1")
+    assert alerts[0][1].endswith("steps/s.")
+
+
+def test_track(alerter_with_mock_handler, mock_handler):
+    """Test that `track` yields every item and alerts at milestones and the end."""
+    alerter_with_mock_handler.configure_progress(milestones=(0.5,))
+    items = list(range(10))
+    assert list(alerter_with_mock_handler.track(items, simulation_name="sim")) == items
+    assert mock_handler._messages[0].startswith("mock: sim is 50% done (5/10)")
+    assert mock_handler._messages[1] == "mock: sim finished 10 steps in 0:00:00."
+    assert len(mock_handler._messages) == 2
+
+
+def test_track_generator(alerter_with_mock_handler, mock_handler):
+    """Test that `track` counts the items of an iterable without a length."""
+    tracked = alerter_with_mock_handler.track((n for n in range(5)), every=3600)
+    assert sum(tracked) == 10
+    assert mock_handler._messages == [
+        "mock: simulation finished 5 steps in 0:00:00."
+    ]
+
+
+def test_track_stopped_early(alerter_with_mock_handler, mock_handler):
+    """Test that leaving a tracked loop early reports how far it got."""
+    alerter_with_mock_handler.configure_progress(milestones=())
+    for item in alerter_with_mock_handler.track(range(100), simulation_name="sim"):
+        if item == 41:
+            break
+    assert mock_handler._messages == [
+        "mock: sim stopped after 42/100 steps in 0:00:00."
+    ]
+
+
+def test_monitor(alerter_with_mock_handler, mock_handler):
+    """Test that `monitor` alerts when a decorated function returns or raises."""
+
+    @alerter_with_mock_handler.monitor(name="solve")
+    def solve(fail):
+        if fail:
+            raise ValueError("diverged")
+        return 42
+
+    assert solve(False) == 42
+    assert mock_handler.last_called_with("mock: solve has completed without error.")
+    try:
+        solve(True)
+    except ValueError:
+        pass
+    assert mock_handler.last_called_with(
+        "mock: solve failed to complete because of ValueError('diverged')."
+    )
+    assert solve.__name__ == "solve"
+
+
+def test_monitor_coroutine(alerter_with_mock_handler, mock_handler):
+    """Test that `monitor` wraps coroutine functions with `async with`."""
+
+    @alerter_with_mock_handler.monitor()
+    async def step():
+        return 1
+
+    assert run_coroutine(step()) == 1
+    assert mock_handler.last_called_with(
+        "mock: test_monitor_coroutine.<locals>.step has completed without error."
+    )
@@ -0,0 +1,67 @@
+from simulert.alerter import Alerter
+from simulert.levels import ERROR, INFO, PROGRESS, WARNING
+from simulert.routing import Route, RoutingTable
+
+from simulert.tests.unit.conftest import MockHandler
+
+
+def _routed():
+    pager, chat, log = MockHandler(), MockHandler(), MockHandler()
+    alerter = Alerter("r").remove_default_handler()
+    alerter.add_handler(pager).add_handler(chat).add_handler(log)
+    alerter.route(pager, min_level=ERROR).route(chat, level=PROGRESS)
+    return alerter, pager, chat, log
+
+
+def _targets(results):
+    return [result.handler for result in results]
+
+
+def test_alerts_go_to_their_routes():
+    """Test that routed handlers only get matching alerts and the rest get all."""
+    alerter, pager, chat, log = _routed()
+    assert _targets(alerter.alert("p", PROGRESS)) == [chat, log]
+    assert _targets(alerter.alert("i", INFO)) == [log]
+    assert _targets(alerter.alert("e", ERROR)) == [pager, log]
+
+
+def test_handlers_can_have_several_routes():
+    """Test that a handler takes every route it is named by."""
+    alerter, pager, chat, log = _routed()
+    alerter.route(chat, min_level=ERROR)
+    assert _targets(alerter.alert("e", ERROR)) == [pager, chat, log]
+
+
+def test_routes_by_tag():
+    """Test that routes can match the tags of alerts."""
+    alerter, pager, chat, log = _routed()
+    alerter.route(pager, tags=["oncall"])
+    assert _targets(alerter.alert("w", WARNING)) == [log]
+    assert _targets(alerter.alert("w", WARNING, tag="oncall")) == [pager, log]
+
+
+def test_routes_are_rebuilt_when_handlers_change():
+    """Test that the routing table follows changes to the handlers and routes."""
+    alerter, pager, chat, log = _routed()
+    table = alerter.routing_table()
+    assert alerter.routing_table() is table
+    alerter.remove_handler(log)
+    assert _targets(alerter.alert("i", INFO)) == []
+    alerter.clear_routes()
+    assert _targets(alerter.alert("i", INFO)) == [pager, chat]
+
+
+def test_child_alerters_follow_their_parents_routes():
+    """Test that the routes of ancestors apply to their handlers."""
+    alerter, pager, chat, log = _routed()
+    child = Alerter("r.c", parent=alerter)
+    assert _targets(child.alert("p", PROGRESS)) == [chat, log]
+
+
+def test_targets_are_looked_up_once():
+    """Test that the table works out the handlers for each level only once."""
+    handler = MockHandler()
+    table = RoutingTable([handler], [Route([handler], min_level=WARNING)])
+    assert table.targets(ERROR) == (handler,)
+    assert table.targets(ERROR) is table.targets(ERROR)
+    assert table.targets(INFO) == ()
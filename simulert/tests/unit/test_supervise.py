@@ -0,0 +1,76 @@
+import re
+import sys
+
+import pytest
+
+from simulert.supervise import Usage, describe, run_process, supervise
+
+
+def _python(code):
+    return [sys.executable, "-c", code]
+
+
+def test_run_process_usage():
+    """Test that the resources used by a process are measured."""
+    code = "x = b'x' * 50 * 2 ** 20; import sys, time; time.sleep(0.3); sys.exit(3)"
+    usage = run_process(_python(code))
+    assert usage.returncode == 3
+    assert usage.wall_time > 0
+    assert usage.cpu_time > 0
+    assert usage.peak_rss > 50 * 2 ** 20
+
+
+def test_peak_rss_excludes_simulert():
+    """Test that a small process is not reported as large as the process running it."""
+    ballast = b"x" * (300 * 2 ** 20)
+    usage = run_process(_python("import time; time.sleep(0.2)"))
+    assert usage.peak_rss < 100 * 2 ** 20
+    del ballast
+
+
+def test_run_process_killed():
+    """Test that a process killed by a signal reports the signal."""
+    usage = run_process(_python("import os, signal; os.kill(os.getpid(), 9)"))
+    assert usage.returncode == -9
+    assert describe(usage).startswith("signal SIGKILL, wall time ")
+
+
+@pytest.mark.parametrize(
+    "usage, description",
+    [
+        (Usage(0, 1.234, None, None), "exit code 0, wall time 1.23s"),
+        (
+            Usage(1, 3723.4, 3600.0, 3 * 2 ** 30),
+            "exit code 1, wall time 1:02:03, CPU time 1:00:00, peak RSS 3 GiB",
+        ),
+    ],
+)
+def test_describe(usage, description):
+    """Test the description of how a process ended."""
+    assert describe(usage) == description
+
+
+def test_supervise_completed(alerter_with_mock_handler, mock_handler):
+    """Test that a process that exits cleanly is reported as completed."""
+    assert supervise(alerter_with_mock_handler, _python("pass"), "sim") == 0
+    assert re.fullmatch(
+        r"mock: sim has completed without error \(exit code 0, wall time [\d.]+s,"
+        r" CPU time [\d.]+s, peak RSS [\d.]+ MiB\)\.",
+        mock_handler._messages[-1],
+    )
+
+
+def test_supervise_failed(alerter_with_mock_handler, mock_handler):
+    """Test that a process that crashes is reported as failed."""
+    command = _python("import os; os.abort()")
+    assert supervise(alerter_with_mock_handler, command) == -6
+    assert mock_handler._messages[-1].startswith(
+        f"mock: {sys.executable} -c 'import os; os.abort()' failed to complete because"
+        " of signal SIGABRT, "
+    )
+
+
+def test_supervise_missing_command(alerter_with_mock_handler, mock_handler):
+    """Test that a command that cannot be started is reported as failed."""
+    assert supervise(alerter_with_mock_handler, ["simulert-missing"], "sim") == 127
+    assert mock_handler._messages[-1].startswith("mock: sim failed to start because of")
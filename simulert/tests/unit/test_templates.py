@@ -0,0 +1,98 @@
+import pytest
+
+from simulert.alerter import Alerter
+from simulert.templates import Message, compile_template, render
+
+
+class Counted:
+    """A field that counts how many times it is formatted."""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __format__(self, spec):
+        self.formatted += 1
+        return "counted"
+
+
+def test_fields_are_rendered_into_the_message(alerter_with_mock_handler, mock_handler):
+    """Test that an alert given fields is rendered with its format string."""
+    alerter_with_mock_handler.alert("{sim} took {hours:.1f}h", sim="sweep", hours=1.25)
+    assert mock_handler.last_called_with("sweep took 1.2h")
+
+
+def test_messages_without_fields_are_not_formatted(
+    alerter_with_mock_handler, mock_handler
+):
+    """Test that braces in a plain message are sent as they are."""
+    alerter_with_mock_handler.alert("a {literal} message")
+    assert mock_handler.last_called_with("a {literal} message")
+
+
+def test_dropped_alerts_are_not_rendered(alerter_with_mock_handler, mock_handler):
+    """Test that an alert dropped by a rate limit is never formatted."""
+    mock_handler.limit_rate(0.001, burst=1)
+    field = Counted()
+    alerter_with_mock_handler.alert("{field}", field=field)
+    alerter_with_mock_handler.alert("{field}", field=field)
+    assert field.formatted == 1
+
+
+def test_message_is_rendered_once_for_handlers_sharing_a_template(mock_handler):
+    """Test that handlers using the same template share the rendered message."""
+    other = type(mock_handler)()
+    alerter = Alerter("t").remove_default_handler()
+    alerter.add_handler(mock_handler).add_handler(other)
+    field = Counted()
+    alerter.alert("{field}", field=field)
+    assert field.formatted == 1
+    assert other.last_called_with("counted")
+
+
+def test_named_templates(alerter_with_mock_handler, mock_handler):
+    """Test that alerters and handlers render named templates their own way."""
+    other = type(mock_handler)().add_template("done", "{sim} ✓")
+    alerter_with_mock_handler.add_handler(other)
+    alerter_with_mock_handler.add_template("done", "{prefix}{sim} is done.")
+    alerter_with_mock_handler.alert("done", sim="sweep")
+    assert mock_handler.last_called_with("mock: sweep is done.")
+    assert other.last_called_with("sweep ✓")
+
+
+def test_simulation_alert_uses_the_alerter_templates(
+    alerter_with_mock_handler, mock_handler
+):
+    """Test that the end of a simulation is reported with the alerter's templates."""
+    alerter_with_mock_handler.add_template("completed", "{simulation}: ok")
+    with alerter_with_mock_handler.simulation_alert("sim"):
+        pass
+    assert mock_handler.last_called_with("sim: ok")
+
+
+def test_child_alerters_use_their_parents_templates(mock_handler):
+    """Test that dotted alerters look templates up through their parents."""
+    parent = Alerter("p").remove_default_handler().add_handler(mock_handler)
+    parent.add_template("done", "{alerter} done")
+    Alerter("p.c", parent=parent).alert("done", sim="x")
+    assert mock_handler.last_called_with("p.c done")
+
+
+def test_malformed_templates_are_rejected(mock_handler):
+    """Test that a malformed template raises when it is added."""
+    with pytest.raises(ValueError):
+        Alerter("t").add_template("bad", "{unclosed")
+    with pytest.raises(ValueError):
+        mock_handler.add_template("bad", "}")
+
+
+def test_templates_are_compiled_once():
+    """Test that a template is parsed once and its fields are known."""
+    template = compile_template("{a} and {b:>3}")
+    assert compile_template("{a} and {b:>3}") is template
+    assert template.fields == ("a", "b")
+
+
+def test_render_passes_strings_through():
+    """Test that plain messages are rendered as themselves."""
+    assert render("plain") == "plain"
+    assert render(Message("{x}", {"x": 1})) == "1"
@@ -0,0 +1,128 @@
+import os
+
+import pytest
+
+from simulert.watch import MAX_LINE_LENGTH, LogWatcher
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = tmp_path / "solver.log"
+    path.write_text("iteration 0: NaN before watching\n")
+    return str(path)
+
+
+def _append(path, text):
+    with open(path, "a") as log:
+        log.write(text)
+
+
+@pytest.fixture
+def watcher(log_path, alerter_with_mock_handler):
+    watcher = LogWatcher(
+        alerter_with_mock_handler, [log_path], ["NaN", r"^diverged", "converged in"]
+    )
+    yield watcher
+    watcher.close()
+
+
+def test_alerts_on_new_matching_lines(watcher, log_path, mock_handler):
+    """Test that only new lines matching any pattern are alerted on."""
+    _append(log_path, "iteration 1: ok\niteration 2: NaN\nnot diverged\ndiverged\n")
+    assert watcher.poll() == 2
+    assert mock_handler._messages == [
+        f"mock: {log_path}: iteration 2: NaN",
+        f"mock: {log_path}: diverged",
+    ]
+
+
+def test_one_alert_per_line(watcher, log_path, mock_handler):
+    """Test that a line matching several patterns is alerted on once."""
+    _append(log_path, "NaN NaN, converged in 3\n")
+    assert watcher.poll() == 1
+
+
+def test_patterns_are_not_changed_by_combining(
+    log_path, alerter_with_mock_handler, mock_handler
+):
+    """
+    Test that inline flags, groups and backreferences mean the same as they would in
+    a pattern on its own, and that invalid patterns are reported.
+    """
+    patterns = ["(?i)nan", "diverged", r"(?P<word>\w+) \1", r"(?P<word>x)y"]
+    watcher = LogWatcher(alerter_with_mock_handler, [log_path], patterns)
+    _append(log_path, "step 1: NAN\nok ok\nok\nxy and diverged\n")
+    assert watcher.poll() == 3
+    assert mock_handler._messages == [
+        f"mock: {log_path}: step 1: NAN",
+        f"mock: {log_path}: ok ok",
+        f"mock: {log_path}: xy and diverged",
+    ]
+    watcher.close()
+    with pytest.raises(ValueError):
+        LogWatcher(alerter_with_mock_handler, [log_path], ["NaN", "(unclosed"])
+
+
+def test_partial_lines(watcher, log_path, mock_handler):
+    """Test that a line is only searched once it has been completely written."""
+    _append(log_path, "converged")
+    assert watcher.poll() == 0
+    _append(log_path, " in 10 steps\n")
+    assert watcher.poll() == 1
+    assert mock_handler.last_called_with(f"mock: {log_path}: converged in 10 steps")
+
+
+def test_small_blocks(log_path, alerter_with_mock_handler, mock_handler):
+    """Test that lines spanning several blocks are found."""
+    watcher = LogWatcher(
+        alerter_with_mock_handler, [log_path], ["NaN"], from_start=True, block_size=4
+    )
+    _append(log_path, "x" * 10 + "NaN\n")
+    assert watcher.poll() == 2
+    assert mock_handler.last_called_with(f"mock: {log_path}: xxxxxxxxxxNaN")
+    watcher.close()
+
+
+def test_carriage_returns(log_path, alerter_with_mock_handler, mock_handler):
+    """
+    Test that lines redrawn with carriage returns are searched, and that a line that
+    never ends is searched in pieces rather than held in memory.
+    """
+    watcher = LogWatcher(alerter_with_mock_handler, [log_path], ["NaN"], block_size=64)
+    _append(log_path, "step 1\rstep 2: NaN\rstep 3")
+    assert watcher.poll() == 1
+    assert mock_handler.last_called_with(f"mock: {log_path}: step 2: NaN")
+    _append(log_path, "." * 5000 + "NaN" + "." * 5000)
+    assert watcher.poll() == 1
+    assert len(watcher._files[0].partial) < MAX_LINE_LENGTH
+    watcher.close()
+
+
+def test_truncation(watcher, log_path, mock_handler):
+    """Test that a truncated file is read again from the start."""
+    with open(log_path, "w") as log:
+        log.write("NaN\n")
+    assert watcher.poll() == 1
+
+
+def test_rotation(watcher, log_path, mock_handler):
+    """Test that a rotated file is read to its end and then the new file is read."""
+    _append(log_path, "old NaN")
+    os.rename(log_path, log_path + ".1")
+    assert watcher.poll() == 0  # The old file is still followed until a new one.
+    _append(log_path, "new NaN\n")
+    assert watcher.poll() == 2
+    assert mock_handler._messages == [
+        f"mock: {log_path}: old NaN",
+        f"mock: {log_path}: new NaN",
+    ]
+
+
+def test_missing_file(tmp_path, alerter_with_mock_handler):
+    """Test that a file is followed from its start once it is created."""
+    path = str(tmp_path / "later.log")
+    watcher = LogWatcher(alerter_with_mock_handler, [path], ["NaN"])
+    assert watcher.poll() == 0
+    _append(path, "NaN\n")
+    assert watcher.poll() == 1
+    watcher.close()
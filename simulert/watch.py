@@ -0,0 +1,231 @@
+import os
+import re
+import threading
+from typing import Iterable, List, Optional
+
+from simulert.levels import WARNING
+from simulert.logger import logger as simulert_logger
+
+logger = simulert_logger.getChild(__name__)
+
+# The most characters of a matching line quoted in an alert.
+MAX_LINE_LENGTH = 1000
+
+# Flags set for a whole pattern, which must be scoped to it once patterns are combined.
+_GLOBAL_FLAGS = re.compile(rb"\A\(\?([aiLmsux]+)\)")
+
+
+class _FollowedFile:
+    """A log file being followed, which may be rotated or truncated under us."""
+
+    __slots__ = ("path", "fd", "identity", "position", "partial")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd = None
+        self.identity = None
+        self.position = 0
+        self.partial = b""
+
+    def open(self, at_end: bool) -> bool:
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        stat = os.fstat(fd)
+        self.fd = fd
+        self.identity = (stat.st_dev, stat.st_ino)
+        self.position = stat.st_size if at_end else 0
+        self.partial = b""
+        return True
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def rotated(self) -> bool:
+        """Whether the path now names a different file to the one that is open."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False  # Being rotated; keep reading the old file until it appears.
+        return (stat.st_dev, stat.st_ino) != self.identity
+
+
+def _matchers(patterns: List[str]) -> List["re.Pattern"]:
+    """
+    Compile the patterns into as few bytes expressions as possible, so that only the
+    matching lines are ever decoded. Patterns with groups are kept apart, because
+    combining them would renumber their backreferences and could repeat group names.
+
+    Raises:
+        (ValueError): if a pattern is not a valid regular expression.
+    """
+    combinable = []
+    matchers = []
+    for pattern in patterns:
+        try:
+            compiled = re.compile(pattern.encode(), re.MULTILINE)
+        except re.error as err:
+            raise ValueError(f"{pattern!r} is not a valid regular expression: {err}")
+        if compiled.groups:
+            matchers.append(compiled)
+            continue
+        flags = _GLOBAL_FLAGS.match(compiled.pattern)
+        if flags is None:
+            combinable.append(b"(?:%s)" % compiled.pattern)
+        else:
+            rest = compiled.pattern[flags.end() :]
+            combinable.append(b"(?%s:%s)" % (flags.group(1), rest))
+    if len(combinable) > 1:
+        try:
+            return [re.compile(b"|".join(combinable), re.MULTILINE)] + matchers
+        except re.error:
+            return [re.compile(pattern.encode(), re.MULTILINE) for pattern in patterns]
+    return [re.compile(pattern, re.MULTILINE) for pattern in combinable] + matchers
+
+
+class LogWatcher:
+    """
+    Follows growing log files, like `tail -F`, and alerts on lines matching any of a
+    set of regular expressions. Expressions without groups are combined into one so
+    that each block read from a file is searched in a single pass, and lines are only
+    split out around matches. Carriage returns, which progress bars use to redraw a
+    line, end lines too, and a line longer than a block is searched in pieces.
+    """
+
+    def __init__(
+        self,
+        alerter,
+        paths: Iterable[str],
+        patterns: Iterable[str],
+        level: Optional[int] = WARNING,
+        from_start: Optional[bool] = False,
+        block_size: Optional[int] = 1 << 20,
+    ):
+        """
+        Arguments:
+            alerter (Alerter): the alerter to send the alerts with.
+            paths (Iterable[str]): the paths of the log files to follow. Files that do
+                not exist yet are followed once they are created.
+            patterns (Iterable[str]): the regular expressions to search lines for.
+                Each is matched against whole lines with `re.MULTILINE`.
+            level (Optional[int]): the level of the alerts [default: WARNING].
+            from_start (Optional[bool]): whether to search the lines already in the
+                files, rather than only lines written from now on [default: False].
+            block_size (Optional[int]): the number of bytes read from a file at once
+                [default: 1 MiB].
+        """
+        self.alerter = alerter
+        self.patterns = list(patterns)
+        if not self.patterns:
+            raise ValueError("A log watcher needs at least one pattern to match.")
+        self.level = level
+        self.block_size = block_size
+        self._matchers = _matchers(self.patterns)
+        self._files = [_FollowedFile(path) for path in paths]
+        for followed in self._files:
+            followed.open(at_end=not from_start)
+        self.matches = 0
+
+    def close(self):
+        """Close the followed files."""
+        for followed in self._files:
+            followed.close()
+
+    def poll(self) -> int:
+        """
+        Read and search whatever has been written to the files since the last poll,
+        following files that were rotated or truncated.
+
+        Returns:
+            (int): the number of matching lines found.
+        """
+        found = 0
+        for followed in self._files:
+            if followed.fd is None and not followed.open(at_end=False):
+                continue
+            found += self._read(followed)
+            if followed.rotated():
+                # Lines written to the old file before it was rotated were read above.
+                found += self._search(followed, followed.partial + b"\n")
+                followed.close()
+                if followed.open(at_end=False):
+                    found += self._read(followed)
+        self.matches += found
+        return found
+
+    def _read(self, followed: _FollowedFile) -> int:
+        found = 0
+        if os.fstat(followed.fd).st_size < followed.position:
+            logger.info(f"{followed.path} was truncated; reading from the start.")
+            followed.position = 0
+            followed.partial = b""
+        while True:
+            block = os.pread(followed.fd, self.block_size, followed.position)
+            if not block:
+                return found
+            followed.position += len(block)
+            block = block.replace(b"\r", b"\n")
+            end = block.rfind(b"\n")
+            if end == -1:
+                followed.partial += block
+                if len(followed.partial) >= max(self.block_size, MAX_LINE_LENGTH):
+                    # Search an overlong line now rather than holding all of it.
+                    found += self._search(followed, followed.partial + b"\n")
+                    followed.partial = b""
+                continue
+            found += self._search(followed, followed.partial + block[: end + 1])
+            followed.partial = block[end + 1 :]
+
+    def _search(self, followed: _FollowedFile, lines: bytes) -> int:
+        ends = {}  # The start of each matching line mapped to its end.
+        for matcher in self._matchers:
+            position = 0
+            while True:
+                match = matcher.search(lines, position)
+                if match is None:
+                    break
+                start = lines.rfind(b"\n", 0, match.start()) + 1
+                position = lines.find(b"\n", match.end())
+                if position == -1:
+                    position = len(lines)
+                ends[start] = position
+                position += 1
+        starts = sorted(ends) if len(self._matchers) > 1 else ends
+        for start in starts:
+            line = lines[start : ends[start]].decode(errors="replace")
+            self._alert(followed.path, line[:MAX_LINE_LENGTH])
+        return len(ends)
+
+    def _alert(self, path: str, line: str):
+        prefix = "" if not self.alerter.name else f"{self.alerter.name}: "
+        self.alerter.alert(f"{prefix}{path}: {line}", self.level)
+
+    def run(
+        self,
+        interval: Optional[float] = 1.0,
+        stop: Optional[threading.Event] = None,
+    ):
+        """
+        Poll the files until stopped. A poll that found new data is followed straight
+        away by another, so a busy file is read as fast as it grows.
+
+        Arguments:
+            interval (Optional[float]): the number of seconds to wait between polls
+                that find nothing new [default: 1].
+            stop (Optional[threading.Event]): an event that stops the watcher when set.
+        """
+        stop = stop or threading.Event()
+        try:
+            while not stop.is_set():
+                positions = self._positions()
+                self.poll()
+                if self._positions() == positions:
+                    stop.wait(interval)
+        finally:
+            self.close()
+
+    def _positions(self) -> List[int]:
+        return [followed.position for followed in self._files]